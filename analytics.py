@@ -0,0 +1,135 @@
+"""
+Per-generation statistics of a run: population, births, deaths, the bounding
+box of the live cells and a heatmap of how often every cell was alive.
+
+The numpy engine (and the infinite mode) feed Analytics from inside Step,
+with the alive masks of both generations it already holds, so nothing is
+copied. Other engines are wrapped by RecordingEngine, which keeps the alive
+mask of the previous generation around instead.
+
+The series are kept in preallocated ring buffers holding the last `capacity`
+generations, and exported at the end of the run as a CSV file or a NumPy
+.npz archive.
+"""
+
+import numpy as np
+
+CAPACITY = 1 << 16
+COLUMNS = ("generation", "population", "births", "deaths", "min_row", "min_col", "max_row", "max_col")
+
+
+class Analytics:
+    def __init__(self, capacity=CAPACITY, heatmap=True):
+        self.Capacity = capacity
+        # One row per generation, the oldest one is overwritten once the buffer is full
+        self.Series = np.zeros((capacity, len(COLUMNS)), dtype=np.int64)
+        self.Count = 0
+        # Generation of the last record, callers set it when the run does not start at 0
+        self.Generation = 0
+        self.HeatmapEnabled = heatmap
+        self.Heatmap = None
+        # Alive counts of the last generations in uint8, added to the uint32 heatmap before they can overflow
+        self.Recent = None
+        self.RecentCount = 0
+        self.Scratch = None
+
+    def Record(self, before: np.array, after: np.array, box=None, origin=(0, 0)):
+        """
+        Adds the generation going from the before to the after alive mask (same shape, 0/1 or bool).
+        box is the (top, left, bottom, right) of the live cells of after when the caller already knows it,
+        origin the plane coordinates of the top left cell of both masks.
+        """
+        if self.Scratch is None or self.Scratch.shape != after.shape:
+            self.Scratch = np.empty(after.shape, dtype=np.uint8)
+        # Compared as uint8, mixing bool and uint8 operands makes numpy cast the whole mask first
+        after = after.view(np.uint8)
+        before = before.view(np.uint8)
+        population = np.count_nonzero(after)
+        kept = np.count_nonzero(np.bitwise_and(after, before, out=self.Scratch))
+        births = population - kept
+        deaths = np.count_nonzero(before) - kept
+
+        self.Generation += 1
+        row = self.Series[self.Count % self.Capacity]
+        row[:4] = (self.Generation, population, births, deaths)
+        if population == 0:
+            row[4:] = -1
+        else:
+            if box == None:
+                rows = np.flatnonzero(after.any(axis=1))
+                cols = np.flatnonzero(after.any(axis=0))
+                box = (rows[0], cols[0], rows[-1] + 1, cols[-1] + 1)
+            # Inclusive plane coordinates
+            row[4:] = (origin[0] + box[0], origin[1] + box[1], origin[0] + box[2] - 1, origin[1] + box[3] - 1)
+        self.Count += 1
+
+        if self.HeatmapEnabled:
+            if self.Recent is None:
+                self.Recent = np.zeros(after.shape, dtype=np.uint8)
+                self.Heatmap = np.zeros(after.shape, dtype=np.uint32)
+            np.add(self.Recent, after, out=self.Recent)
+            self.RecentCount += 1
+            if self.RecentCount == 255:
+                self._FlushHeatmap()
+
+    def _FlushHeatmap(self):
+        if self.RecentCount > 0:
+            np.add(self.Heatmap, self.Recent, out=self.Heatmap)
+            self.Recent[:] = 0
+            self.RecentCount = 0
+
+    def Arrays(self) -> dict:
+        """Every column of the recorded generations in chronological order, plus the heatmap when there is one"""
+        end = self.Count % self.Capacity
+        series = self.Series[:self.Count] if self.Count <= self.Capacity else \
+            np.concatenate((self.Series[end:], self.Series[:end]))
+        arrays = {name: series[:, i] for (i, name) in enumerate(COLUMNS)}
+        if self.Heatmap is not None:
+            self._FlushHeatmap()
+            arrays["heatmap"] = self.Heatmap
+        return arrays
+
+    def Save(self, filename: str):
+        """
+        .npz files get every array, any other file the series as CSV.
+        The heatmap of a CSV export goes to <name>_heatmap.csv, one row of the universe per line.
+        """
+        arrays = self.Arrays()
+        if str(filename).endswith(".npz"):
+            np.savez(filename, **arrays)
+            return
+        series = np.column_stack([arrays[name] for name in COLUMNS])
+        np.savetxt(filename, series, fmt="%d", delimiter=",", header=",".join(COLUMNS), comments="")
+        if "heatmap" in arrays:
+            stem = str(filename)[:-4] if str(filename).endswith(".csv") else str(filename)
+            np.savetxt(f"{stem}_heatmap.csv", arrays["heatmap"], fmt="%d", delimiter=",")
+
+
+class RecordingEngine:
+    """Feeds Analytics for engines that cannot do it inside their own step, every other attribute is the engine's"""
+
+    def __init__(self, engine, analytics: Analytics):
+        self.Engine = engine
+        self.Analytics = analytics
+
+    def __getattr__(self, name: str):
+        return getattr(self.Engine, name)
+
+    def Step(self, grid: np.array) -> np.array:
+        before = grid >= 255
+        grid = self.Engine.Step(grid)
+        self.Analytics.Record(before, grid >= 255)
+        return grid
+
+    def Advance(self, grid: np.array, generations: int) -> np.array:
+        for _ in range(generations):
+            grid = self.Step(grid)
+        return grid
+
+
+def Attach(engine, analytics: Analytics):
+    """Engine that records every generation it computes into analytics"""
+    if hasattr(engine, "Analytics"):
+        engine.Analytics = analytics
+        return engine
+    return RecordingEngine(engine, analytics)
@@ -0,0 +1,6 @@
+"""
+Benchmark suite, run with `python main.py bench` (or `python -m benchmarks`).
+
+    python main.py bench run --output results.json
+    python main.py bench compare results.json --baseline baseline.json
+"""
@@ -0,0 +1,4 @@
+import sys
+from benchmarks.cli import Main
+
+sys.exit(Main(sys.argv[1:]))
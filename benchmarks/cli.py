@@ -0,0 +1,121 @@
+"""Command line of the benchmark suite, also reachable as `python main.py bench ...`."""
+
+import argparse
+import json
+import platform
+import time
+import numpy as np
+from benchmarks import suite
+from benchmarks.compare import Compare
+from benchmarks.suite import Key
+
+GROUPS = ("step", "configs", "census", "load", "startup")
+
+
+def _Integers(text: str) -> tuple:
+    return tuple(int(value) for value in text.split(","))
+
+
+def _Floats(text: str) -> tuple:
+    return tuple(float(value) for value in text.split(","))
+
+
+def Run(args) -> list:
+    sizes = args.sizes or (suite.SIZES if args.full else suite.QUICK_SIZES)
+    engines = tuple(args.engines.split(","))
+    results = []
+    for group in args.only or GROUPS:
+        start = time.perf_counter()
+        if group == "step":
+            results += suite.BenchStep(sizes, args.densities, args.seeds, engines, args.repeat)
+        elif group == "configs":
+            results += suite.BenchConfigs(suite.CONFIGS, engines, args.repeat)
+        elif group == "census":
+            results += suite.BenchCensus(repeat=args.repeat)
+        elif group == "load":
+            results += suite.BenchLoad(repeat=args.repeat)
+        elif group == "startup":
+            results += suite.BenchStartup()
+        print(f"[BENCH] {group} done in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+def _Print(results: list):
+    for result in results:
+        print(f"\t{Key(result):<70} {result['value']:>14.4g} {result['unit']}")
+
+
+def _Load(filename: str) -> list:
+    with open(filename) as resultsFile:
+        return json.load(resultsFile)["results"]
+
+
+def _CheckBudget(results: list) -> int:
+    """Reports the startup times over suite.STARTUP_BUDGET, returns how many there are"""
+    over = suite.OverBudget(results)
+    for result in over:
+        print(f"[BUDGET] {Key(result)} took {result['value']:.3f}s, the budget is {suite.STARTUP_BUDGET:.3f}s")
+    return len(over)
+
+
+def _PrintComparison(rows: list) -> int:
+    regressions = 0
+    for (key, old, new, change, regressed) in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"\t{key:<70} {old:>12.4g} -> {new:<12.4g} {change:+7.1%} {flag}")
+        regressions += regressed
+    if regressions > 0:
+        print(f"[REGRESSION] {regressions} of {len(rows)} benchmark(s) got slower")
+    else:
+        print(f"[SUCCESS] No regressions in {len(rows)} benchmark(s)")
+    return regressions
+
+
+def Main(argv: list) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py bench", description="Times stepping, census and loading, and compares runs against a baseline.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks and write the results as JSON")
+    run.add_argument("--output", default="bench_results.json", help="File the results are written to")
+    run.add_argument("--only", nargs="+", choices=GROUPS, help="Only run these benchmark groups")
+    run.add_argument("--full", action="store_true", help="Step grid sizes from 100x100 up to 10000x10000")
+    run.add_argument("--sizes", type=_Integers, default=None, help="Comma separated grid sizes, e.g. 100,1000")
+    run.add_argument("--densities", type=_Floats, default=suite.DENSITIES, help="Comma separated seed densities")
+    run.add_argument("--seeds", type=_Integers, default=suite.SEEDS, help="Comma separated random seeds")
+    run.add_argument("--engines", default=",".join(suite.ENGINES), help="Comma separated engines")
+    run.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark, the best one is kept")
+    run.add_argument("--baseline", default=None, help="Also compare the results with this baseline file")
+    run.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown reported as a regression")
+
+    compare = commands.add_parser("compare", help="Compare a results file with a baseline file")
+    compare.add_argument("results", help="Results of the run to check")
+    compare.add_argument("--baseline", required=True, help="Results to compare against")
+    compare.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown reported as a regression")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        rows = Compare(_Load(args.results), _Load(args.baseline), args.threshold)
+        return 1 if _PrintComparison(rows) > 0 else 0
+
+    results = Run(args)
+    _Print(results)
+    data = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as resultsFile:
+        json.dump(data, resultsFile, indent=1)
+    print(f"[SUCCESS] Results written to {args.output}")
+
+    failed = _CheckBudget(results) > 0
+    if args.baseline != None:
+        rows = Compare(results, _Load(args.baseline), args.threshold)
+        failed = _PrintComparison(rows) > 0 or failed
+    return 1 if failed else 0
@@ -0,0 +1,23 @@
+"""Compares benchmark results with a stored baseline and flags regressions."""
+
+from benchmarks.suite import Key
+
+
+def Compare(results: list, baseline: list, threshold=0.1) -> list:
+    """
+    Returns (key, baseline value, current value, change, regressed) for every measurement in both runs.
+    change is the relative improvement (positive is better, whatever the unit), a measurement
+    regressed when it got worse by more than threshold.
+    """
+    previous = {Key(result): result for result in baseline}
+    rows = []
+    for result in results:
+        old = previous.get(Key(result))
+        if old == None or old["value"] == 0 or result["value"] == 0:
+            continue
+        if result["higher_is_better"]:
+            change = result["value"] / old["value"] - 1
+        else:
+            change = old["value"] / result["value"] - 1
+        rows.append((Key(result), old["value"], result["value"], change, change < -threshold))
+    return rows
@@ -0,0 +1,266 @@
+"""
+Timed benchmarks, every function returns a list of result records:
+    {"name", "params", "value", "unit", "higher_is_better"}
+
+Each measurement repeats the work until it took at least MIN_TIME seconds
+and keeps the best of `repeat` runs, so short benchmarks are not dominated
+by timer resolution and noise.
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from census import Census, TrackingCensus
+from engines import GetEngine
+from packed import Pack, Unpack
+from loader import Loader, SaveGrid
+from simulation import GoLSimulation
+
+MIN_TIME = 0.2
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIGS = [os.path.join(ROOT, f"config_{i}.txt") for i in (1, 2, 4, 5)] + \
+    [os.path.join(ROOT, "config_3.json")]
+
+SIZES = (100, 316, 1000, 3162, 10000)
+QUICK_SIZES = (100, 1000)
+DENSITIES = (0.1, 0.35)
+SEEDS = (0,)
+ENGINES = ("numpy", "packed")
+# Seconds a command may add to the start of a bare interpreter that imports numpy
+STARTUP_BUDGET = 0.1
+STARTUP_COMMANDS = {
+    "import": [sys.executable, "-c", "import main"],
+    "check_config": [sys.executable, "main.py", "--check-config", "config_3.json"],
+}
+
+
+def Result(name: str, params: dict, value: float, unit: str, higherIsBetter: bool) -> dict:
+    return {
+        "name": name,
+        "params": params,
+        "value": value,
+        "unit": unit,
+        "higher_is_better": higherIsBetter,
+    }
+
+
+def Key(result: dict) -> str:
+    """Identifies a measurement across runs, e.g. step[density=0.35,engine=numpy,seed=0,size=100]"""
+    params = ",".join(f"{k}={result['params'][k]}" for k in sorted(result["params"]))
+    return f"{result['name']}[{params}]"
+
+
+def _Run(work, calls: int, setup=None) -> float:
+    """Seconds spent in calls of work(), setup() runs untimed before each call and its result is passed on"""
+    if setup == None:
+        start = time.perf_counter()
+        for _ in range(calls):
+            work()
+        return time.perf_counter() - start
+    elapsed = 0
+    for _ in range(calls):
+        state = setup()
+        start = time.perf_counter()
+        work(state)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def _Time(work, repeat: int, setup=None) -> (float, int):
+    """Best seconds per call of work() and the amount of calls per timed run"""
+    calls = 1
+    while True:
+        elapsed = _Run(work, calls, setup)
+        if elapsed >= MIN_TIME:
+            break
+        calls *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, _Run(work, calls, setup))
+    return best / calls, calls
+
+
+def RandomGrid(size: int, density: float, seed: int) -> np.array:
+    rng = np.random.default_rng(seed)
+    grid = np.zeros((size, size))
+    grid[rng.random((size, size)) < density] = 255
+    return grid
+
+
+def _LoadSimulation(filename: str):
+    sim = GoLSimulation(Loader(filename).GetConfig(), logName=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim._ApplyConfiguration()
+    return sim
+
+
+def _Stepper(engine, grid: np.array) -> tuple:
+    """
+    (work, setup) stepping a fresh copy of grid once per call, in the representation the simulation keeps.
+    The packed engine steps pre-packed cells like the simulation loop does, packing is not part of a step.
+    """
+    if hasattr(engine, "StepPacked"):
+        return engine.StepPacked, Pack(grid).copy
+    return (lambda seed: engine.Advance(seed, 1)), grid.copy
+
+
+def BenchStep(sizes=QUICK_SIZES, densities=DENSITIES, seeds=SEEDS, engines=ENGINES, repeat=3) -> list:
+    """Step throughput on random soups, in cells per second"""
+    results = []
+    for engineName in engines:
+        for size in sizes:
+            engine = GetEngine(engineName, size)
+            for density in densities:
+                for seed in seeds:
+                    grid = RandomGrid(size, density, seed)
+                    # Every call steps a fresh copy of the seed, a grid advanced over and over dies out or settles
+                    work, setup = _Stepper(engine, grid)
+                    seconds, _ = _Time(work, repeat, setup)
+                    params = {"engine": engineName, "size": size, "density": density, "seed": seed}
+                    results.append(Result("step", params, size * size / seconds, "cells/s", True))
+                    if hasattr(engine, "StepPacked"):
+                        # Paid only for the frames that are drawn, logged or saved
+                        seconds, _ = _Time(lambda: Unpack(Pack(grid), size, out=grid), repeat)
+                        results.append(Result("pack_unpack", params, seconds, "s", False))
+            if hasattr(engine, "Close"):
+                engine.Close()
+    return results
+
+
+def BenchConfigs(configs=CONFIGS, engines=ENGINES, repeat=3) -> list:
+    """Step throughput on the shipped configurations"""
+    results = []
+    for filename in configs:
+        for engineName in engines:
+            sim = _LoadSimulation(filename)
+            engine = GetEngine(engineName, sim.GridSize)
+            work, setup = _Stepper(engine, sim._CurrentGrid())
+            seconds, _ = _Time(work, repeat, setup)
+            params = {"config": os.path.basename(filename), "engine": engineName}
+            results.append(Result("config_step", params, sim.GridSize ** 2 / seconds, "cells/s", True))
+    return results
+
+
+def _Track(tracker: TrackingCensus, grids: list) -> list:
+    return [tracker.Count(g, generation) for (generation, g) in enumerate(grids)]
+
+
+def BenchCensus(sizes=(100, 500), density=0.35, settle=100, generations=8, repeat=3) -> list:
+    """Seconds per generation spent counting patterns, on soups and on the shipped configurations"""
+    universes = []
+    for size in sizes:
+        universes.append(({"universe": f"soup{size}"}, RandomGrid(size, density, 0)))
+    for filename in CONFIGS:
+        universes.append(({"universe": os.path.basename(filename)}, _LoadSimulation(filename).Grid))
+
+    results = []
+    census = Census()
+    for params, grid in universes:
+        engine = GetEngine("numpy", grid.shape[0])
+        # Soups first settle down, the census then sees what a running simulation gives it
+        grid = engine.Advance(grid.copy(), settle if params["universe"].startswith("soup") else 0)
+        grids = [engine.Advance(grid, 1).copy() for _ in range(generations)]
+        for g in grids:
+            census.Count(g)
+        seconds, _ = _Time(lambda: [census.Count(g) for g in grids], repeat)
+        results.append(Result("census", params, seconds / len(grids), "s/generation", False))
+        # Warmed up like the census, every run starts with a full scan and then follows the clusters
+        tracker = TrackingCensus(census=census)
+        _Track(tracker, grids)
+        seconds, _ = _Time(lambda: _Track(tracker, grids), repeat)
+        results.append(Result("census_tracking", params, seconds / len(grids), "s/generation", False))
+    return results
+
+
+def _WriteRLE(filename: str, grid: np.array):
+    alive = grid >= 255
+    lines = [f"x = {alive.shape[1]}, y = {alive.shape[0]}, rule = B3/S23"]
+    body = []
+    for row in alive:
+        # Start of every run of equal cells, the trailing dead run of a row is never written
+        changes = np.flatnonzero(np.diff(row.astype(np.int8))) + 1
+        starts = np.concatenate(([0], changes))
+        ends = np.concatenate((changes, [row.shape[0]]))
+        runs = []
+        for (s, e) in zip(starts, ends):
+            if not row[s] and e == row.shape[0]:
+                break
+            tag = "o" if row[s] else "b"
+            runs.append(f"{e - s}{tag}" if e - s > 1 else tag)
+        body.append("".join(runs))
+    lines.append("$".join(body) + "!")
+    with open(filename, "w") as rleFile:
+        rleFile.write("\n".join(lines) + "\n")
+
+
+def _WriteLife106(filename: str, grid: np.array):
+    rows, cols = np.nonzero(grid >= 255)
+    with open(filename, "w") as lifeFile:
+        lifeFile.write("#Life 1.06\n")
+        np.savetxt(lifeFile, np.column_stack((cols, rows)), fmt="%d")
+
+
+def _WritePlaintext(filename: str, grid: np.array):
+    with open(filename, "w") as cellsFile:
+        cellsFile.write("!Name: benchmark\n")
+        for row in grid >= 255:
+            cellsFile.write("".join(np.where(row, "O", ".")) + "\n")
+
+
+def BenchLoad(size=1000, density=0.35, repeat=3) -> list:
+    """Seconds to load the same soup from every supported format"""
+    grid = RandomGrid(size, density, 0)
+    writers = {
+        "txt": lambda name: SaveGrid(name, grid),
+        "gol": lambda name: SaveGrid(name, grid),
+        "rle": lambda name: _WriteRLE(name, grid),
+        "lif": lambda name: _WriteLife106(name, grid),
+        "cells": lambda name: _WritePlaintext(name, grid),
+    }
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for (extension, write) in writers.items():
+            filename = os.path.join(directory, f"soup.{extension}")
+            write(filename)
+            seconds, _ = _Time(lambda: Loader(filename).GetConfig(), repeat)
+            params = {"format": extension, "size": size, "density": density}
+            results.append(Result("load", params, seconds, "s", False))
+    seconds, _ = _Time(lambda: Loader(os.path.join(ROOT, "config_3.json")).GetConfig(), repeat)
+    results.append(Result("load", {"format": "json", "size": 100, "density": 0}, seconds, "s", False))
+    return results
+
+
+def _TimeProcess(command: list, repeat: int) -> float:
+    """Best wall clock seconds of a fresh process running command from the repository root"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best == None else min(best, elapsed)
+    return best
+
+
+def BenchStartup(commands=STARTUP_COMMANDS, repeat=5) -> list:
+    """
+    Seconds until main is imported or a configuration is checked, every run is a new interpreter.
+    "startup_overhead" is the time on top of an interpreter that only imports numpy, the part STARTUP_BUDGET limits.
+    """
+    baseline = _TimeProcess([sys.executable, "-c", "import numpy"], repeat)
+    results = [Result("startup", {"command": "numpy"}, baseline, "s", False)]
+    for (name, command) in commands.items():
+        seconds = _TimeProcess(command, repeat)
+        results.append(Result("startup", {"command": name}, seconds, "s", False))
+        results.append(Result("startup_overhead", {"command": name}, seconds - baseline, "s", False))
+    return results
+
+
+def OverBudget(results: list, budget=STARTUP_BUDGET) -> list:
+    """startup_overhead results above the budget"""
+    return [result for result in results if result["name"] == "startup_overhead" and result["value"] > budget]
@@ -0,0 +1,485 @@
+"""
+Pattern census, counts the known entities on the grid once per generation.
+
+Live cells are grouped into clusters (cells closer than 3 cells apart end up
+together, which keeps two-piece patterns such as the Toad or the Beacon in a
+single cluster). Every cluster is cut out with a margin, normalized and hashed.
+The hash is looked up in a table that holds the result the original
+window-by-window scan gives for that exact cluster, so the counts and the
+labels they are reported under stay exactly the same as before.
+
+The table is filled up front with every rotation and reflection of every
+pattern in the registry, and learns any other cluster the first time it is seen.
+
+TrackingCensus gives the same counts without relabelling every cluster on
+every generation. Each cluster shape it meets becomes a state with its counts
+and, the first time it is needed, the state the shape turns into one
+generation later on an empty plane, and how far it moves. Clusters more than
+2 cells apart cannot affect each other within one generation, so every
+tracked cluster is advanced through that table and only checked against the
+grid. Clusters whose prediction fails, that come within 2 cells of something
+else or get close to the edges are rescanned with the census above, together
+with every live cell no prediction accounts for.
+"""
+
+import numpy as np
+from entities import PATTERNS, CENSUS_ORIENTATIONS
+from rules import CONWAY
+
+# Offsets to the cells that come after a given cell within a 5x5 window,
+# the other half of the window is covered by the symmetric pairs
+NEIGHBOUR_OFFSETS = [(di, dj) for di in range(0, 3) for dj in range(-2, 3)
+                     if di > 0 or dj > 0]
+
+
+def _Matches(region: np.array, pattern: np.array) -> np.array:
+    """Boolean map of the windows of region equal to pattern, indexed by their top left cell"""
+    rows, cols = pattern.shape
+    if region.shape[0] < rows or region.shape[1] < cols:
+        return np.zeros((0, 0), dtype=bool)
+    windows = np.lib.stride_tricks.sliding_window_view(region, pattern.shape)
+    return (windows == pattern).all(axis=(2, 3))
+
+
+def ScanRegion(region: np.array, orientations: list) -> dict:
+    """
+    Original census algorithm: for every pattern, walk the windows equal to it
+    in row-major order, count them and clear them so later windows and
+    patterns do not count the same cells again.
+    Works on a copy of a boolean region and returns {orientation index: count}.
+    """
+    region = region.copy()
+    counts = dict()
+    for index, (_, pattern) in enumerate(orientations):
+        rows, cols = pattern.shape
+        matches = _Matches(region, pattern)
+        if not matches.any():
+            continue
+
+        # Only windows whose top left cell matched before clearing anything are candidates
+        candidates = region[:matches.shape[0], :matches.shape[1]] == pattern[0, 0]
+        matches &= candidates
+        counter = 0
+        position = -1
+        while True:
+            following = np.flatnonzero(matches.ravel()[position+1:])
+            if following.shape[0] == 0:
+                break
+            position += following[0] + 1
+            r, c = divmod(position, matches.shape[1])
+            counter += 1
+            region[r: r+rows, c: c+cols] = False
+
+            # Clearing cells can change the windows that overlap the cleared one
+            r0 = max(0, r-rows+1)
+            c0 = max(0, c-cols+1)
+            r1 = min(matches.shape[0], r+rows)
+            c1 = min(matches.shape[1], c+cols)
+            local = _Matches(region[r0: r1+rows-1, c0: c1+cols-1], pattern)
+            matches[r0: r1, c0: c1] = local & candidates[r0: r1, c0: c1]
+        counts[index] = counter
+    return counts
+
+
+def LabelClusters(alive: np.array) -> (np.array, np.array, np.array):
+    """
+    Groups live cells that are at most 2 cells apart (Chebyshev distance).
+    Returns the rows, cols and cluster label of every live cell.
+    """
+    height, width = alive.shape
+    padded = np.zeros((height+4, width+4), dtype=bool)
+    padded[2:-2, 2:-2] = alive
+    paddedWidth = width + 4
+
+    flat = padded.ravel()
+    positions = np.flatnonzero(flat)
+    index = np.full(flat.shape[0], -1, dtype=np.int64)
+    index[positions] = np.arange(positions.shape[0])
+
+    sources = []
+    targets = []
+    for (di, dj) in NEIGHBOUR_OFFSETS:
+        neighbours = positions + di*paddedWidth + dj
+        linked = flat[neighbours]
+        sources.append(index[positions[linked]])
+        targets.append(index[neighbours[linked]])
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+
+    # Union-find by repeated min-label propagation and pointer jumping
+    labels = np.arange(positions.shape[0])
+    while True:
+        lowest = np.minimum(labels[sources], labels[targets])
+        updated = labels.copy()
+        np.minimum.at(updated, sources, lowest)
+        np.minimum.at(updated, targets, lowest)
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    rows = positions // paddedWidth - 2
+    cols = positions % paddedWidth - 2
+    return rows, cols, labels
+
+
+class Census:
+    def __init__(self, maxEntries=1 << 16, maxCachedCells=64*64):
+        self.Orientations = [(label, cells == 1) for (label, cells) in CENSUS_ORIENTATIONS]
+        self.Labels = [label for (label, _) in self.Orientations]
+        # Widest pattern minus one, the furthest a matching window can reach past a cluster
+        self.Margin = max(max(p.shape) for (_, p) in self.Orientations) - 1
+        self.MaxEntries = maxEntries
+        self.MaxCachedCells = maxCachedCells
+        self.Table = dict()
+        self.Hits = 0
+        self.Misses = 0
+
+        # Every rotation and reflection of every entity, alone in an empty region
+        for pattern in PATTERNS.values():
+            for shape in pattern.Orientations:
+                region = np.zeros((shape.shape[0] + 2*self.Margin,
+                                   shape.shape[1] + 2*self.Margin), dtype=bool)
+                region[self.Margin:-self.Margin,
+                       self.Margin:-self.Margin] = shape
+                key = self._Key(region)
+                if key not in self.Table:
+                    self.Table[key] = ScanRegion(region, self.Orientations)
+        self.Precomputed = len(self.Table)
+
+    def _Key(self, region: np.array) -> tuple:
+        return (region.shape, np.packbits(region).tobytes())
+
+    def _CountRegion(self, region: np.array) -> dict:
+        key = self._Key(region)
+        counts = self.Table.get(key)
+        if counts != None:
+            self.Hits += 1
+            return counts
+
+        self.Misses += 1
+        counts = ScanRegion(region, self.Orientations)
+        if region.size <= self.MaxCachedCells:
+            if len(self.Table) >= self.MaxEntries:
+                # Forget everything that was learned, the precomputed entries come first in the dict
+                self.Table = dict(list(self.Table.items())[:self.Precomputed])
+            self.Table[key] = counts
+        return counts
+
+    def Clusters(self, alive: np.array) -> list:
+        """[(rows, cols), ...] of every cluster of live cells"""
+        rows, cols, labels = LabelClusters(alive)
+        if labels.shape[0] == 0:
+            return []
+        order = np.argsort(labels, kind="stable")
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        return list(zip(np.split(rows[order], bounds), np.split(cols[order], bounds)))
+
+    def CountCluster(self, rows: np.array, cols: np.array, shape: tuple) -> dict:
+        """{orientation index: count} of one cluster of a universe of the given shape"""
+        height, width = shape
+        m = self.Margin
+        # Cluster bounding box plus margin, clipped to the universe
+        r0 = max(0, rows.min() - m)
+        c0 = max(0, cols.min() - m)
+        r1 = min(height, rows.max() + m + 1)
+        c1 = min(width, cols.max() + m + 1)
+        region = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+        region[rows - r0, cols - c0] = True
+        return self._CountRegion(region)
+
+    def Count(self, grid: np.array) -> list:
+        """Returns [(label, count), ...] for every pattern found on grid, in report order"""
+        alive = grid >= 255
+        totals = dict()
+        for (clusterRows, clusterCols) in self.Clusters(alive):
+            for index, counter in self.CountCluster(clusterRows, clusterCols, alive.shape).items():
+                totals[index] = totals.get(index, 0) + counter
+
+        return [(self.Labels[index], totals[index]) for index in sorted(totals)]
+
+
+# Next state of a state whose transition was not needed yet
+UNKNOWN = -1
+# The shape does not stay one cluster (it splits, or the rule gives birth on empty space), it gets rescanned
+UNPREDICTABLE = -2
+# The shape dies out
+EMPTY = -3
+# Generations the tracked clusters are advanced between two counts, further apart everything is rescanned
+MAX_PREDICTED = 64
+# Offsets of the cells within 1 cell of a cell (itself included)
+AROUND = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)]
+
+
+def _Grow(array: np.array, size: int) -> np.array:
+    """array with room for at least size entries along its first axis"""
+    if array.shape[0] >= size:
+        return array
+    grown = np.zeros((max(size, 2 * array.shape[0]),) + array.shape[1:], dtype=array.dtype)
+    grown[:array.shape[0]] = array
+    return grown
+
+
+class TrackingCensus:
+    """Census that follows known clusters from one generation to the next, see the module docstring"""
+
+    def __init__(self, rule=CONWAY, maxStates=1 << 16, census=None):
+        self.Census = census if census != None else Census()
+        self.Labels = self.Census.Labels
+        self.Rule = rule
+        self.MaxStates = maxStates
+        self._Reset()
+
+    def _Reset(self):
+        """Forgets every state and every tracked cluster, the next count rescans the whole grid"""
+        self.Keys = dict()
+        self.States = 0
+        self.NextState = np.zeros(0, dtype=np.int64)
+        self.DRow = np.zeros(0, dtype=np.int64)
+        self.DCol = np.zeros(0, dtype=np.int64)
+        self.Height = np.zeros(0, dtype=np.int64)
+        self.Width = np.zeros(0, dtype=np.int64)
+        # Shapes that only showed up as a prediction are not counted until they are seen on the grid
+        self.Counted = np.zeros(0, dtype=bool)
+        self.Counts = np.zeros((0, len(self.Labels)), dtype=np.int64)
+        # Cells and cells within 1 cell of every state, relative to its top left cell, stored back to back
+        self.Cells = _CellTable()
+        self.Halo = _CellTable()
+
+        self.Ids = None
+        self.Tops = None
+        self.Lefts = None
+        self.Shape = None
+        self.Generation = None
+        self.Origin = (0, 0)
+        # Scratch grid, only the predicted cells are set by a count and they are cleared right after
+        self.Predicted = None
+        # Clusters the last count rescanned and followed through the table
+        self.Rescanned = 0
+        self.Followed = 0
+
+    def _Register(self, cells: np.array) -> int:
+        """State id of a cluster shape (tight boolean box), added with its counts when new"""
+        key = (cells.shape, np.packbits(cells).tobytes())
+        state = self.Keys.get(key)
+        if state != None:
+            return state
+
+        state = self.States
+        self.States += 1
+        self.Keys[key] = state
+        for name in ("NextState", "DRow", "DCol", "Height", "Width", "Counted", "Counts"):
+            setattr(self, name, _Grow(getattr(self, name), self.States))
+        self.NextState[state] = UNKNOWN
+        self.Height[state], self.Width[state] = cells.shape
+
+        rows, cols = np.nonzero(cells)
+        self.Cells.Add(state, rows, cols)
+        padded = np.zeros((cells.shape[0] + 2, cells.shape[1] + 2), dtype=bool)
+        for (di, dj) in AROUND:
+            padded[1+di: padded.shape[0]-1+di, 1+dj: padded.shape[1]-1+dj] |= cells
+        haloRows, haloCols = np.nonzero(padded)
+        self.Halo.Add(state, haloRows - 1, haloCols - 1)
+
+        self.Counted[state] = False
+        return state
+
+    def _CountState(self, state: int):
+        """Fills the counts of a state, only done once a cluster of that shape is actually counted"""
+        height, width = self.Height[state], self.Width[state]
+        rows, cols = self.Cells.Get(state)
+        # Same region the census cuts out for a cluster away from the edges
+        m = self.Census.Margin
+        region = np.zeros((height + 2*m, width + 2*m), dtype=bool)
+        region[rows + m, cols + m] = True
+        for index, counter in self.Census._CountRegion(region).items():
+            self.Counts[state, index] = counter
+        self.Counted[state] = True
+
+    def _Resolve(self, state: int):
+        """Works out what a state turns into one generation later, alone on an empty plane"""
+        if self.Rule.B0:
+            self.NextState[state] = UNPREDICTABLE
+            return
+        height, width = self.Height[state], self.Width[state]
+        rows, cols = self.Cells.Get(state)
+        # Cells can only be born next to a live cell, one ring around the shape is enough
+        padded = np.zeros((height + 4, width + 4), dtype=np.uint8)
+        padded[rows + 2, cols + 2] = 1
+        neighbours = sum(padded[1+di: height+3+di, 1+dj: width+3+dj]
+                         for (di, dj) in AROUND if di != 0 or dj != 0)
+        following = self.Rule.Apply(neighbours, padded[1:-1, 1:-1])
+
+        nextRows, nextCols, labels = LabelClusters(following)
+        if labels.shape[0] == 0:
+            self.NextState[state] = EMPTY
+            return
+        if labels.min() != labels.max():
+            self.NextState[state] = UNPREDICTABLE
+            return
+        top = nextRows.min()
+        left = nextCols.min()
+        nextState = self._Register(following[top: nextRows.max() + 1, left: nextCols.max() + 1])
+        self.NextState[state] = nextState
+        self.DRow[state] = top - 1
+        self.DCol[state] = left - 1
+
+    def _Predict(self, generations: int):
+        """Advances the tracked clusters, the ones that die out or stop being predictable are dropped"""
+        ids, tops, lefts = self.Ids, self.Tops, self.Lefts
+        for _ in range(generations):
+            for state in np.unique(ids[self.NextState[ids] == UNKNOWN]):
+                self._Resolve(state)
+            following = self.NextState[ids]
+            known = following >= 0
+            tops = tops[known] + self.DRow[ids[known]]
+            lefts = lefts[known] + self.DCol[ids[known]]
+            ids = following[known]
+        return ids, tops, lefts
+
+    def _Verify(self, alive: np.array, ids: np.array, tops: np.array, lefts: np.array) -> (np.array, np.array):
+        """
+        Which predicted clusters are exactly the clusters on the grid: every predicted cell is alive and
+        no other live cell, predicted or not, is within 2 cells. Returns that mask and the live cells of the others.
+        """
+        valid = np.ones(ids.shape[0], dtype=bool)
+        if ids.shape[0] == 0:
+            return valid, alive
+        width = alive.shape[1]
+        if self.Predicted is None or self.Predicted.shape != alive.shape:
+            self.Predicted = np.zeros(alive.shape, dtype=bool)
+        rows, cols, owner = self.Cells.Expand(ids, tops, lefts)
+        haloRows, haloCols, haloOwner = self.Halo.Expand(ids, tops, lefts)
+
+        # Two clusters within 2 cells of each other share a cell of their halos
+        halo = haloRows * width + haloCols
+        order = np.argsort(halo, kind="stable")
+        halo = halo[order]
+        haloOwner = haloOwner[order]
+        shared = np.flatnonzero(halo[1:] == halo[:-1])
+        valid[haloOwner[shared]] = False
+        valid[haloOwner[shared + 1]] = False
+
+        # Cells that differ from the prediction, and every cluster whose halo touches one of them
+        self.Predicted[rows, cols] = True
+        mismatches = np.flatnonzero(alive != self.Predicted)
+        self.Predicted[rows, cols] = False
+        # Halos stay more than a cell away from the edges, so a neighbour index that wraps to another row never matches
+        for (di, dj) in AROUND:
+            around = mismatches + (di * width + dj)
+            found = np.minimum(np.searchsorted(halo, around), halo.shape[0] - 1)
+            valid[haloOwner[found[halo[found] == around]]] = False
+
+        rest = alive.copy()
+        kept = valid[owner]
+        rest[rows[kept], cols[kept]] = False
+        return valid, rest
+
+    def _Interior(self, tops, lefts, heights, widths, shape: tuple):
+        """Clusters whose census region is not clipped by the edges, and that cannot reach past them next generation"""
+        # At least 2, the halos then never touch the edges (see _Verify) nor wrap around a torus
+        m = max(2, self.Census.Margin)
+        return (tops >= m) & (lefts >= m) & (tops + heights + m <= shape[0]) & (lefts + widths + m <= shape[1])
+
+    def Count(self, grid: np.array, generation=None, origin=(0, 0)) -> list:
+        """
+        Same result as Census.Count. generation numbers the grid (consecutive counts by default),
+        origin is the plane position of its top left cell when the universe gets reallocated.
+        """
+        alive = grid >= 255
+        if self.States >= self.MaxStates:
+            self._Reset()
+        steps = 1
+        if generation != None and self.Generation != None:
+            steps = generation - self.Generation
+        self.Generation = generation
+
+        totals = np.zeros(len(self.Labels), dtype=np.int64)
+        ids = np.zeros(0, dtype=np.int64)
+        tops = ids
+        lefts = ids
+        rest = alive
+        if self.Ids is not None and alive.shape == self.Shape and 0 <= steps <= MAX_PREDICTED:
+            ids, tops, lefts = self._Predict(steps)
+            tops = tops + (self.Origin[0] - origin[0])
+            lefts = lefts + (self.Origin[1] - origin[1])
+            inside = self._Interior(tops, lefts, self.Height[ids], self.Width[ids], alive.shape)
+            ids, tops, lefts = ids[inside], tops[inside], lefts[inside]
+            valid, rest = self._Verify(alive, ids, tops, lefts)
+            ids, tops, lefts = ids[valid], tops[valid], lefts[valid]
+            for state in np.unique(ids[~self.Counted[ids]]):
+                self._CountState(state)
+            totals += self.Counts[ids].sum(axis=0)
+        self.Followed = ids.shape[0]
+        self.Shape = alive.shape
+        self.Origin = origin
+
+        # Everything no prediction accounts for goes through the census, interior clusters are tracked from here on
+        self.Rescanned = 0
+        newIds = []
+        newTops = []
+        newLefts = []
+        liveRows = np.flatnonzero(rest.any(axis=1))
+        if liveRows.shape[0] > 0:
+            liveCols = np.flatnonzero(rest.any(axis=0))
+            r0, c0 = liveRows[0], liveCols[0]
+            window = rest[r0: liveRows[-1] + 1, c0: liveCols[-1] + 1]
+            for (clusterRows, clusterCols) in self.Census.Clusters(window):
+                clusterRows = clusterRows + r0
+                clusterCols = clusterCols + c0
+                self.Rescanned += 1
+                for index, counter in self.Census.CountCluster(clusterRows, clusterCols, alive.shape).items():
+                    totals[index] += counter
+                top, left = clusterRows.min(), clusterCols.min()
+                height, width = clusterRows.max() - top + 1, clusterCols.max() - left + 1
+                if self._Interior(top, left, height, width, alive.shape):
+                    cells = np.zeros((height, width), dtype=bool)
+                    cells[clusterRows - top, clusterCols - left] = True
+                    newIds.append(self._Register(cells))
+                    newTops.append(top)
+                    newLefts.append(left)
+
+        self.Ids = np.concatenate((ids, np.array(newIds, dtype=np.int64)))
+        self.Tops = np.concatenate((tops, np.array(newTops, dtype=np.int64)))
+        self.Lefts = np.concatenate((lefts, np.array(newLefts, dtype=np.int64)))
+        return [(self.Labels[index], int(totals[index])) for index in np.flatnonzero(totals)]
+
+
+class _CellTable:
+    """Relative (row, col) lists of every state, back to back in growable arrays"""
+
+    def __init__(self):
+        self.Rows = np.zeros(0, dtype=np.int64)
+        self.Cols = np.zeros(0, dtype=np.int64)
+        self.Size = 0
+        self.Start = np.zeros(0, dtype=np.int64)
+        self.Length = np.zeros(0, dtype=np.int64)
+
+    def Add(self, state: int, rows: np.array, cols: np.array):
+        end = self.Size + rows.shape[0]
+        self.Rows = _Grow(self.Rows, end)
+        self.Cols = _Grow(self.Cols, end)
+        self.Rows[self.Size: end] = rows
+        self.Cols[self.Size: end] = cols
+        self.Start = _Grow(self.Start, state + 1)
+        self.Length = _Grow(self.Length, state + 1)
+        self.Start[state] = self.Size
+        self.Length[state] = rows.shape[0]
+        self.Size = end
+
+    def Get(self, state: int) -> (np.array, np.array):
+        start = self.Start[state]
+        return self.Rows[start: start + self.Length[state]], self.Cols[start: start + self.Length[state]]
+
+    def Expand(self, ids: np.array, tops: np.array, lefts: np.array) -> (np.array, np.array, np.array):
+        """Absolute rows, cols and the index of the cluster they belong to, for clusters placed at tops/lefts"""
+        lengths = self.Length[ids]
+        owner = np.repeat(np.arange(ids.shape[0]), lengths)
+        # Position of every cell within its own state
+        within = np.arange(owner.shape[0]) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        index = self.Start[ids][owner] + within
+        return tops[owner] + self.Rows[index], lefts[owner] + self.Cols[index], owner
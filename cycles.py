@@ -0,0 +1,52 @@
+"""
+Detection of still states and oscillating universes.
+
+Keeps a hash of every one of the last `window` generations, once a state
+shows up again the universe is known to repeat itself forever from there on.
+"""
+
+import hashlib
+from collections import deque
+import numpy as np
+
+
+def HashGrid(grid: np.array, origin=(0, 0)) -> bytes:
+    """
+    Hash of the raw grid buffer, no copy is made for contiguous grids.
+    The shape and the plane position of the grid are part of the hash, for universes that move around.
+    """
+    digest = hashlib.blake2b(np.array(grid.shape + tuple(origin), dtype=np.int64).tobytes(), digest_size=16)
+    digest.update(np.ascontiguousarray(grid))
+    return digest.digest()
+
+
+class CycleDetector:
+    def __init__(self, window=256):
+        self.Window = window
+        self.Seen = dict()
+        self.Recent = deque()
+        # Known once a repetition was found: the cycle length and the first generation inside the cycle
+        self.Period = None
+        self.Transient = None
+
+    def Observe(self, generation: int, grid: np.array, origin=(0, 0)) -> bool:
+        """Records the state of a generation, returns True once the universe is known to repeat itself"""
+        if self.Period != None:
+            return True
+
+        key = HashGrid(grid, origin)
+        previous = self.Seen.get(key)
+        if previous != None:
+            self.Period = generation - previous
+            self.Transient = previous
+            return True
+
+        self.Seen[key] = generation
+        self.Recent.append(key)
+        if len(self.Recent) > self.Window:
+            del self.Seen[self.Recent.popleft()]
+        return False
+
+    def Remaining(self, generation: int, target: int) -> int:
+        """Generations still needed to reach the same state as target, once the period is known"""
+        return (target - generation) % self.Period
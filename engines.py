@@ -0,0 +1,175 @@
+"""
+Stepping engines used by GoLSimulation to advance the universe.
+
+Every engine works on the same 0/255 grid used by the rest of the simulation
+and exposes the same two methods:
+    Step(grid)                  -> advances one generation and returns the grid
+    Advance(grid, generations)  -> advances N generations and returns the grid
+
+Every engine takes the rules.Rule it applies (Conway's B3/S23 by default).
+The returned grid is usually the one passed in, the infinite boundary mode
+hands back a new buffer whenever the universe outgrows the old one.
+
+Boundary modes:
+    dead        cells outside of the universe are always dead (every engine)
+    torus       the edges wrap around (numpy and loop engines)
+    infinite    unbounded plane, see unbounded.py (numpy engine) and hashlife.py (hashlife engine)
+"""
+
+import importlib
+import numpy as np
+from rules import CONWAY
+
+BOUNDARIES = ("dead", "torus", "infinite")
+
+
+class LoopEngine:
+    """Reference implementation, walks every cell and checks its neighbours one by one"""
+
+    def __init__(self, size: int, boundary="dead", rule=CONWAY):
+        self.Size = size
+        self.Torus = boundary == "torus"
+        self.Rule = rule
+        self.Buffer = np.zeros((size, size))
+
+    def Step(self, grid: np.array) -> np.array:
+        size = self.Size
+        table = self.Rule.Table
+        updatedGrid = self.Buffer
+        updatedGrid[:] = 0
+
+        for i in range(size):
+            for j in range(size):
+                curItem = grid[i][j]
+                if curItem != 0 and curItem < 255:
+                    continue
+
+                neiAm = 0
+                for di in (-1, 0, 1):
+                    for dj in (-1, 0, 1):
+                        if di == 0 and dj == 0:
+                            continue
+                        ni = i + di
+                        nj = j + dj
+                        if self.Torus:
+                            ni %= size
+                            nj %= size
+                        # Cells outside of the universe are always dead
+                        if ni < 0 or nj < 0 or ni > (size-1) or nj > (size-1):
+                            continue
+                        if grid[ni][nj] >= 255:
+                            neiAm += 1
+
+                # DEAD cells look up the birth row of the rule table, ALIVE cells the survival row
+                state = 0 if curItem == 0 else 1
+                if table[state][neiAm]:
+                    updatedGrid[i][j] = 255
+
+        grid[:] = updatedGrid
+        return grid
+
+    def Advance(self, grid: np.array, generations: int) -> np.array:
+        for _ in range(generations):
+            grid = self.Step(grid)
+        return grid
+
+
+class NumpyEngine:
+    """
+    Computes every neighbour count at once by summing the eight shifted slices of the grid.
+    With batch > 0 it advances a (batch, size, size) stack of independent universes in one go.
+    """
+
+    def __init__(self, size: int, batch=0, boundary="dead", rule=CONWAY):
+        self.Size = size
+        self.Torus = boundary == "torus"
+        self.Rule = rule
+        shape = (batch, size, size) if batch > 0 else (size, size)
+        # Alive cells with a one cell border, dead or a copy of the opposite edge on a torus
+        self.Padded = np.zeros(shape[:-2] + (size+2, size+2), dtype=np.uint8)
+        self.Neighbours = np.zeros(shape, dtype=np.uint8)
+        self.Births = np.zeros(shape, dtype=bool)
+        self.Survivors = np.zeros(shape, dtype=bool)
+        self.Scratch = np.zeros(shape, dtype=bool)
+        # analytics.Analytics fed with both alive masks of every step, see analytics.Attach
+        self.Analytics = None
+
+    def Step(self, grid: np.array) -> np.array:
+        padded = self.Padded
+        alive = padded[..., 1:-1, 1:-1]
+        neighbours = self.Neighbours
+        np.greater_equal(grid, 255, out=alive, casting="unsafe")
+        if self.Torus:
+            padded[..., 0, 1:-1] = alive[..., -1, :]
+            padded[..., -1, 1:-1] = alive[..., 0, :]
+            padded[..., :, 0] = padded[..., :, -2]
+            padded[..., :, -1] = padded[..., :, 1]
+
+        np.add(padded[..., :-2, :-2], padded[..., :-2, 1:-1], out=neighbours)
+        neighbours += padded[..., :-2, 2:]
+        neighbours += padded[..., 1:-1, :-2]
+        neighbours += padded[..., 1:-1, 2:]
+        neighbours += padded[..., 2:, :-2]
+        neighbours += padded[..., 2:, 1:-1]
+        neighbours += padded[..., 2:, 2:]
+
+        # For B3/S23: dead cells with exactly 3 neighbours are born, alive cells with 2 or 3 survive
+        self.Rule.Apply(neighbours, alive, self.Births,
+                        self.Survivors, self.Scratch)
+        if self.Analytics != None:
+            self.Analytics.Record(alive, self.Births)
+        np.multiply(self.Births, 255, out=grid, casting="unsafe")
+        return grid
+
+    def Advance(self, grid: np.array, generations: int) -> np.array:
+        for _ in range(generations):
+            grid = self.Step(grid)
+        return grid
+
+
+# (module, class) of every engine, the module is only imported once the engine is used
+ENGINES = {
+    "numpy": ("engines", "NumpyEngine"),
+    "loop": ("engines", "LoopEngine"),
+    "packed": ("packed", "PackedEngine"),
+    "sparse": ("sparse", "SparseEngine"),
+    "hashlife": ("hashlife", "HashLifeEngine"),
+    "parallel": ("parallel", "ParallelEngine"),
+}
+
+
+def _Load(module: str, name: str):
+    return getattr(importlib.import_module(module), name)
+
+
+def GetEngine(name: str, size: int, workers=0, boundary="dead", rule=CONWAY):
+    """Builds the stepping engine registered under name for a universe of size x size"""
+    if name not in ENGINES:
+        raise ValueError(f"[ENGINE_NOT_FOUND] Unknown engine '{name}'")
+    engine = _Load(*ENGINES[name])
+    if boundary not in BOUNDARIES:
+        raise ValueError(f"[BOUNDARY_NOT_FOUND] Unknown boundary mode '{boundary}'")
+    # B0 rules fill empty space every other generation, engines that skip empty space cannot follow
+    if rule.B0 and (name in ("sparse", "hashlife") or boundary == "infinite"):
+        runner = "the infinite boundary" if boundary == "infinite" else f"the {name} engine"
+        raise ValueError(
+            f"[RULE_NOT_SUPPORTED] {rule} gives birth on empty space, {runner} cannot run it")
+    if name == "hashlife":
+        # HashLife has no edges, it only runs as the infinite plane
+        if boundary != "infinite":
+            raise ValueError(
+                "[BOUNDARY_NOT_SUPPORTED] The hashlife engine runs on an unbounded plane, use --boundary infinite")
+        return engine(size, rule=rule)
+    if boundary == "infinite":
+        if name != "numpy":
+            raise ValueError(
+                f"[BOUNDARY_NOT_SUPPORTED] The {name} engine has no infinite mode, use the numpy or hashlife engine")
+        return _Load("unbounded", "InfiniteEngine")(size, rule=rule)
+    if boundary == "torus":
+        if name not in ("numpy", "loop"):
+            raise ValueError(
+                f"[BOUNDARY_NOT_SUPPORTED] The {name} engine has no torus mode, use the numpy or loop engine")
+        return engine(size, boundary=boundary, rule=rule)
+    if name == "parallel":
+        return engine(size, workers, rule=rule)
+    return engine(size, rule=rule)
@@ -0,0 +1,142 @@
+"""
+Ensemble runner, advances many independent seeds together.
+
+Seeds of the same universe size and rule are stacked into one (N, size, size) array and
+advanced with a single batched step. Chunks of seeds are spread over a process
+pool, and every universe ends up as one row of a CSV file with its final
+population, detected period/transient and the census of its final state.
+"""
+
+import csv
+import io
+import contextlib
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+from census import Census
+from cycles import CycleDetector
+from engines import NumpyEngine
+from entities import CENSUS_ORIENTATIONS
+from loader import Loader
+from rules import ParseRule
+from simulation import GoLSimulation
+
+COLUMNS = ["config", "universe_size", "rule", "generation", "population", "period", "transient"] + \
+    [label for (label, _) in CENSUS_ORIENTATIONS]
+
+
+def _LoadGrid(filename: str, rule=None) -> (np.array, object):
+    sim = GoLSimulation(Loader(filename, rule=rule).GetConfig(), logName=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim._ApplyConfiguration()
+    return sim.Grid.astype(np.uint8), sim.Rule
+
+
+def _RunGroup(filenames: list, grids: list, rule, generations: int, detectCycles: bool, census: Census) -> list:
+    """Advances universes of the same size and rule together, returns one result row per universe"""
+    size = grids[0].shape[0]
+    stack = np.stack(grids)
+    active = list(range(len(grids)))
+    finals = [None] * len(grids)
+    detectors = [CycleDetector() for _ in grids]
+    engine = NumpyEngine(size, batch=len(active), rule=rule)
+    if detectCycles:
+        for k in active:
+            detectors[k].Observe(0, stack[k])
+
+    generation = 0
+    while generation < generations and len(active) > 0:
+        engine.Step(stack)
+        generation += 1
+        if not detectCycles:
+            continue
+
+        done = [k for (k, index) in enumerate(active)
+                if detectors[index].Observe(generation, stack[k])]
+        if len(done) == 0:
+            continue
+        for k in done:
+            # Known cycle, jump this universe to the phase it has at the last generation
+            index = active[k]
+            remaining = detectors[index].Remaining(generation, generations)
+            finals[index] = NumpyEngine(size, rule=rule).Advance(
+                stack[k].copy(), remaining)
+        keep = [k for k in range(len(active)) if k not in done]
+        active = [active[k] for k in keep]
+        stack = stack[keep]
+        engine = NumpyEngine(size, batch=len(active), rule=rule)
+
+    for (k, index) in enumerate(active):
+        finals[index] = stack[k]
+
+    rows = []
+    for (index, grid) in enumerate(finals):
+        row = dict.fromkeys(COLUMNS, 0)
+        row["config"] = filenames[index]
+        row["universe_size"] = size
+        row["rule"] = rule.Name
+        row["generation"] = generations
+        row["population"] = int(np.count_nonzero(grid))
+        row["period"] = detectors[index].Period if detectors[index].Period != None else ""
+        row["transient"] = detectors[index].Transient if detectors[index].Transient != None else ""
+        for (label, counter) in census.Count(grid):
+            row[label] = counter
+        rows.append(row)
+    return rows
+
+
+def _RunChunk(args) -> list:
+    filenames, generations, detectCycles, rule = args
+    census = Census()
+    groups = dict()
+    for (position, filename) in enumerate(filenames):
+        grid, gridRule = _LoadGrid(filename, rule)
+        key = (grid.shape[0], gridRule)
+        groups.setdefault(key, ([], [], []))
+        groups[key][0].append(filename)
+        groups[key][1].append(grid)
+        groups[key][2].append(position)
+
+    # Rows come back in the order of the seeds, whatever groups and chunks they were run in
+    rows = [None] * len(filenames)
+    for ((_, gridRule), (names, grids, positions)) in groups.items():
+        for (position, row) in zip(positions, _RunGroup(names, grids, gridRule,
+                                                        generations, detectCycles, census)):
+            rows[position] = row
+    return rows
+
+
+def RunEnsemble(filenames: list, generations: int, output: str, workers=0, detectCycles=True, chunkSize=256, rule=None):
+    """Runs every seed for the given generations and writes one CSV row per seed to output, rule overrides the seeds' own rules"""
+    if rule != None:
+        rule = ParseRule(rule)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    # Small enough to keep every worker busy, big enough to make the batched step worth it
+    chunkSize = max(1, min(chunkSize, -(-len(filenames) // workers)))
+    chunks = [(filenames[i: i+chunkSize], generations, detectCycles, rule)
+              for i in range(0, len(filenames), chunkSize)]
+    workers = max(1, min(workers, len(chunks)))
+
+    start = time.perf_counter()
+    outputFile = open(output, "w", newline="")
+    writer = csv.DictWriter(outputFile, fieldnames=COLUMNS)
+    writer.writeheader()
+    if workers == 1:
+        results = map(_RunChunk, chunks)
+    else:
+        pool = mp.Pool(workers)
+        results = pool.imap(_RunChunk, chunks)
+    for rows in results:
+        writer.writerows(rows)
+    outputFile.close()
+    if workers != 1:
+        pool.close()
+        pool.join()
+
+    elapsed = time.perf_counter() - start
+    rate = len(filenames) / elapsed * 60 if elapsed > 0 else float("inf")
+    print(
+        f"[SUCCESS] Simulated {len(filenames)} universes in {elapsed:.3f}s ({rate:.0f} seeds/minute)")
+    print(f"\tResults written to {output}")
@@ -1,188 +1,277 @@
 import numpy as np
 
+# Every known pattern, "O" is a live cell and "." a dead one.
+# The order is the order the census checks (and reports) them in.
+# (name, family, kind, config type used to place it, census checks rotations, rows)
+PATTERN_DATA = [
+    # SpaceShips
+    ("LightWeightSpaceshipV1", "LightWeightSpaceship", "spaceship", "light-weight spaceship", True, [
+        "O..O.",
+        "....O",
+        "O...O",
+        ".OOOO",
+    ]),
+    ("LightWeightSpaceshipV2", "LightWeightSpaceship", "spaceship", None, True, [
+        "..OO.",
+        "OO.OO",
+        "OOOO.",
+        ".OO..",
+    ]),
+    ("LightWeightSpaceshipV3", "LightWeightSpaceship", "spaceship", None, True, [
+        ".OOOO",
+        "O...O",
+        "....O",
+        "O..O.",
+    ]),
+    ("LightWeightSpaceshipV4", "LightWeightSpaceship", "spaceship", None, True, [
+        ".OO..",
+        "OOOO.",
+        "OO.OO",
+        "..OO.",
+    ]),
+    ("GliderV1", "Glider", "spaceship", "Glider", True, [
+        "..O",
+        "O.O",
+        ".OO",
+    ]),
+    ("GliderV2", "Glider", "spaceship", None, True, [
+        "O.O",
+        ".OO",
+        ".O.",
+    ]),
+    ("GliderV3", "Glider", "spaceship", None, True, [
+        "..O",
+        "O.O",
+        ".OO",
+    ]),
+    ("GliderV4", "Glider", "spaceship", None, True, [
+        "O..",
+        ".OO",
+        "OO.",
+    ]),
+    # Oscilators
+    ("BeaconV1", "Beacon", "oscillator", "beacon", True, [
+        "OO..",
+        "OO..",
+        "..OO",
+        "..OO",
+    ]),
+    ("BeaconV2", "Beacon", "oscillator", None, True, [
+        "OO..",
+        "O...",
+        "...O",
+        "..OO",
+    ]),
+    ("ToadV1", "Toad", "oscillator", "toad", True, [
+        "..O.",
+        "O..O",
+        "O..O",
+        ".O..",
+    ]),
+    ("ToadV2", "Toad", "oscillator", None, True, [
+        "....",
+        ".OOO",
+        ".OO.",
+        "O...",
+    ]),
+    ("BlinkerV1", "Blinker", "oscillator", "blinker", False, [
+        "OOO",
+    ]),
+    ("BlinkerV2", "Blinker", "oscillator", None, False, [
+        "O",
+        "O",
+        "O",
+    ]),
+    # Still Lifes
+    ("Block", "Block", "still life", "block", False, [
+        "OO",
+        "OO",
+    ]),
+    ("Beehive", "Beehive", "still life", "beehive", True, [
+        ".OO.",
+        "O..O",
+        ".OO.",
+    ]),
+    ("Loaf", "Loaf", "still life", "loaf", True, [
+        ".OO.",
+        "O..O",
+        ".O.O",
+        "..O.",
+    ]),
+    ("Boat", "Boat", "still life", "boat", True, [
+        "OO.",
+        "O.O",
+        ".O.",
+    ]),
+    ("Tub", "Tub", "still life", "tub", True, [
+        ".O.",
+        "O.O",
+        ".O.",
+    ]),
+]
 
-class Entities:
-    def __init__(self):
-        # Still Lifes
-        self.Block = np.array([
-            [255,    255],
-            [255,  255]
-        ])
-        self.Beehive = np.array([
-            [0,    255, 255, 0],
-            [255,  0, 0, 255],
-            [0,  255, 255, 0]
-        ])
-        self.Loaf = np.array([
-            [0,    255, 255, 0],
-            [255,  0, 0, 255],
-            [0,  255, 0, 255],
-            [0,  0, 255, 0]
-        ])
-        self.Boat = np.array([
-            [255,    255, 0],
-            [255,  0, 255],
-            [0,  255, 0]
-        ])
-        self.Tub = np.array([
-            [0,    255, 0],
-            [255,  0, 255],
-            [0,  255, 0]
-        ])
-        # Oscilators
-        self.BlinkerV1 = np.array([
-            [255, 255, 255]
-        ])
-        self.BlinkerV2 = np.array([
-            [255],
-            [255],
-            [255]
-        ])
-        self.ToadV1 = np.array([
-            [0,    0, 255, 0],
-            [255,  0, 0, 255],
-            [255,  0, 0, 255],
-            [0,  255, 0, 0]
-        ])
-        self.ToadV2 = np.array([
-            [0,  0, 0, 0],
-            [0,  255, 255, 255],
-            [0,  255, 255, 0],
-            [255,  0, 0, 0]
-        ])
-        self.BeaconV1 = np.array([
-            [255, 255, 0, 0],
-            [255, 255, 0, 0],
-            [0,  0, 255, 255],
-            [0,  0, 255, 255]
-        ])
-        self.BeaconV2 = np.array([
-            [255, 255, 0, 0],
-            [255, 0, 0, 0],
-            [0,  0, 0, 255],
-            [0,  0, 255, 255]
-        ])
-        # SpaceShips
-        self.GliderV1 = np.array([
-            [0,    0, 255],
-            [255,  0, 255],
-            [0,  255, 255]
-        ])
-        self.GliderV2 = np.array([
-            [255,  0, 255],
-            [0,  255, 255],
-            [0,  255, 0]
-        ])
-        self.GliderV3 = np.array([
-            [0,  0, 255],
-            [255,  0, 255],
-            [0,  255, 255]
-        ])
-        self.GliderV4 = np.array([
-            [255,  0, 0],
-            [0,  255, 255],
-            [255,  255, 0]
-        ])
-        self.LightWeightSpaceshipV1 = np.array([
-            [255, 0, 0, 255, 0],
-            [0, 0,  0,  0, 255],
-            [255, 0, 0, 0, 255],
-            [0,  255, 255, 255, 255]
-        ])
-        self.LightWeightSpaceshipV2 = np.array([
-            [0, 0, 255, 255, 0],
-            [255, 255, 0, 255, 255],
-            [255, 255, 255, 255, 0],
-            [0, 255, 255, 0, 0]
-        ])
-        self.LightWeightSpaceshipV3 = np.array([
-            [0, 255, 255, 255, 255],
-            [255, 0, 0, 0, 255],
-            [0, 0, 0, 0, 255],
-            [255, 0, 0, 255, 0]
-        ])
-        self.LightWeightSpaceshipV4 = np.array([
-            [0, 255, 255, 0, 0],
-            [255, 255, 255, 255, 0],
-            [255, 255, 0, 255, 255],
-            [0, 0, 255, 255, 0]
-        ])
-        return
+ROTATION_NAMES = ("", " Rotated Right", " Rotated Downwards", " Rotated Left")
+
+
+def _Frozen(cells: np.array) -> np.array:
+    cells = np.ascontiguousarray(cells, dtype=np.uint8)
+    cells.flags.writeable = False
+    return cells
+
+
+class Pattern:
+    """Immutable description of a known pattern, Cells holds 1 for every live cell"""
+
+    def __init__(self, name: str, family: str, kind: str, configType: str, rotatable: bool, rows: list):
+        self.Name = name
+        self.Family = family
+        self.Kind = kind
+        self.ConfigType = configType
+        self.Rotatable = rotatable
+        self.Cells = _Frozen([[1 if c == "O" else 0 for c in row] for row in rows])
+        self.Shape = self.Cells.shape
+        self.Population = int(self.Cells.sum())
+        live = np.argwhere(self.Cells)
+        # (top row, left col, bottom row, right col) of the live cells
+        self.BoundingBox = (int(live[:, 0].min()), int(live[:, 1].min()),
+                            int(live[:, 0].max()), int(live[:, 1].max()))
+
+        # Every distinct rotation and reflection
+        orientations = []
+        for cells in (self.Cells, self.Cells[:, ::-1]):
+            for i in range(4):
+                rotated = np.rot90(cells, i)
+                if not any(np.array_equal(rotated, o) for o in orientations):
+                    orientations.append(_Frozen(rotated))
+        self.Orientations = tuple(orientations)
+
+
+# Config types accepted in JSON configurations, known without building any pattern
+CONFIG_TYPES = tuple(data[3] for data in PATTERN_DATA if data[3] != None)
+
+
+def _BuildCensusOrientations(patterns: dict) -> tuple:
+    """
+    (label, cells) for everything the census looks for, in check order.
+    Orientations identical to one checked earlier (GliderV3 is GliderV1) are kept: the census
+    clears every window it counts, which can complete a window of a shape that was already checked.
+    """
+    orientations = []
+    for pattern in patterns.values():
+        turns = 4 if pattern.Rotatable else 1
+        for i in range(turns):
+            orientations.append((pattern.Name + ROTATION_NAMES[i], _Frozen(np.rot90(pattern.Cells, i))))
+    return tuple(orientations)
 
-    def GetEntities(self) -> list:
-        ent = []
 
-        ent.append(("LightWeightSpaceshipV1",
-                    self.LightWeightSpaceshipV1, True))
-        ent.append(("LightWeightSpaceshipV2",
-                    self.LightWeightSpaceshipV2, True))
-        ent.append(("LightWeightSpaceshipV3",
-                    self.LightWeightSpaceshipV3, True))
-        ent.append(("LightWeightSpaceshipV4",
-                    self.LightWeightSpaceshipV4, True))
+def _BuildRegistry():
+    """Builds PATTERNS, PATTERNS_BY_TYPE, CENSUS_ORIENTATIONS and ENTITIES"""
+    patterns = dict()
+    for data in PATTERN_DATA:
+        patterns[data[0]] = Pattern(*data)
 
-        ent.append(("GliderV1", self.GliderV1, True))
-        ent.append(("GliderV2", self.GliderV2, True))
-        ent.append(("GliderV3", self.GliderV3, True))
-        ent.append(("GliderV4", self.GliderV4, True))
+    patternsByType = dict()
+    for pattern in patterns.values():
+        if pattern.ConfigType != None:
+            patternsByType[pattern.ConfigType] = pattern
 
-        ent.append(("BeaconV1", self.BeaconV1, True))
-        ent.append(("BeaconV2", self.BeaconV2, True))
+    registry = globals()
+    registry["PATTERNS"] = patterns
+    registry["PATTERNS_BY_TYPE"] = patternsByType
+    registry["CENSUS_ORIENTATIONS"] = _BuildCensusOrientations(patterns)
+    # (name, 0/255 pattern, rotatable) in census order, built once and shared
+    registry["ENTITIES"] = [(pattern.Name, _Frozen(pattern.Cells * 255), pattern.Rotatable)
+                            for pattern in patterns.values()]
 
-        ent.append(("ToadV1", self.ToadV1, True))
-        ent.append(("ToadV2", self.ToadV2, True))
 
-        ent.append(("BlinkerV1", self.BlinkerV1, False))
-        ent.append(("BlinkerV2", self.BlinkerV2, False))
+_REGISTRY = ("PATTERNS", "PATTERNS_BY_TYPE", "CENSUS_ORIENTATIONS", "ENTITIES")
 
-        ent.append(("Block", self.Block, False))
-        ent.append(("Beehive", self.Beehive, True))
-        ent.append(("Loaf", self.Loaf, True))
-        ent.append(("Boat", self.Boat, True))
-        ent.append(("Tub", self.Tub, True))
 
-        return ent
+def _Registry(name: str):
+    if name not in globals():
+        _BuildRegistry()
+    return globals()[name]
+
+
+def __getattr__(name: str):
+    """The pattern registry is only built the first time something asks for it"""
+    if name in _REGISTRY:
+        return _Registry(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def Place(pattern: Pattern, i: int, j: int, grid: np.array, orientation=0):
+    """Adds a pattern with its top left cell at (i, j), cells past the edge of the universe are dropped"""
+    cells = pattern.Orientations[orientation]
+    rows = min(cells.shape[0], grid.shape[0] - i)
+    cols = min(cells.shape[1], grid.shape[1] - j)
+    if rows <= 0 or cols <= 0:
+        return
+    grid[i: i+rows, j: j+cols] = cells[:rows, :cols] * 255
+
+
+class Entities:
+    """
+    Access to the shared pattern registry, kept for the code that works with 0/255 arrays.
+    The arrays (Entities().Block, ...) are built the first time one of them is used.
+    """
+
+    def __getattr__(self, name: str) -> np.array:
+        pattern = _Registry("PATTERNS").get(name)
+        if pattern == None:
+            raise AttributeError(f"'Entities' object has no attribute {name!r}")
+        cells = pattern.Cells * 255
+        setattr(self, name, cells)
+        return cells
+
+    def GetEntities(self) -> list:
+        return _Registry("ENTITIES")
+
+    def Load(self, name: str, i, j, grid):
+        """adds the pattern registered under name with top left cell at (i, j)"""
+        Place(_Registry("PATTERNS")[name], i, j, grid)
 
     def LoadBlock(self, i, j, grid):
         """adds a Block with top left cell at (i, j)"""
-        grid[i: i+2, j: j+2] = self.Block
+        self.Load("Block", i, j, grid)
 
     def LoadBeehive(self, i, j, grid):
         """adds a Beehive with top left cell at (i, j)"""
-        grid[i: i+4, j: j+3] = self.Beehive
+        self.Load("Beehive", i, j, grid)
 
     def LoadLoaf(self, i, j, grid):
         """adds a Loaf with top left cell at (i, j)"""
-        grid[i: i+4, j: j+4] = self.Loaf
+        self.Load("Loaf", i, j, grid)
 
     def LoadBoat(self, i, j, grid):
         """adds a Boat with top left cell at (i, j)"""
-        grid[i: i+3, j: j+3] = self.Boat
+        self.Load("Boat", i, j, grid)
 
     def LoadTub(self, i, j, grid):
         """adds a Tub with top left cell at (i, j)"""
-        grid[i: i+3, j: j+3] = self.Tub
+        self.Load("Tub", i, j, grid)
 
     # Oscilators
 
     def LoadBlinker(self, i, j, grid):
         """adds a Blinker with top left cell at (i, j)"""
-        grid[i: i+1, j: j+3] = self.BlinkerV1
+        self.Load("BlinkerV1", i, j, grid)
 
     def LoadToad(self, i, j, grid):
         """adds a Toad with top left cell at (i, j)"""
-        grid[i: i+4, j: j+4] = self.ToadV1
+        self.Load("ToadV1", i, j, grid)
 
     def LoadBeacon(self, i, j, grid):
         """adds a Beacon with top left cell at (i, j)"""
-        grid[i: i+4, j: j+4] = self.BeaconV1
+        self.Load("BeaconV1", i, j, grid)
 
     # Spaceships
 
     def LoadGlider(self, i, j, grid):
         """adds a Glider with top left cell at (i, j)"""
-        grid[i: i+3, j: j+3] = self.GliderV1
+        self.Load("GliderV1", i, j, grid)
 
     def LoadLightWeightSpaceship(self, i, j, grid):
         """adds a LightWeightSpaceship with top left cell at (i, j)"""
-        grid[i: i+4, j: j+5] = self.LightWeightSpaceshipV1
+        self.Load("LightWeightSpaceshipV1", i, j, grid)
+
@@ -0,0 +1,342 @@
+"""
+HashLife engine, advances the universe by huge amounts of generations at once.
+
+The universe is a quadtree of canonical macro-cells: two nodes with the same
+contents are always the same object, and the future of every node is
+memoized on the node itself. Patterns that repeat themselves in space or time
+(gliders, spaceships, oscillators) end up sharing almost all of their work.
+
+HashLife works on an unbounded plane, the grid handed to Import/Export is a
+window of it with its top left corner at (0, 0). HashLifeEngine runs it as
+the infinite boundary mode, with a grid that follows the live cells.
+"""
+
+import numpy as np
+from rules import CONWAY
+from unbounded import SHRINK_RATIO, _LiveBox, _Margin
+
+
+class Node:
+    """Square macro-cell of 2^Level x 2^Level cells"""
+    __slots__ = ("Level", "NW", "NE", "SW", "SE", "Population", "Next")
+
+    def __init__(self, level: int, nw, ne, sw, se, population: int):
+        self.Level = level
+        self.NW = nw
+        self.NE = ne
+        self.SW = sw
+        self.SE = se
+        self.Population = population
+        # Memoized futures, keyed by j for a jump of 2^j generations
+        self.Next = {}
+
+
+OFF = Node(0, None, None, None, None, 0)
+ON = Node(0, None, None, None, None, 1)
+
+
+class HashLife:
+    def __init__(self, maxNodes=1 << 21, rule=CONWAY):
+        self.MaxNodes = maxNodes
+        # Memoized futures are only valid for this rule, every universe keeps its own nodes
+        self.Rule = rule
+        self.Table = dict()
+        self.Empty = [OFF]
+        self.Root = self._GetEmpty(3)
+        # Universe coordinates of the top left cell of Root
+        self.OriginRow = 0
+        self.OriginCol = 0
+        self.Generation = 0
+        self.Collections = 0
+
+    # Node cache
+
+    def _Join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        """Returns the canonical node made of the four given quadrants"""
+        key = (nw, ne, sw, se)
+        node = self.Table.get(key)
+        if node == None:
+            node = Node(nw.Level+1, nw, ne, sw, se,
+                        nw.Population + ne.Population + sw.Population + se.Population)
+            self.Table[key] = node
+        return node
+
+    def _GetEmpty(self, level: int) -> Node:
+        while len(self.Empty) <= level:
+            e = self.Empty[-1]
+            self.Empty.append(self._Join(e, e, e, e))
+        return self.Empty[level]
+
+    def _Collect(self):
+        """Evicts every node that is not part of the current universe, together with all memoized futures"""
+        self.Table = dict()
+        self.Empty = [OFF]
+        seen = set()
+        pending = [self.Root]
+        while pending:
+            node = pending.pop()
+            if node.Level == 0 or id(node) in seen:
+                continue
+            seen.add(id(node))
+            node.Next = {}
+            self.Table[(node.NW, node.NE, node.SW, node.SE)] = node
+            pending.extend((node.NW, node.NE, node.SW, node.SE))
+        self.Collections += 1
+
+    # Evolution
+
+    def _Centre(self, node: Node) -> Node:
+        return self._Join(node.NW.SE, node.NE.SW, node.SW.NE, node.SE.NW)
+
+    def _Pad(self, node: Node) -> Node:
+        """Surrounds node with empty space, returning a node one level up with node in its centre"""
+        e = self._GetEmpty(node.Level-1)
+        return self._Join(self._Join(e, e, e, node.NW),
+                          self._Join(e, e, node.NE, e),
+                          self._Join(e, node.SW, e, e),
+                          self._Join(node.SE, e, e, e))
+
+    def _Base(self, node: Node) -> Node:
+        """One generation of the centre 2x2 cells of a 4x4 node"""
+        cells = [[0]*4 for _ in range(4)]
+        for qi, quad in ((0, node.NW), (1, node.NE), (2, node.SW), (3, node.SE)):
+            r0 = (qi // 2) * 2
+            c0 = (qi % 2) * 2
+            cells[r0][c0] = quad.NW.Population
+            cells[r0][c0+1] = quad.NE.Population
+            cells[r0+1][c0] = quad.SW.Population
+            cells[r0+1][c0+1] = quad.SE.Population
+
+        table = self.Rule.Table
+        result = []
+        for i in (1, 2):
+            for j in (1, 2):
+                neiAm = 0
+                for di in (-1, 0, 1):
+                    for dj in (-1, 0, 1):
+                        if di != 0 or dj != 0:
+                            neiAm += cells[i+di][j+dj]
+                if table[cells[i][j]][neiAm]:
+                    result.append(ON)
+                else:
+                    result.append(OFF)
+        return self._Join(result[0], result[1], result[2], result[3])
+
+    def _Successor(self, node: Node, j: int) -> Node:
+        """Centre half of node advanced 2^j generations, with j <= Level-2"""
+        if node.Population == 0:
+            return node.NW
+        j = min(j, node.Level-2)
+        result = node.Next.get(j)
+        if result != None:
+            return result
+
+        if node.Level == 2:
+            result = self._Base(node)
+        else:
+            nw, ne, sw, se = node.NW, node.NE, node.SW, node.SE
+            c1 = self._Successor(nw, j)
+            c2 = self._Successor(self._Join(nw.NE, ne.NW, nw.SE, ne.SW), j)
+            c3 = self._Successor(ne, j)
+            c4 = self._Successor(self._Join(nw.SW, nw.SE, sw.NW, sw.NE), j)
+            c5 = self._Successor(self._Join(nw.SE, ne.SW, sw.NE, se.NW), j)
+            c6 = self._Successor(self._Join(ne.SW, ne.SE, se.NW, se.NE), j)
+            c7 = self._Successor(sw, j)
+            c8 = self._Successor(self._Join(sw.NE, se.NW, sw.SE, se.SW), j)
+            c9 = self._Successor(se, j)
+
+            if j < node.Level-2:
+                # The nine parts already went the whole way, just stitch their centres together
+                result = self._Join(self._Join(c1.SE, c2.SW, c4.NE, c5.NW),
+                                    self._Join(c2.SE, c3.SW, c5.NE, c6.NW),
+                                    self._Join(c4.SE, c5.SW, c7.NE, c8.NW),
+                                    self._Join(c5.SE, c6.SW, c8.NE, c9.NW))
+            else:
+                result = self._Join(self._Successor(self._Join(c1, c2, c4, c5), j),
+                                    self._Successor(
+                                        self._Join(c2, c3, c5, c6), j),
+                                    self._Successor(
+                                        self._Join(c4, c5, c7, c8), j),
+                                    self._Successor(self._Join(c5, c6, c8, c9), j))
+
+        node.Next[j] = result
+        return result
+
+    def _Jump(self, j: int):
+        """Advances the whole universe 2^j generations"""
+        root = self.Root
+        # Pad until nothing alive can leave the centre half before the jump is over
+        while root.Level < j+3 or self._Centre(self._Centre(root)).Population != root.Population:
+            half = 1 << (root.Level-1)
+            root = self._Pad(root)
+            self.OriginRow -= half
+            self.OriginCol -= half
+
+        quarter = 1 << (root.Level-2)
+        self.Root = self._Successor(root, j)
+        self.OriginRow += quarter
+        self.OriginCol += quarter
+        self.Generation += 1 << j
+
+        if len(self.Table) > self.MaxNodes:
+            self._Collect()
+
+    def Advance(self, generations: int):
+        """Advances the universe the given amount of generations"""
+        j = 0
+        while generations > 0:
+            if generations & 1:
+                self._Jump(j)
+            generations >>= 1
+            j += 1
+
+    # Conversion from/to the numpy grid
+
+    def _Build(self, alive: np.array, row: int, col: int, level: int) -> Node:
+        size = 1 << level
+        block = alive[row: row+size, col: col+size]
+        if not block.any():
+            return self._GetEmpty(level)
+        if level == 0:
+            return ON
+        half = size // 2
+        return self._Join(self._Build(alive, row, col, level-1),
+                          self._Build(alive, row, col+half, level-1),
+                          self._Build(alive, row+half, col, level-1),
+                          self._Build(alive, row+half, col+half, level-1))
+
+    def Import(self, grid: np.array):
+        """Replaces the universe with the live cells of a 0/255 grid"""
+        alive = grid >= 255
+        level = 3
+        while (1 << level) < max(alive.shape):
+            level += 1
+        self.Root = self._Build(alive, 0, 0, level)
+        self.OriginRow = 0
+        self.OriginCol = 0
+
+    def LiveCells(self) -> (np.array, np.array):
+        """Universe coordinates (rows, cols) of every live cell"""
+        rows = []
+        cols = []
+        pending = [(self.Root, self.OriginRow, self.OriginCol)]
+        while pending:
+            node, r, c = pending.pop()
+            if node.Population == 0:
+                continue
+            if node.Level == 0:
+                rows.append(r)
+                cols.append(c)
+                continue
+            half = 1 << (node.Level-1)
+            pending.append((node.NW, r, c))
+            pending.append((node.NE, r, c+half))
+            pending.append((node.SW, r+half, c))
+            pending.append((node.SE, r+half, c+half))
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+    def Export(self, grid: np.array) -> np.array:
+        """Writes the window of the universe that overlaps grid into it"""
+        rows, cols = self.LiveCells()
+        inside = (rows >= 0) & (rows < grid.shape[0]) & (
+            cols >= 0) & (cols < grid.shape[1])
+        grid[:] = 0
+        grid[rows[inside], cols[inside]] = 255
+        return grid
+
+
+class HashLifeEngine:
+    """
+    Engine adapter for the infinite boundary. Like unbounded.InfiniteEngine, the grid it returns covers
+    the live cells plus a margin and its top left cell sits at (OriginRow, OriginCol) on the plane.
+    """
+
+    def __init__(self, size: int, rule=CONWAY):
+        self.Size = size
+        self.Universe = HashLife(rule=rule)
+        self.Grid = None
+        self.Box = None
+        self.OriginRow = 0
+        self.OriginCol = 0
+        # analytics.Analytics fed with the live cells around every generation, see _Record
+        self.Analytics = None
+
+    def Reset(self, grid: np.array):
+        """Takes grid, with its top left cell at (OriginRow, OriginCol), as the universe"""
+        self.Universe.Import(grid)
+        self.Universe.OriginRow = self.OriginRow
+        self.Universe.OriginCol = self.OriginCol
+        self.Grid = grid
+        self.Box = _LiveBox(grid >= 255)
+
+    def _Export(self, rows: np.array, cols: np.array) -> np.array:
+        """Writes the live cells into the grid, reallocated around them when they do not fit or fill too little of it"""
+        if rows.shape[0] == 0:
+            self.Grid[:] = 0
+            self.Box = None
+            return self.Grid
+        top, left = int(rows.min()), int(cols.min())
+        height, width = int(rows.max()) + 1 - top, int(cols.max()) + 1 - left
+        r0, c0 = top - self.OriginRow, left - self.OriginCol
+        fits = r0 >= 1 and c0 >= 1 and r0 + height <= self.Grid.shape[0] - 1 and c0 + width <= self.Grid.shape[1] - 1
+        tooBig = self.Grid.shape[0] > SHRINK_RATIO * (height + 2*_Margin(height)) or \
+            self.Grid.shape[1] > SHRINK_RATIO * (width + 2*_Margin(width))
+        if fits and not tooBig:
+            self.Grid[:] = 0
+        else:
+            marginRows, marginCols = _Margin(height), _Margin(width)
+            self.Grid = np.zeros((height + 2*marginRows, width + 2*marginCols), dtype=np.uint8)
+            self.OriginRow = top - marginRows
+            self.OriginCol = left - marginCols
+        self.Grid[rows - self.OriginRow, cols - self.OriginCol] = 255
+        self.Box = (top - self.OriginRow, left - self.OriginCol,
+                    top - self.OriginRow + height, left - self.OriginCol + width)
+        return self.Grid
+
+    def _Record(self, before: tuple, after: tuple):
+        """Hands both generations to Analytics as masks of the plane region that holds the live cells of either"""
+        rows = np.concatenate((before[0], after[0]))
+        cols = np.concatenate((before[1], after[1]))
+        if rows.shape[0] == 0:
+            empty = np.zeros((0, 0), dtype=bool)
+            self.Analytics.Record(empty, empty)
+            return
+        top, left = int(rows.min()), int(cols.min())
+        shape = (int(rows.max()) + 1 - top, int(cols.max()) + 1 - left)
+        masks = []
+        for (liveRows, liveCols) in (before, after):
+            mask = np.zeros(shape, dtype=bool)
+            mask[liveRows - top, liveCols - left] = True
+            masks.append(mask)
+        self.Analytics.Record(masks[0], masks[1], origin=(top, left))
+
+    def Advance(self, grid: np.array, generations: int) -> np.array:
+        if grid is not self.Grid:
+            self.Reset(grid)
+        if self.Analytics == None:
+            self.Universe.Advance(generations)
+            return self._Export(*self.Universe.LiveCells())
+
+        live = self.Universe.LiveCells()
+        for _ in range(generations):
+            self.Universe.Advance(1)
+            following = self.Universe.LiveCells()
+            self._Record(live, following)
+            live = following
+        return self._Export(*live)
+
+    def Step(self, grid: np.array) -> np.array:
+        return self.Advance(grid, 1)
+
+    def AdvanceCells(self, grid: np.array, generations: int):
+        """Advance without writing the live cells into a grid, Export brings the grid up to date when it is needed"""
+        if grid is not self.Grid:
+            self.Reset(grid)
+        self.Universe.Advance(generations)
+
+    def Export(self) -> np.array:
+        """Grid of the current generation, see _Export"""
+        return self._Export(*self.Universe.LiveCells())
+
+    def Population(self) -> int:
+        return self.Universe.Root.Population
@@ -1,59 +1,368 @@
 import json
+import re
+import numpy as np
+from entities import CONFIG_TYPES
+from packed import Pack
+from rules import CONWAY, ParseRule
+
+# Bytes read from a configuration file at once, big seeds are never held in memory as text
+CHUNK_SIZE = 1 << 22
+POWERS_OF_TEN = 10 ** np.arange(16, dtype=np.int64)
+
+
+def _ReadChunks(configFile, carry=b""):
+    """Yields the file in chunks that always end on a line break"""
+    while True:
+        chunk = configFile.read(CHUNK_SIZE)
+        if not chunk:
+            if carry:
+                yield carry
+            return
+        chunk = carry + chunk
+        end = chunk.rfind(b"\n") + 1
+        carry = chunk[end:]
+        if end > 0:
+            yield chunk[:end]
+
+
+def _BadLine(chunk: bytes, perLine: int) -> bytes:
+    """First non-blank line of a chunk that does not hold exactly perLine integers"""
+    for line in chunk.splitlines():
+        values = line.split()
+        if len(values) > 0 and (len(values) != perLine or not all(re.fullmatch(rb"[+-]?\d+", v) for v in values)):
+            return line
+    return b""
+
+
+def _ParseIntegers(chunk: bytes, perLine=2) -> np.array:
+    """
+    (lines, perLine) integers of a chunk of lines holding perLine whitespace separated numbers each,
+    lines starting with # and blank lines are ignored. Any other line raises a ValueError.
+    """
+    if b"#" in chunk:
+        chunk = re.sub(rb"(?m)^#.*$", b"", chunk)
+    # A short or long line would shift every pair after it, so the values are checked against the non-blank lines
+    lines = chunk.count(b"\n") + (not chunk.endswith(b"\n"))
+    tail = chunk[chunk.rfind(b"\n") + 1:]
+    if re.search(rb"\n[ \t\r]*\n", chunk) or re.match(rb"[ \t\r]*(?:\n|\Z)", chunk) or tail.isspace():
+        data = np.frombuffer(chunk, dtype=np.uint8)
+        lineIds = np.cumsum(data == ord("\n"))[data > ord(" ")]
+        lines = int(np.count_nonzero(np.diff(lineIds))) + 1 if lineIds.shape[0] > 0 else 0
+    # fromstring reads a chunk without any number as a single 0
+    if lines == 0:
+        return np.zeros((0, perLine), dtype=np.int64)
+    try:
+        values = np.fromstring(chunk, dtype=np.int64, sep=" ")
+    except ValueError:
+        values = None
+    if values is None or values.shape[0] != perLine * lines:
+        line = _BadLine(chunk, perLine).decode("utf-8", "replace").strip()
+        raise ValueError(
+            f"[PATTERN_COORDS_INVALID] Every line must hold {perLine} integers, got '{line}'")
+    return values.reshape(lines, perLine)
+
+
+def _ParseRLE(chunks) -> (np.array, np.array):
+    """
+    Decodes the body of a RLE file into the (rows, cols) of its live cells.
+    Every chunk is decoded at once with array operations, the row/column where a chunk ends is carried to the next one.
+    """
+    rowList = []
+    colList = []
+    row = 0
+    col = 0
+    pending = b""
+    for chunk in chunks:
+        body = np.frombuffer(pending + chunk.translate(None, b" \t\r\n"), dtype=np.uint8)
+        end = np.flatnonzero(body == ord("!"))
+        finished = end.shape[0] > 0
+        if finished:
+            body = body[:end[0]+1]
+
+        isDigit = (body >= ord("0")) & (body <= ord("9"))
+        tags = np.flatnonzero(~isDigit)
+        # Digits after the last tag belong to the first run of the next chunk
+        last = tags[-1] + 1 if tags.shape[0] > 0 else 0
+        pending = body[last:].tobytes()
+        body = body[:last]
+        isDigit = isDigit[:last]
+
+        # Run counts, digits are weighted by their distance to the tag that follows them
+        digits = np.flatnonzero(isDigit)
+        owner = np.searchsorted(tags, digits)
+        weights = POWERS_OF_TEN[tags[owner] - digits - 1]
+        counts = np.bincount(owner, weights=(body[digits] - ord("0")) * weights,
+                             minlength=tags.shape[0]).astype(np.int64)
+        counts[counts == 0] = 1
+
+        tagBytes = body[tags]
+        isLine = tagBytes == ord("$")
+        isEnd = tagBytes == ord("!")
+        isAlive = ~isLine & ~isEnd & (tagBytes != ord("b")) & (tagBytes != ord("."))
+
+        # Row of every run, and the column it starts at (columns restart after every $)
+        lineCounts = np.where(isLine, counts, 0)
+        runRows = row + np.cumsum(lineCounts) - lineCounts
+        widths = np.where(isLine | isEnd, 0, counts)
+        consumed = np.cumsum(widths) - widths
+        restart = np.maximum.accumulate(np.where(isLine, np.arange(tags.shape[0]), -1))
+        lineStart = np.where(restart >= 0, (consumed + widths)[np.maximum(restart, 0)], 0)
+        runCols = np.where(restart >= 0, consumed - lineStart, col + consumed)
+
+        aliveRuns = np.flatnonzero(isAlive)
+        lengths = counts[aliveRuns]
+        cellRows = np.repeat(runRows[aliveRuns], lengths)
+        starts = np.repeat(runCols[aliveRuns], lengths)
+        offsets = np.arange(cellRows.shape[0]) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        rowList.append(cellRows)
+        colList.append(starts + offsets)
+
+        if tags.shape[0] > 0:
+            row = int(runRows[-1] + lineCounts[-1])
+            if restart[-1] >= 0:
+                col = int((consumed + widths)[-1] - lineStart[-1])
+            else:
+                col += int((consumed + widths)[-1])
+        if finished:
+            break
+
+    if len(rowList) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(rowList), np.concatenate(colList)
 
 
 class Loader:
-    def __init__(self, filename):
+    def __init__(self, filename, universeSize=None, rule=None):
         self.SimulationConfig = dict()
+        self.UniverseSize = universeSize
         if str(filename).endswith(".json"):
             self.SimulationConfig = self._LoadDataFromJSON(filename)
         elif str(filename).endswith(".txt"):
             self.SimulationConfig = self._LoadDataFromTXT(filename)
+        elif str(filename).endswith(".gol"):
+            self.SimulationConfig = self._LoadDataFromSnapshot(filename)
+        elif str(filename).endswith(".rle"):
+            self.SimulationConfig = self._LoadDataFromRLE(filename)
+        elif str(filename).endswith(".lif") or str(filename).endswith(".life"):
+            self.SimulationConfig = self._LoadDataFromLife106(filename)
+        elif str(filename).endswith(".cells"):
+            self.SimulationConfig = self._LoadDataFromPlaintext(filename)
+
+        if self.UniverseSize != None:
+            self.SimulationConfig["universe_size"] = self.UniverseSize
+            self.SimulationConfig.pop("universe_cols", None)
+        # The rule comes from the file (RLE header, snapshot, "rule" key of a JSON config) unless overridden,
+        # it is compiled here so an invalid rule is reported before anything runs
+        if rule != None:
+            self.SimulationConfig["rule"] = rule
+        if self.SimulationConfig.get("rule") != None:
+            self.SimulationConfig["rule"] = ParseRule(
+                self.SimulationConfig["rule"])
 
     def _LoadDataFromJSON(self, filename: str) -> dict:
         configFile = open(filename, "r")
 
         data = json.loads(configFile.read())
         configFile.close()
+        if not isinstance(data, dict):
+            raise ValueError(f"[INVALID_CONFIG] A JSON configuration must be an object, got {type(data).__name__}")
         data["mode"] = "json"
 
         return data
 
     def _LoadDataFromTXT(self, filename: str) -> dict:
-        configFile = open(filename, "r")
-        rows = configFile.readlines()
-        configFile.close()
+        """
+        First line holds the universe size as "rows [cols [originRow originCol]]", every other line the x y coordinates of a live cell.
+        The origin is the plane position of the top left cell, written for universes of the infinite boundary.
+        """
+        with open(filename, "rb") as configFile:
+            header = configFile.readline().split()
+            if len(header) < 1:
+                return {"mode": "txt"}
+            if not all(h.isdigit() for h in header[:2]) or len(header) not in (1, 2, 4) or \
+                    not all(re.fullmatch(rb"[+-]?\d+", h) for h in header[2:]):
+                raise ValueError(
+                    f"[INVALID_UNIVERSE_SIZE] The first line must hold the universe size, got '{b' '.join(header).decode('utf-8', 'replace')}'")
+            values = [_ParseIntegers(chunk) for chunk in _ReadChunks(configFile)]
+        coords = np.concatenate(values) if len(values) > 0 else np.zeros((0, 2), dtype=np.int64)
+        header = [int(h) for h in header]
 
-        data = {"mode": "txt"}
-        patterns = []
+        return {
+            "mode": "cells",
+            "universe_size": header[0],
+            "universe_cols": header[1] if len(header) > 1 else header[0],
+            "origin": tuple(header[2:4]) if len(header) == 4 else (0, 0),
+            "rows": coords[:, 0],
+            "cols": coords[:, 1],
+        }
 
-        i = 0
-        for line in rows:
-            if len(line) == 0:
-                i += 1
-                continue
-            if i == 0:
-                n = line.split(" ")
-                if len(n) < 1:
-                    break
-                data["universe_size"] = int(n[0])
-                i += 1
+    def _CellsConfig(self, rows: np.array, cols: np.array, rule=None) -> dict:
+        """Config for a pattern without a universe of its own, moved to the top left corner or centred in --universe-size"""
+        if rows.shape[0] > 0:
+            rows = rows - rows.min()
+            cols = cols - cols.min()
+        extent = int(max(rows.max(), cols.max())) + 1 if rows.shape[0] > 0 else 1
+        size = extent
+        if self.UniverseSize != None and self.UniverseSize > extent:
+            size = self.UniverseSize
+            rows = rows + (size - int(rows.max(initial=0)) - 1) // 2
+            cols = cols + (size - int(cols.max(initial=0)) - 1) // 2
+
+        data = {
+            "mode": "cells",
+            "universe_size": size,
+            "rows": rows,
+            "cols": cols,
+        }
+        if rule != None:
+            data["rule"] = rule
+        return data
+
+    def _LoadDataFromRLE(self, filename: str) -> dict:
+        configFile = open(filename, "rb")
+        rule = None
+        while True:
+            line = configFile.readline()
+            if not line:
+                break
+            stripped = line.strip()
+            if stripped.startswith(b"#") or len(stripped) == 0:
                 continue
-            else:
-                coord = line.split(" ")
-                (x, y) = coord
+            if stripped.startswith(b"x"):
+                match = re.search(rb"rule\s*=\s*([^,\s]+)", stripped)
+                if match:
+                    rule = match.group(1).decode("ascii")
+                break
+            # No header line, the body starts right away
+            configFile.seek(configFile.tell() - len(line))
+            break
 
-                patterns.append(
-                    {
-                        "x": int(x.rstrip().strip()),
-                        "y": int(y.rstrip().strip())
-                    }
-                )
-            i += 1
+        rows, cols = _ParseRLE(_ReadChunks(configFile))
+        configFile.close()
+        return self._CellsConfig(rows, cols, rule)
 
-        if len(patterns) > 0:
-            data["patterns"] = patterns
+    def _LoadDataFromLife106(self, filename: str) -> dict:
+        """Life 1.06, one "x y" pair per live cell where x is the column"""
+        with open(filename, "rb") as configFile:
+            values = [_ParseIntegers(chunk) for chunk in _ReadChunks(configFile)]
+        coords = np.concatenate(values) if len(values) > 0 else np.zeros((0, 2), dtype=np.int64)
+        return self._CellsConfig(coords[:, 1], coords[:, 0])
 
-        return data
+    def _LoadDataFromPlaintext(self, filename: str) -> dict:
+        """Plaintext (.cells), ! starts a comment, O is a live cell and . a dead one"""
+        configFile = open(filename, "rb")
+        rowList = []
+        colList = []
+        row = 0
+        for chunk in _ReadChunks(configFile):
+            for line in chunk.splitlines():
+                if line.startswith(b"!"):
+                    continue
+                cols = np.flatnonzero(np.frombuffer(line, dtype=np.uint8) == ord("O"))
+                rowList.append(np.full(cols.shape[0], row, dtype=np.int64))
+                colList.append(cols)
+                row += 1
+        configFile.close()
+        if len(rowList) == 0:
+            return self._CellsConfig(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        return self._CellsConfig(np.concatenate(rowList), np.concatenate(colList))
+
+    def _LoadDataFromSnapshot(self, filename: str) -> dict:
+        # Imported here, snapshot pulls in tempfile and most configurations never need it
+        import snapshot
+
+        header, cells = snapshot.Load(filename)
+        return {
+            "mode": "snapshot",
+            "universe_size": header["rows"],
+            "universe_cols": header["cols"],
+            "origin": header["origin"],
+            "generation": header["generation"],
+            "rule": header["rule"],
+            "cells": cells,
+        }
 
     def GetConfig(self) -> dict:
         return self.SimulationConfig
+
+
+def SaveGrid(filename: str, grid: np.array, generation=0, rule=CONWAY, origin=(0, 0)):
+    """
+    Writes the live cells of a grid to disk, .txt and .gol files can be loaded back as a configuration.
+    origin is the plane position of the top left cell, kept by both so an infinite universe resumes where it was.
+    """
+    if str(filename).endswith(".npy"):
+        np.save(filename, grid)
+        return
+    if str(filename).endswith(".gol"):
+        import snapshot
+
+        snapshot.Save(filename, Pack(grid), grid.shape[1], generation, str(rule), origin)
+        return
+
+    coords = np.argwhere(grid >= 255)
+    configFile = open(filename, "w")
+    if tuple(origin) != (0, 0):
+        configFile.write(f"{grid.shape[0]} {grid.shape[1]} {origin[0]} {origin[1]}\n")
+    else:
+        configFile.write(f"{grid.shape[0]} {grid.shape[1]}\n")
+    np.savetxt(configFile, coords, fmt="%d")
+    configFile.close()
+
+
+def CheckConfig(config: dict) -> list:
+    """
+    Problems a simulation would report (or silently skip) for a loaded configuration, without building its grid.
+    An empty list means the configuration is valid.
+    """
+    problems = []
+    size = config.get("universe_size")
+    if size == None:
+        problems.append("[CONFIG_KEY_NOT_FOUND] Universe Size value is missing, the default (100) would be used")
+        size = 100
+    elif not isinstance(size, (int, np.integer)) or size < 1:
+        problems.append(f"[INVALID_UNIVERSE_SIZE] Universe Size must be a positive integer, got {size!r}")
+        return problems
+
+    mode = config.get("mode")
+    if mode == "snapshot":
+        return problems
+    if mode == "cells":
+        rows = config.get("rows")
+        cols = config.get("cols")
+        width = config.get("universe_cols", size)
+        invalid = int(np.count_nonzero((rows < 0) | (rows >= size) | (cols < 0) | (cols >= width)))
+        if invalid > 0:
+            problems.append(f"[PATTERN_COORDS_INVALID] {invalid} cell(s) lie outside of the universe")
+        return problems
+
+    patterns = config.get("patterns")
+    if patterns == None:
+        problems.append("[CONFIG_KEY_NOT_FOUND] Patterns value was not found")
+        return problems
+    if not isinstance(patterns, list):
+        problems.append("[INVALID_CONFIG] Patterns must be a list")
+        return problems
+    for (i, pat) in enumerate(patterns):
+        if not isinstance(pat, dict):
+            problems.append(f"[PATTERN_TYPE_NOT_FOUND] Pattern {i} is not an object")
+            continue
+        patType = pat.get("type")
+        if patType == None:
+            problems.append(f"[PATTERN_TYPE_NOT_FOUND] Pattern {i} has no type")
+            continue
+        if patType not in CONFIG_TYPES:
+            problems.append(f"[PATTERN_TYPE_NOT_FOUND] Pattern {i} has the unknown type '{patType}'")
+        patCoords = pat.get("topLeftCornerPosition")
+        if not isinstance(patCoords, dict):
+            problems.append(f"[TOP_LEFT_CORNER_POSITION_NOT_FOUND] Pattern {i} has no position")
+            continue
+        x = patCoords.get("x")
+        y = patCoords.get("y")
+        if x == None or y == None:
+            problems.append(f"[COORDINATES_NOT_FOUND] Pattern {i} has an incomplete position")
+        elif not isinstance(x, int) or not isinstance(y, int):
+            problems.append(f"[INVALID_COORDINATES] Pattern {i} has a position that is not made of integers")
+        elif x > (size-1) or x < 0 or y > (size-1) or y < 0:
+            problems.append(f"[INVALID_COORDINATES] Pattern {i} lies outside of the universe at ({x}, {y})")
+    return problems
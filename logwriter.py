@@ -0,0 +1,79 @@
+"""
+Background log writer, keeps file I/O off the simulation loop.
+
+Records are plain dicts put on a bounded queue. A daemon thread takes them
+off in batches, formats them and writes every batch with a single write and
+flush. A full queue blocks the simulation instead of dropping records.
+
+Files ending in .jsonl get one JSON object per record, any other file gets
+the original human readable format.
+"""
+
+import json
+import queue
+import threading
+
+LEVELS = ("off", "stats", "census")
+# Marks the end of the records, the writer thread stops once it gets it
+_STOP = None
+
+
+def FormatText(record: dict) -> str:
+    """The original debug_sim.log layout"""
+    lines = [f"==== GENERATION {record['generation']}\n"]
+    if "active_tiles" in record:
+        lines.append(
+            f"\t> Active tiles: {record['active_tiles']}/{record['total_tiles']}\n")
+    if "population" in record and "census" not in record:
+        lines.append(f"\t> Population: {record['population']}\n")
+    for (name, counter) in record.get("census", {}).items():
+        lines.append(f"\t> Grid has {counter} {name}(s)\n")
+    return "".join(lines)
+
+
+def FormatJSON(record: dict) -> str:
+    return json.dumps(record, separators=(",", ":")) + "\n"
+
+
+class LogWriter:
+    def __init__(self, filename: str, maxQueue=4096, batchSize=512):
+        self.Filename = filename
+        self.Format = FormatJSON if str(filename).endswith(".jsonl") else FormatText
+        self.BatchSize = batchSize
+        self.Queue = queue.Queue(maxsize=maxQueue)
+        # Truncated, every run starts its own log
+        self.File = open(filename, "w")
+        self.Written = 0
+        self.Thread = threading.Thread(target=self._Run, daemon=True)
+        self.Thread.start()
+
+    def Write(self, record: dict):
+        """Queues a record, only blocks while the queue is full"""
+        self.Queue.put(record)
+
+    def _Run(self):
+        while True:
+            batch = [self.Queue.get()]
+            while len(batch) < self.BatchSize:
+                try:
+                    batch.append(self.Queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in batch
+            records = [record for record in batch if record is not _STOP]
+            if len(records) > 0:
+                self.File.write("".join(map(self.Format, records)))
+                self.File.flush()
+                self.Written += len(records)
+            if stop:
+                return
+
+    def Close(self):
+        """Writes out every queued record and closes the file"""
+        if self.Thread == None:
+            return
+        self.Queue.put(_STOP)
+        self.Thread.join()
+        self.Thread = None
+        self.File.close()
@@ -4,360 +4,156 @@ Made by: Alan Maldonado
 Version: 1.0.0
 """
 
-import sys
-import argparse
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-import copy
-import json
 import os
 import sys
-from entities import Entities
-from loader import Loader
-
-
-class GoLSimulation:
-    def __init__(self, config: dict, logName="debug_sim.log", grid=np.array([])):
-        self.Entities = Entities()
-        self.Config = config
-        self.Grid = grid
-        self.GridSize = 100
-        self.FirstPass = True
-        # Remove Log File
-        try:
-            os.remove(logName)
-        except:
-            pass
-        self.LogFile = open(logName, "a+")
-
-    def _ApplyConfiguration(self):
-        self.GridSize = self.Config.get("universe_size")
-        if self.GridSize == None:
-            print(
-                "\t[CONFIG_KEY_NOT_FOUND] Universe Size value was set to default (100)")
-            self.GridSize = 100
-        self.Grid = np.zeros(
-            self.GridSize*self.GridSize).reshape(self.GridSize, self.GridSize)
-
-        patterns = self.Config.get("patterns")
-        if patterns == None:
-            print("\t[CONFIG_KEY_NOT_FOUND] Patterns value was not found")
-            sys.exit()
-            return self.Grid
-
-        mode = self.Config.get("mode")
-        if mode == "txt":
-            for pat in patterns:
-                x = pat.get("x")
-                y = pat.get("y")
-
-                if x > self.GridSize or x < 0:
-                    print("\t[PATTERN_COORDS_INVALID] Skipping invalid pattern")
-                    continue
-                if y > self.GridSize or y < 0:
-                    print("\t[PATTERN_COORDS_INVALID] Skipping invalid pattern")
-                    continue
-
-                self.Grid[x][y] = 255
-        elif mode == "json":
-            for pat in patterns:
-                patType = pat.get("type")
-                if patType == None:
-                    print(
-                        "\t[PATTERN_TYPE_NOT_FOUND] Skipping incomplete pattern")
-                    continue
-                patCoords = pat.get("topLeftCornerPosition")
-                if patType == None:
-                    print(
-                        "[TOP_LEFT_CORNER_POSITION_NOT_FOUND] Skipping incomplete pattern")
-                    continue
-
-                patCordX = patCoords.get("x")
-                patCordY = patCoords.get("y")
-                if patCordX == None or patCordY == None:
-                    print("[COORDINATES_NOT_FOUND] Skipping incomplete pattern")
-                    continue
-
-                if patCordX > (self.GridSize-1) or patCordX < 0 or patCordY > (self.GridSize-1) or patCordY < 0:
-                    print(
-                        "[INVALID_COORDINATES] Skipping invalid pattern")
-                    continue
-
-                # Still Lifes
-                if patType == "block":
-                    self.Entities.LoadBlock(patCordX, patCordY, self.Grid)
-                    continue
-                elif patType == "beehive":
-                    self.Entities.LoadBeehive(patCordX, patCordY, self.Grid)
-                    continue
-                elif patType == "loaf":
-                    self.Entities.LoadLoaf(patCordX, patCordY, self.Grid)
-                    continue
-                elif patType == "boat":
-                    self.Entities.LoadBoat(patCordX, patCordY, self.Grid)
-                    continue
-                elif patType == "tub":
-                    self.Entities.LoadTub(patCordX, patCordY, self.Grid)
-                    continue
-
-                # Oscilators
-                if patType == "blinker":
-                    self.Entities.LoadBlinker(patCordX, patCordY, self.Grid)
-                    continue
-                elif patType == "toad":
-                    self.Entities.LoadToad(patCordX, patCordY, self.Grid)
-                    continue
-                elif patType == "beacon":
-                    self.Entities.LoadBeacon(patCordX, patCordY, self.Grid)
-                    continue
-
-                # Spaceships
-                if patType == "Glider":
-                    self.Entities.LoadGlider(patCordX, patCordY, self.Grid)
-                    continue
-                elif patType == "light-weight spaceship":
-                    self.Entities.LoadLightWeightSpaceship(
-                        patCordX, patCordY, self.Grid)
-                    continue
-        return
-
-    def StartSimulation(self, generations=200):
-        self._ApplyConfiguration()
-        print("[SUCCESS] Started Conway's Game of Life Simulation")
-
-        updateInterval = 1
-
-        # set up animation
-        fig, ax = plt.subplots()
-        img = ax.imshow(self.Grid, interpolation='nearest')
-        ani = animation.FuncAnimation(fig,
-                                      self._Update,
-                                      fargs=(img, self.GridSize,),
-                                      frames=generations,
-                                      interval=updateInterval,
-                                      save_count=50,
-                                      repeat=False,
-                                      )
-        plt.show()
-
-    def _Update(self, frameNum, img, N):
-
-        newGrid = self.Grid.copy()
-        newGrid = self._ApplyRules()
-
-        img.set_data(newGrid)
-        self.Grid[:] = newGrid[:]
-
-        tempCheckerGrid = newGrid.copy()
-
-        if not self.FirstPass:
-            self.LogFile.write(f"==== GENERATION {frameNum}\n")
-            print(f"{frameNum} ", end="")
-        else:
-            print("=== GENERATION PROGRESS: ")
-
-        def CheckObject(index: int, pattern: np.array, patternName: str,  tempCheckerGrid: np.array):
-            tmpCheck = self._FindIfPatternExists(
-                tempCheckerGrid, pattern)
-            if tmpCheck[0]:
-                # print("\tFound!")
-                counter = 0
-
-                def CheckAndRemovePattern(grid: np.array, counter: int, pattern: np.array, upper_left: list) -> (np.array, int):
-                    for ul_item in upper_left:
-                        ul_row = ul_item[0]
-                        ul_col = ul_item[1]
-                        b_rows, b_cols = pattern.shape
-                        a_slice = grid[ul_row: ul_row + b_rows,
-                                       :][:, ul_col: ul_col + b_cols]
-                        if a_slice.shape != pattern.shape:
-                            continue
-
-                        if (a_slice == pattern).all():
-                            counter += 1
-                            grid[ul_row: ul_row + b_rows,
-                                 :][:, ul_col: ul_col + b_cols] = 0
-
-                    return grid, counter
-
-                res = CheckAndRemovePattern(
-                    tempCheckerGrid, counter, pattern, tmpCheck[1])
-                tempCheckerGrid, counter = res
-
-                if counter != 0:
-                    if not self.FirstPass:
-                        self.LogFile.write(
-                            f"\t> Grid has {counter} {patternName}(s)\n")
-
-        ents = self.Entities.GetEntities()
-
-        i = 0
-        for (name, pattern, rot) in ents:
-            # print(f"[{i}]Checking: ", name)
-            CheckObject(i, pattern, name, tempCheckerGrid)
-            if rot:
-                right = np.rot90(pattern)
-                down = np.rot90(right)
-                left = np.rot90(down)
-                CheckObject(rot, right, name +
-                            " Rotated Right", tempCheckerGrid)
-                CheckObject(rot, down, name +
-                            " Rotated Downwards", tempCheckerGrid)
-                CheckObject(rot, left, name + " Rotated Left", tempCheckerGrid)
-            i += 1
-
-        if self.FirstPass:
-            self.FirstPass = False
-        return img,
-
-    def _ApplyRules(self):
-        """Applies the rules to to the grid, and returns the modified/updated grid"""
-        updatedGrid = np.zeros(
-            self.GridSize*self.GridSize).reshape(self.GridSize, self.GridSize)
-        tempGrid = self.Grid.copy()
-
-        for i in range(self.GridSize):
-            for j in range(self.GridSize):
-                curItem = tempGrid[i][j]
-
-                # DEAD
-                if curItem == 0:
-                    neiAm = 0
-                    # Calculate Neighbours
-
-                    # Down
-                    if i != 0:
-                        if tempGrid[i-1][j] >= 255:
-                            neiAm += 1
-
-                    # Up
-                    if i != (self.GridSize-1):
-                        if tempGrid[i+1][j] >= 255:
-                            neiAm += 1
-
-                    # Left
-                    if j != 0:
-                        if tempGrid[i][j-1] >= 255:
-                            neiAm += 1
-
-                    # Right
-                    if j != (self.GridSize-1):
-                        if tempGrid[i][j+1] >= 255:
-                            neiAm += 1
-
-                    # Down Left
-                    if i != 0 and j != 0:
-                        if tempGrid[i-1][j-1] >= 255:
-                            neiAm += 1
-
-                    # Down Right
-                    if i != 0 and j != (self.GridSize-1):
-                        if tempGrid[i-1][j+1] >= 255:
-                            neiAm += 1
-
-                    # Up Right
-                    if i != (self.GridSize-1) and j != (self.GridSize-1):
-                        if tempGrid[i+1][j+1] >= 255:
-                            neiAm += 1
-
-                    # Up Left
-                    if i != (self.GridSize-1) and j != 0:
-                        if tempGrid[i+1][j-1] >= 255:
-                            neiAm += 1
-
-                    if neiAm == 3:
-                        updatedGrid[i][j] = 255
-                        continue
-
-                # ALIVE
-                if curItem >= 255:
-                    neiAm = 0
+import time
+from loader import CheckConfig, Loader
+from engines import BOUNDARIES, ENGINES
+from logwriter import LEVELS
+from simulation import GoLSimulation
 
-                    # Calculate Neighbours
-                    if i != 0:
-                        if tempGrid[i-1][j] >= 255:
-                            neiAm += 1
 
-                    if i != (self.GridSize-1):
-                        if tempGrid[i+1][j] >= 255:
-                            neiAm += 1
-
-                    if j != 0:
-                        if tempGrid[i][j-1] >= 255:
-                            neiAm += 1
-
-                    if j != (self.GridSize-1):
-                        if tempGrid[i][j+1] >= 255:
-                            neiAm += 1
-
-                    if i != 0 and j != 0:
-                        if tempGrid[i-1][j-1] >= 255:
-                            neiAm += 1
-
-                    if i != 0 and j != (self.GridSize-1):
-                        if tempGrid[i-1][j+1] >= 255:
-                            neiAm += 1
-
-                    if i != (self.GridSize-1) and j != (self.GridSize-1):
-                        if tempGrid[i+1][j+1] >= 255:
-                            neiAm += 1
-
-                    if i != (self.GridSize-1) and j != 0:
-                        if tempGrid[i+1][j-1] >= 255:
-                            neiAm += 1
-
-                    # RULES
-
-                    # Rule 1
-                    if neiAm < 2:
-                        updatedGrid[i][j] = 0
-                        continue
-                    # Rule 2
-                    if neiAm == 2 or neiAm == 3:
-                        updatedGrid[i][j] = 255
-                        continue
-                    # Rule 3
-                    if neiAm > 3:
-                        updatedGrid[i][j] = 0
-                        continue
-
-        return updatedGrid
-
-    def _Check(self, a, b, upper_left):
-        ul_row = upper_left[0]
-        ul_col = upper_left[1]
-        b_rows, b_cols = b.shape
-        a_slice = a[ul_row: ul_row + b_rows, :][:, ul_col: ul_col + b_cols]
-        if a_slice.shape != b.shape:
-            return False
-        return (a_slice == b).all()
-
-    def _FindIfPatternExists(self, big_array, small_array) -> (bool, np.array):
-        upper_left = np.argwhere(big_array == small_array[0, 0])
-        for ul in upper_left:
-            if self._Check(big_array, small_array, ul):
-                return (True, upper_left)
-        else:
-            return (False, None)
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        from benchmarks.cli import Main
+        sys.exit(Main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from server import Main
+        sys.exit(Main(sys.argv[2:]))
 
+    # Only the command line needs argparse, importing main does not
+    import argparse
 
-def main():
     parser = argparse.ArgumentParser(
         description="Runs DrN3MESiS (Alan Maldonado) Implementation of Conway's Game of Life.")
     parser.add_argument(
-        "configFilename", help="Filename of the Configuration File")
+        "configFilename", nargs="+", help="Filename of the Configuration File (several files with --ensemble)")
+    parser.add_argument(
+        "--universe-size", type=int, default=None, help="Overrides the universe size, .rle/.lif/.cells patterns are centred in it")
+    parser.add_argument(
+        "--check-config", action="store_true", help="Only load and validate the configuration file, nothing is simulated")
+    parser.add_argument(
+        "--headless", action="store_true", help="Run without matplotlib and write the final grid to disk")
+    parser.add_argument(
+        "--generations", type=int, default=199, help="Amount of generations to simulate")
+    parser.add_argument(
+        "--output", default="final_grid.txt", help="File the final grid is written to in headless mode (.txt, .gol or .npy)")
+    parser.add_argument(
+        "--snapshot-every", type=int, default=0, help="Also write a snapshot every K generations in headless mode")
+    parser.add_argument(
+        "--detect-cycles", action="store_true", help="Detect still/periodic universes and jump straight to the last generation")
+    parser.add_argument(
+        "--stop-on-cycle", action="store_true", help="Stop the headless run as soon as the universe repeats itself")
+    parser.add_argument(
+        "--ensemble", action="store_true", help="Run every configuration file as one batched ensemble and write a CSV summary to --output")
+    parser.add_argument(
+        "--out-of-core", default=None, help="Keep the universe in this .gol file instead of memory and advance it there, pass the same file as configuration to resume it")
+    parser.add_argument(
+        "--overwrite", action="store_true", help="Let --out-of-core replace an existing .gol file with a new universe")
+    parser.add_argument(
+        "--engine", default="numpy", choices=sorted(ENGINES.keys()), help="Stepping engine used to advance the universe")
+    parser.add_argument(
+        "--boundary", default="dead", choices=BOUNDARIES, help="What lies past the edges: dead cells, a torus that wraps around, or an infinite plane")
+    parser.add_argument(
+        "--rule", default=None, help="Life-like rule in B/S notation (B36/S23) or by name (highlife), overrides the one in the configuration file")
+    parser.add_argument(
+        "--log", default="debug_sim.log", help="Log file, a .jsonl file gets one JSON record per logged generation")
+    parser.add_argument(
+        "--log-level", default="census", choices=LEVELS, help="What is logged: nothing, population/stats only, or stats plus the pattern census")
+    parser.add_argument(
+        "--census", default="tracking", choices=("tracking", "scan"), help="Census mode: follow known clusters from one logged generation to the next, or rescan every cluster every time")
+    parser.add_argument(
+        "--log-every", type=int, default=None, help="Log every K generations (default: every frame on screen, nothing in headless runs)")
+    parser.add_argument(
+        "--render-every", type=int, default=1, help="Draw one frame every K generations, the simulation runs at full speed in between")
+    parser.add_argument(
+        "--metrics", default=None, help="Time every phase, count births/deaths and dump them to this file on exit (.prom for Prometheus text, JSON otherwise)")
+    parser.add_argument(
+        "--analytics", default=None, help="Record population, births, deaths and bounding box of every generation plus a heatmap, written as CSV (or .npz) on exit")
+    parser.add_argument(
+        "--profile", nargs="?", const="profile.txt", default=None, help="Run under cProfile and write the stats sorted by cumulative time (default: profile.txt)")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Worker processes for the parallel engine and --ensemble (default: one per core)")
 
     args = parser.parse_args()
-    if not os.path.isfile(args.configFilename):
-        print("[NOT_FOUND] File was not found or is not accessible")
-        sys.exit()
-
-    ConfigLoader = Loader(args.configFilename)
-    GoL = GoLSimulation(ConfigLoader.GetConfig())
-    GoL.StartSimulation(199)
+    for filename in args.configFilename:
+        if not os.path.isfile(filename):
+            print(
+                f"[NOT_FOUND] File {filename} was not found or is not accessible")
+            sys.exit()
 
-    GoL.LogFile.close()
+    if args.ensemble:
+        from ensemble import RunEnsemble
+        output = args.output if args.output.endswith(
+            ".csv") else "ensemble.csv"
+        try:
+            RunEnsemble(args.configFilename, args.generations,
+                        output, args.workers, args.detect_cycles, rule=args.rule)
+        except ValueError as error:
+            print(error)
+        return
+    if len(args.configFilename) > 1:
+        print("[TOO_MANY_FILES] Only --ensemble accepts several configuration files")
+        sys.exit()
+    configFilename = args.configFilename[0]
+
+    start = time.perf_counter()
+    try:
+        ConfigLoader = Loader(configFilename, args.universe_size, args.rule)
+    except ValueError as error:
+        print(error)
+        if args.check_config:
+            print(f"[INVALID_CONFIG] {configFilename} could not be loaded")
+            sys.exit(1)
+        sys.exit()
+    print(
+        f"[SUCCESS] Loaded {configFilename} in {time.perf_counter() - start:.3f}s")
+    if args.check_config:
+        config = ConfigLoader.GetConfig()
+        problems = CheckConfig(config)
+        for problem in problems:
+            print(f"\t{problem}")
+        if len(problems) > 0:
+            print(f"[INVALID_CONFIG] {configFilename} has {len(problems)} problem(s)")
+            sys.exit(1)
+        print(f"[VALID_CONFIG] {configFilename}: {config.get('universe_size')}x{config.get('universe_cols', config.get('universe_size'))} universe, "
+              f"rule {config.get('rule', 'B3/S23')}")
+        return
+    if args.out_of_core != None:
+        from outofcore import RunOutOfCore
+        try:
+            RunOutOfCore(ConfigLoader.GetConfig(), args.out_of_core, args.generations,
+                         configFilename, args.overwrite)
+        except ValueError as error:
+            print(error)
+            sys.exit(1)
+        return
+    GoL = GoLSimulation(ConfigLoader.GetConfig(),
+                       engine=args.engine, workers=args.workers, boundary=args.boundary,
+                       logName=args.log, logLevel=args.log_level, logEvery=args.log_every,
+                       metricsFile=args.metrics, analyticsFile=args.analytics, census=args.census)
+    profiler = None
+    if args.profile != None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    if args.headless:
+        GoL.RunHeadless(args.generations, args.output, args.snapshot_every,
+                        args.detect_cycles, args.stop_on_cycle)
+    else:
+        GoL.StartSimulation(args.generations, args.render_every)
+
+    if profiler != None:
+        import pstats
+        profiler.disable()
+        profileFile = open(args.profile, "w")
+        pstats.Stats(profiler, stream=profileFile).sort_stats(
+            "cumulative").print_stats()
+        profileFile.close()
+        print(f"\tProfile written to {args.profile}")
+
+    GoL.Close()
     return
 
 
@@ -0,0 +1,128 @@
+"""
+Optional instrumentation of a running simulation.
+
+Metrics times named phases (step, census, logging, render) and keeps
+per-generation counters: population, births, deaths and the cells the engine
+evaluated. Observers are called with the counters of every generation, and
+everything can be dumped as JSON or in the Prometheus text format.
+
+A disabled Metrics object costs one attribute check per phase: Phase()
+hands back a shared no-op context and Generation() returns right away.
+"""
+
+import contextlib
+import json
+import time
+import numpy as np
+
+_NO_PHASE = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ("Metrics", "Name", "Start")
+
+    def __init__(self, metrics, name: str):
+        self.Metrics = metrics
+        self.Name = name
+
+    def __enter__(self):
+        self.Start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.Metrics.Add(self.Name, time.perf_counter() - self.Start)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        self.Enabled = enabled
+        self.Seconds = dict()
+        self.Calls = dict()
+        self.Observers = []
+        # Counters of the last generation and running totals
+        self.Last = dict()
+        self.Births = 0
+        self.Deaths = 0
+
+    def AddObserver(self, callback):
+        """callback(stats) runs after every generation, stats holds the counters of that generation"""
+        self.Observers.append(callback)
+        self.Enabled = True
+
+    def Phase(self, name: str):
+        """Context manager that adds the time spent inside it to the named phase"""
+        if not self.Enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def Add(self, name: str, seconds: float):
+        self.Seconds[name] = self.Seconds.get(name, 0.0) + seconds
+        self.Calls[name] = self.Calls.get(name, 0) + 1
+
+    def Generation(self, generation: int, before: np.array, after: np.array, activeCells: int,
+                   beforeOrigin=(0, 0), afterOrigin=(0, 0)):
+        """
+        Counts what changed from before (alive mask) to after (0/255 grid) and notifies the observers.
+        The origins are the plane coordinates of both top left cells, for universes that get reallocated.
+        """
+        if not self.Enabled:
+            return
+        alive = after >= 255
+        population = int(np.count_nonzero(alive))
+        # Cells alive in both generations, over the part of the plane both grids cover
+        r0 = max(beforeOrigin[0], afterOrigin[0])
+        c0 = max(beforeOrigin[1], afterOrigin[1])
+        r1 = min(beforeOrigin[0] + before.shape[0], afterOrigin[0] + alive.shape[0])
+        c1 = min(beforeOrigin[1] + before.shape[1], afterOrigin[1] + alive.shape[1])
+        kept = 0
+        if r1 > r0 and c1 > c0:
+            old = before[r0 - beforeOrigin[0]: r1 - beforeOrigin[0], c0 - beforeOrigin[1]: c1 - beforeOrigin[1]]
+            new = alive[r0 - afterOrigin[0]: r1 - afterOrigin[0], c0 - afterOrigin[1]: c1 - afterOrigin[1]]
+            kept = int(np.count_nonzero(old & new))
+        births = population - kept
+        deaths = int(np.count_nonzero(before)) - kept
+        self.Record(generation, population, births, deaths, activeCells)
+
+    def Record(self, generation: int, population: int, births: int, deaths: int, activeCells: int):
+        """Adds the counters of a generation and notifies the observers"""
+        self.Births += births
+        self.Deaths += deaths
+        self.Last = {
+            "generation": generation,
+            "population": population,
+            "births": births,
+            "deaths": deaths,
+            "active_cells": activeCells,
+        }
+        for callback in self.Observers:
+            callback(self.Last)
+
+    def Snapshot(self) -> dict:
+        return {
+            "counters": dict(self.Last),
+            "totals": {"births": self.Births, "deaths": self.Deaths},
+            "phases": {name: {"seconds": self.Seconds[name], "calls": self.Calls[name]} for name in self.Seconds},
+        }
+
+    def Prometheus(self) -> str:
+        lines = [
+            "# HELP gol_phase_seconds_total Time spent in each phase of the simulation",
+            "# TYPE gol_phase_seconds_total counter",
+        ]
+        lines += [f'gol_phase_seconds_total{{phase="{name}"}} {seconds:.9f}' for (name, seconds) in self.Seconds.items()]
+        lines += ["# TYPE gol_phase_calls_total counter"]
+        lines += [f'gol_phase_calls_total{{phase="{name}"}} {calls}' for (name, calls) in self.Calls.items()]
+        lines += ["# TYPE gol_births_total counter", f"gol_births_total {self.Births}",
+                  "# TYPE gol_deaths_total counter", f"gol_deaths_total {self.Deaths}"]
+        for name in ("generation", "population", "births", "deaths", "active_cells"):
+            if name in self.Last:
+                lines += [f"# TYPE gol_{name} gauge", f"gol_{name} {self.Last[name]}"]
+        return "\n".join(lines) + "\n"
+
+    def Dump(self, filename: str):
+        """Writes the metrics to filename, in the Prometheus text format for .prom files and as JSON otherwise"""
+        with open(filename, "w") as metricsFile:
+            if str(filename).endswith(".prom"):
+                metricsFile.write(self.Prometheus())
+            else:
+                json.dump(self.Snapshot(), metricsFile, indent=1)
@@ -0,0 +1,232 @@
+"""
+Out-of-core runs for universes that do not fit in memory.
+
+The universe stays in a .gol snapshot (see snapshot.py), memory-mapped and
+bit-packed. The file holds a second body next to the one its header points
+at. Every pass streams the current body from top to bottom in bands of rows
+and writes the next generation into the other one with packed.StepRows, so
+only a few bands are ever held in memory and both bodies are read and
+written sequentially.
+
+A pass advances PASS_GENERATIONS generations at once: every band is read
+with that many halo rows above and below, which halves the I/O compared to
+one pass per generation. The next band is read and the previous one written
+on background threads while the current one is computed.
+
+Once a pass is on disk, the header is rewritten to point at the body it
+wrote along with its generation. The body the header points at is never
+written to, so a run interrupted at any time resumes from its last pass.
+
+Cells past the edges are always dead.
+"""
+
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import snapshot
+from packed import BAND_CELLS, WORD, ColumnMask, PopCount, SetCells, StepRows, WordsPerRow
+from rules import CONWAY, ParseRule
+from simulation import GoLSimulation
+
+# Packed bytes read and written at once, the adder works through a band in chunks of packed.BAND_CELLS
+BAND_BYTES = 1 << 24
+PASS_GENERATIONS = 2
+
+
+class OutOfCoreEngine:
+    """Advances the universe stored in a .gol snapshot, alternating between the two bodies of the file"""
+
+    def __init__(self, filename: str, bandBytes=BAND_BYTES):
+        header = snapshot.ReadHeader(filename)
+        self.Offsets = snapshot.BodyOffsets(header)
+        self.Offset = header["offset"]
+        self.Filename = filename
+        self.Rows = header["rows"]
+        self.Cols = header["cols"]
+        self.Words = WordsPerRow(self.Cols)
+        self.Generation = header["generation"]
+        self.Rule = ParseRule(header["rule"])
+        self.Mask = ColumnMask(self.Cols)
+        self.BandRows = max(PASS_GENERATIONS, bandBytes // (self.Words * WORD.itemsize))
+        self.ChunkRows = max(1, BAND_CELLS // self.Cols)
+
+        self.File = open(filename, "r+b")
+        # Snapshots written by anything else only hold one body, the second one starts out sparse
+        size = self.Offsets[1] + self.Rows * self.Words * WORD.itemsize
+        if os.fstat(self.File.fileno()).st_size < size:
+            os.ftruncate(self.File.fileno(), size)
+        self.Map = mmap.mmap(self.File.fileno(), 0)
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            self.Map.madvise(mmap.MADV_SEQUENTIAL)
+        self.Cells = self._Body(self.Offset)
+        self.Spare = self._Body(self._SpareOffset())
+        # One thread reads the next band while the other writes the previous one
+        self.IO = ThreadPoolExecutor(max_workers=2)
+
+    def _Body(self, offset: int) -> np.array:
+        return np.frombuffer(self.Map, dtype=WORD, count=self.Rows * self.Words,
+                             offset=offset).reshape(self.Rows, self.Words)
+
+    def _SpareOffset(self) -> int:
+        return self.Offsets[1] if self.Offset == self.Offsets[0] else self.Offsets[0]
+
+    def _Read(self, start: int, end: int) -> np.array:
+        """Copy of rows start..end of the current body, rows past the edges are dead"""
+        block = np.zeros((end - start, self.Words), dtype=WORD)
+        first = max(start, 0)
+        stop = min(end, self.Rows)
+        if stop > first:
+            block[first - start: stop - start] = self.Cells[first: stop]
+        return block
+
+    def _Write(self, start: int, rows: np.array):
+        self.Spare[start: start + rows.shape[0]] = rows
+
+    def _StepBlock(self, block: np.array) -> np.array:
+        """Next generation of block[1:-1], the first and last rows are its halo"""
+        out = np.empty((block.shape[0] - 2, self.Words), dtype=WORD)
+        for r in range(0, out.shape[0], self.ChunkRows):
+            end = min(out.shape[0], r + self.ChunkRows)
+            out[r: end] = StepRows(block[r: r+1], block[r+1: end+1], block[end+1: end+2], self.Mask, self.Rule)
+        return out
+
+    def _Pass(self, generations: int):
+        """Advances 1..PASS_GENERATIONS generations in one sweep from the current body into the spare one"""
+        halo = generations
+        bands = [(r, min(self.Rows, r + self.BandRows)) for r in range(0, self.Rows, self.BandRows)]
+        reading = self.IO.submit(self._Read, bands[0][0] - halo, bands[0][1] + halo)
+        writing = None
+        for (i, (start, end)) in enumerate(bands):
+            rows = reading.result()
+            if i + 1 < len(bands):
+                reading = self.IO.submit(self._Read, bands[i+1][0] - halo, bands[i+1][1] + halo)
+
+            first = start - halo
+            for _ in range(generations):
+                rows = self._StepBlock(rows)
+                first += 1
+                # The halo rows past the edges of the universe stay dead
+                if first < 0:
+                    rows[:-first] = 0
+                if first + rows.shape[0] > self.Rows:
+                    rows[self.Rows - first:] = 0
+
+            if writing != None:
+                writing.result()
+            writing = self.IO.submit(self._Write, start, rows)
+        writing.result()
+
+    def _Commit(self):
+        """Makes the body the last pass wrote the current one, its rows reach the disk before the header points at it"""
+        self.Map.flush()
+        offset = self._SpareOffset()
+        snapshot.Commit(self.Map, offset, self.Generation)
+        self.Map.flush(0, min(mmap.PAGESIZE, len(self.Map)))
+        self.Offset = offset
+        self.Cells, self.Spare = self.Spare, self.Cells
+
+    def Advance(self, generations: int):
+        while generations > 0:
+            step = min(PASS_GENERATIONS, generations)
+            self._Pass(step)
+            self.Generation += step
+            self._Commit()
+            generations -= step
+
+    def Step(self):
+        self.Advance(1)
+
+    def Population(self) -> int:
+        return sum(PopCount(self.Cells[r: r + self.BandRows]) for r in range(0, self.Rows, self.BandRows))
+
+    def Flush(self):
+        """Writes the dirty pages back to the file"""
+        self.Map.flush()
+
+    def Close(self):
+        if self.Map == None:
+            return
+        self.IO.shutdown()
+        self.Flush()
+        # The arrays have to let go of the mapping before it can be closed
+        self.Cells = None
+        self.Spare = None
+        self.Map.close()
+        self.Map = None
+        self.File.close()
+
+
+def CreateUniverse(filename: str, config: dict, bandBytes=BAND_BYTES):
+    """
+    Writes the universe of a loaded configuration to a new snapshot, band by band.
+    Coordinates (RLE, Life 1.06, plaintext, .txt) and snapshots never become a dense grid,
+    JSON pattern configurations are small and go through GoLSimulation.
+    """
+    size = config.get("universe_size") or 100
+    rule = config.get("rule") or CONWAY
+    words = WordsPerRow(size)
+    bandRows = max(1, bandBytes // (words * WORD.itemsize))
+    snapshot.Create(filename, size, size, config.get("generation", 0), str(rule))
+    header, cells = snapshot.Load(filename, mode="r+")
+
+    mode = config.get("mode")
+    if mode == "snapshot":
+        source = config.get("cells")
+        for r in range(0, size, bandRows):
+            cells[r: r + bandRows] = source[r: r + bandRows]
+    elif mode == "cells":
+        rows = config.get("rows")
+        cols = config.get("cols")
+        valid = (rows >= 0) & (rows < size) & (cols >= 0) & (cols < size)
+        rows = rows[valid]
+        cols = cols[valid]
+        order = np.argsort(rows, kind="stable")
+        rows = rows[order]
+        cols = cols[order]
+        # Only the bands that hold live cells are written, the rest of the file stays sparse
+        for band in np.unique(rows // bandRows):
+            lo, hi = np.searchsorted(rows, [band * bandRows, (band + 1) * bandRows])
+            start = int(band * bandRows)
+            block = np.array(cells[start: start + bandRows])
+            cells[start: start + bandRows] = SetCells(block, rows[lo:hi] - start, cols[lo:hi])
+    else:
+        sim = GoLSimulation(config, logName=None, engine="packed")
+        sim._ApplyConfiguration()
+        cells[:] = sim.Cells
+    cells.flush()
+    del cells
+
+
+def RunOutOfCore(config: dict, filename: str, generations: int, configFilename=None, overwrite=False):
+    """
+    Advances a universe kept in the snapshot filename, created from config unless config is that snapshot.
+    An existing snapshot is only replaced when overwrite is set. Every pass is committed to the file as it ends.
+    """
+    start = time.perf_counter()
+    if configFilename == None or os.path.abspath(configFilename) != os.path.abspath(filename):
+        if os.path.exists(filename) and not overwrite:
+            raise ValueError(
+                f"[SNAPSHOT_EXISTS] {filename} already exists, pass it as the configuration to resume it or use --overwrite")
+        # Written next to it first, an interrupted creation leaves the old snapshot alone
+        tmpName = filename + ".tmp"
+        try:
+            CreateUniverse(tmpName, config)
+            os.replace(tmpName, filename)
+        except:
+            os.remove(tmpName)
+            raise
+        print(f"[SUCCESS] Universe written to {filename} in {time.perf_counter() - start:.3f}s")
+
+    engine = OutOfCoreEngine(filename)
+    print(
+        f"[SUCCESS] Started Conway's Game of Life Simulation (out-of-core, {engine.Rows}x{engine.Cols}, rule {engine.Rule})")
+    start = time.perf_counter()
+    engine.Advance(generations)
+    elapsed = time.perf_counter() - start
+    rate = generations / elapsed if elapsed > 0 else float("inf")
+    print(
+        f"[SUCCESS] Simulated {generations} generations in {elapsed:.3f}s ({rate:.1f} generations/second)")
+    print(f"\tPopulation {engine.Population()} at generation {engine.Generation}, universe kept in {filename}")
+    engine.Close()
@@ -0,0 +1,204 @@
+"""
+Bit-packed universe representation, 64 cells per uint64 word.
+
+Row r of a packed universe is an array of uint64 words where bit k of word w
+holds the cell at column w*64 + k. Bits past the last column are always 0.
+"""
+
+import numpy as np
+from rules import CONWAY
+
+WORD = np.dtype("<u8")
+# Rows processed at once, keeps the temporaries of the adder small on big universes
+BAND_CELLS = 1 << 22
+
+
+def WordsPerRow(width: int) -> int:
+    return (width + 63) // 64
+
+
+def _BandRows(width: int) -> int:
+    return max(1, BAND_CELLS // max(1, width))
+
+
+def Pack(grid: np.array, out=None) -> np.array:
+    """Converts a 0/255 grid into its packed form"""
+    rows, width = grid.shape
+    words = WordsPerRow(width)
+    if out is None:
+        out = np.zeros((rows, words), dtype=WORD)
+    outBytes = out.view(np.uint8)
+
+    band = _BandRows(width)
+    for r in range(0, rows, band):
+        packedBytes = np.packbits(
+            grid[r: r+band] >= 255, axis=1, bitorder="little")
+        outBytes[r: r+band, :packedBytes.shape[1]] = packedBytes
+        outBytes[r: r+band, packedBytes.shape[1]:] = 0
+    return out
+
+
+def Unpack(cells: np.array, width: int, out=None) -> np.array:
+    """Converts a packed universe back into the 0/255 grid used by the simulation"""
+    rows = cells.shape[0]
+    if out is None:
+        out = np.zeros((rows, width))
+    cellBytes = cells.view(np.uint8)
+
+    band = _BandRows(width)
+    for r in range(0, rows, band):
+        bits = np.unpackbits(
+            cellBytes[r: r+band], axis=1, count=width, bitorder="little")
+        np.multiply(bits, 255, out=out[r: r+band], casting="unsafe")
+    return out
+
+
+def SetCells(cells: np.array, rows: np.array, cols: np.array) -> np.array:
+    """Sets the given cells of a packed universe alive, coordinates must lie inside it"""
+    cols = np.asarray(cols).astype(np.uint64)
+    np.bitwise_or.at(cells, (np.asarray(rows), (cols >> np.uint64(6)).astype(np.int64)),
+                     np.uint64(1) << (cols & np.uint64(63)))
+    return cells
+
+
+def PopCount(cells: np.array) -> int:
+    """Live cells of a packed universe"""
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(cells).sum(dtype=np.int64))
+    return int(np.unpackbits(cells.view(np.uint8)).sum(dtype=np.int64))
+
+
+def ColumnMask(width: int) -> np.array:
+    """Mask of the bits in a row that belong to real columns"""
+    words = WordsPerRow(width)
+    mask = np.full(words, np.iinfo(np.uint64).max, dtype=WORD)
+    tail = width % 64
+    if tail != 0:
+        mask[-1] = (1 << tail) - 1
+    return mask
+
+
+def _West(x: np.array) -> np.array:
+    """Moves every cell one column to the right, so each cell sees its west neighbour"""
+    out = x << 1
+    out[:, 1:] |= x[:, :-1] >> 63
+    return out
+
+
+def _East(x: np.array) -> np.array:
+    """Moves every cell one column to the left, so each cell sees its east neighbour"""
+    out = x >> 1
+    out[:, :-1] |= x[:, 1:] << 63
+    return out
+
+
+def _FullAdd(a, b, c):
+    """Bitwise full adder, returns (sum, carry)"""
+    t = a ^ b
+    return t ^ c, (a & b) | (t & c)
+
+
+def NeighbourCountBits(above: np.array, rows: np.array, below: np.array) -> tuple:
+    """
+    Adds the eight neighbours of every cell in rows, 64 cells at a time.
+    above/below are the single rows that touch the band (zeros at the edges).
+    Returns the four bits of each neighbour count (1s, 2s, 4s, 8s).
+    """
+    stacked = np.concatenate((above, rows, below))
+    up = stacked[:-2]
+    down = stacked[2:]
+
+    s1, c1 = _FullAdd(_West(up), up, _East(up))
+    west = _West(rows)
+    east = _East(rows)
+    s2 = west ^ east
+    c2 = west & east
+    s3, c3 = _FullAdd(_West(down), down, _East(down))
+
+    bit0, carry = _FullAdd(s1, s2, s3)
+    t0, t1 = _FullAdd(c1, c2, c3)
+    bit1 = t0 ^ carry
+    t2 = t0 & carry
+    bit2 = t1 ^ t2
+    bit3 = t1 & t2
+    return bit0, bit1, bit2, bit3
+
+
+def _CountIs(counts: tuple, bits: tuple, rows: np.array) -> np.array:
+    """Words with a bit set for every cell whose neighbour count is one of counts"""
+    bit0, bit1, bit2, bit3 = bits
+    result = None
+    for count in counts:
+        if count == 8:
+            # The only count with bit3 set, and the other bits are all 0 for it
+            term = bit3
+        elif count == 0:
+            term = ~(bit0 | bit1 | bit2 | bit3)
+        else:
+            # 1..7 need at least one of the low bits, which already rules out 8
+            term = (bit0 if count & 1 else ~bit0) & (bit1 if count & 2 else ~bit1)
+            term &= bit2 if count & 4 else ~bit2
+        result = term if result is None else result | term
+    if result is None:
+        return np.zeros_like(rows)
+    return result
+
+
+def StepRows(above: np.array, rows: np.array, below: np.array, mask: np.array, rule=CONWAY) -> np.array:
+    """Computes the next generation of a band of packed rows"""
+    bits = NeighbourCountBits(above, rows, below)
+    if rule == CONWAY:
+        bit0, bit1, bit2, bit3 = bits
+        # Exactly 2 neighbours keeps a live cell, exactly 3 neighbours always gives a live cell
+        nextRows = bit1 & ~(bit2 | bit3) & (bit0 | rows)
+    else:
+        # Sum of products over the count bits, one product per count in the rule
+        nextRows = _CountIs(rule.Always, bits, rows)
+        if rule.BirthOnly:
+            nextRows |= _CountIs(rule.BirthOnly, bits, rows) & ~rows
+        if rule.SurvivalOnly:
+            nextRows |= _CountIs(rule.SurvivalOnly, bits, rows) & rows
+    nextRows &= mask
+    return nextRows
+
+
+class PackedEngine:
+    """Stores the universe bit-packed and advances it with bit-parallel adder logic"""
+
+    def __init__(self, size: int, rule=CONWAY):
+        self.Size = size
+        self.Rule = rule
+        self.Words = WordsPerRow(size)
+        self.Cells = np.zeros((size, self.Words), dtype=WORD)
+        self.Mask = ColumnMask(size)
+        self.BandRows = _BandRows(size)
+        self.Zeros = np.zeros((1, self.Words), dtype=WORD)
+
+    def StepPacked(self, cells: np.array) -> np.array:
+        """Advances a packed universe one generation in place"""
+        rows = cells.shape[0]
+        above = self.Zeros
+        for r in range(0, rows, self.BandRows):
+            end = min(rows, r + self.BandRows)
+            below = cells[end: end+1] if end < rows else self.Zeros
+            # Keep the old last row, the next band still needs it as its upper neighbour
+            lastRow = cells[end-1: end].copy()
+            cells[r: end] = StepRows(above, cells[r: end], below, self.Mask, self.Rule)
+            above = lastRow
+        return cells
+
+    def AdvancePacked(self, cells: np.array, generations: int) -> np.array:
+        for _ in range(generations):
+            self.StepPacked(cells)
+        return cells
+
+    def Step(self, grid: np.array) -> np.array:
+        Pack(grid, out=self.Cells)
+        self.StepPacked(self.Cells)
+        return Unpack(self.Cells, self.Size, out=grid)
+
+    def Advance(self, grid: np.array, generations: int) -> np.array:
+        Pack(grid, out=self.Cells)
+        for _ in range(generations):
+            self.StepPacked(self.Cells)
+        return Unpack(self.Cells, self.Size, out=grid)
@@ -0,0 +1,134 @@
+"""
+Multi-core stepping engine.
+
+The universe lives in shared memory as two padded buffers (current and next
+generation). Every worker process owns a band of rows and reads the row
+above and below its band straight from the shared buffer as its halo. A
+barrier per generation keeps the workers in lockstep, so nothing but the
+initial setup is ever pickled.
+"""
+
+import atexit
+import multiprocessing as mp
+import os
+import numpy as np
+from multiprocessing import shared_memory
+from rules import CONWAY
+
+# Control block layout
+COMMAND = 0
+GENERATIONS = 1
+SOURCE = 2
+
+RUN = 1
+STOP = 2
+
+
+def _Buffers(shm, size: int) -> (np.array, np.array):
+    padded = (size+2) * (size+2)
+    buffers = np.ndarray((2, size+2, size+2), dtype=np.uint8, buffer=shm.buf[:2*padded])
+    control = np.ndarray((3,), dtype=np.int64, buffer=shm.buf[2*padded: 2*padded+24])
+    return buffers, control
+
+
+def _Worker(name: str, size: int, r0: int, r1: int, start, step, rule):
+    """Advances rows [r0, r1) of the universe every time the coordinator asks for it"""
+    shm = shared_memory.SharedMemory(name=name)
+    buffers, control = _Buffers(shm, size)
+    rows = r1 - r0
+    neighbours = np.zeros((rows, size), dtype=np.uint8)
+    births = np.zeros((rows, size), dtype=bool)
+    survivors = np.zeros((rows, size), dtype=bool)
+    scratch = np.zeros((rows, size), dtype=bool)
+
+    while True:
+        start.wait()
+        if control[COMMAND] == STOP:
+            break
+
+        source = int(control[SOURCE])
+        for _ in range(int(control[GENERATIONS])):
+            src = buffers[source]
+            dst = buffers[1-source]
+            # Padded rows r0..r1+1 hold the band plus its halo
+            window = src[r0: r1+2]
+            np.add(window[:-2, :-2], window[:-2, 1:-1], out=neighbours)
+            neighbours += window[:-2, 2:]
+            neighbours += window[1:-1, :-2]
+            neighbours += window[1:-1, 2:]
+            neighbours += window[2:, :-2]
+            neighbours += window[2:, 1:-1]
+            neighbours += window[2:, 2:]
+
+            rule.Apply(neighbours, window[1:-1, 1:-1], births, survivors, scratch)
+            dst[r0+1: r1+1, 1:-1] = births
+
+            # Nobody may read the next generation before every band has been written
+            step.wait()
+            source = 1 - source
+        start.wait()
+
+    del buffers, control
+    shm.close()
+
+
+class ParallelEngine:
+    """Splits the universe into row bands advanced by a pool of worker processes"""
+
+    def __init__(self, size: int, workers=0, rule=CONWAY):
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, size))
+        self.Size = size
+        self.Workers = workers
+        padded = (size+2) * (size+2)
+        self.Memory = shared_memory.SharedMemory(create=True, size=2*padded + 24)
+        self.Buffers, self.Control = _Buffers(self.Memory, size)
+        self.Buffers[:] = 0
+        self.Control[:] = 0
+        self.Grid = None
+
+        self.Start = mp.Barrier(workers + 1)
+        step = mp.Barrier(workers)
+        bounds = np.linspace(0, size, workers + 1).astype(int)
+        self.Processes = []
+        for w in range(workers):
+            process = mp.Process(target=_Worker,
+                                 args=(self.Memory.name, size, bounds[w], bounds[w+1], self.Start, step, rule),
+                                 daemon=True)
+            process.start()
+            self.Processes.append(process)
+        atexit.register(self.Close)
+
+    def Advance(self, grid: np.array, generations: int) -> np.array:
+        source = int(self.Control[SOURCE])
+        if grid is not self.Grid:
+            np.greater_equal(grid, 255, out=self.Buffers[source, 1:-1, 1:-1], casting="unsafe")
+            self.Grid = grid
+
+        self.Control[COMMAND] = RUN
+        self.Control[GENERATIONS] = generations
+        # Workers start on the first barrier and report back on the second one
+        self.Start.wait()
+        self.Start.wait()
+
+        source = (source + generations) % 2
+        self.Control[SOURCE] = source
+        np.multiply(self.Buffers[source, 1:-1, 1:-1], 255, out=grid, casting="unsafe")
+        return grid
+
+    def Step(self, grid: np.array) -> np.array:
+        return self.Advance(grid, 1)
+
+    def Close(self):
+        """Stops the workers and releases the shared memory"""
+        if self.Processes == None:
+            return
+        self.Control[COMMAND] = STOP
+        self.Start.wait()
+        for process in self.Processes:
+            process.join()
+        self.Processes = None
+        del self.Buffers, self.Control
+        self.Memory.close()
+        self.Memory.unlink()
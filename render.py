@@ -0,0 +1,33 @@
+"""
+Frames for the matplotlib window.
+
+The image handed to matplotlib is a uint8 (0/1) view instead of the float
+grid. Universes bigger than the screen are reduced first: every block of
+factor x factor cells becomes one pixel, lit when any cell in it is alive.
+"""
+
+import numpy as np
+
+
+def PoolFactor(shape: tuple, maxPixels: int) -> int:
+    """Smallest block size that fits the universe in maxPixels along both axes"""
+    return max(1, -(-max(shape) // max(1, maxPixels)))
+
+
+def Downsample(grid: np.array, factor: int, out=None) -> np.array:
+    """Any-alive pooling of factor x factor blocks, returns a uint8 image of 0s and 1s"""
+    rows = -(-grid.shape[0] // factor)
+    cols = -(-grid.shape[1] // factor)
+    if out is None or out.shape != (rows, cols):
+        out = np.empty((rows, cols), dtype=bool)
+
+    if factor == 1:
+        np.greater_equal(grid, 255, out=out)
+        return out.view(np.uint8)
+
+    # Padded with dead cells up to whole blocks, then OR-reduced along the rows and the columns of every block
+    alive = np.zeros((rows * factor, cols * factor), dtype=bool)
+    np.greater_equal(grid, 255, out=alive[:grid.shape[0], :grid.shape[1]])
+    pooledRows = np.logical_or.reduce(alive.reshape(rows, factor, cols * factor), axis=1)
+    np.logical_or.reduce(pooledRows.reshape(rows, cols, factor), axis=2, out=out)
+    return out.view(np.uint8)
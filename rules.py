@@ -0,0 +1,124 @@
+"""
+Life-like rules in B/S notation (B3/S23 is Conway's Game of Life).
+
+A rule is compiled into a lookup table over (state, neighbour count) and into
+the three groups of counts the engines test for: counts that give a live
+cell whatever the state, counts that only give birth and counts that only
+keep a live cell alive. Vectorized engines compare against those groups
+(testing the complement when it is shorter), which for Conway's rule is
+exactly the two comparisons the engines always did.
+"""
+
+import re
+import numpy as np
+
+COUNTS = tuple(range(9))
+
+# Well known rules, usable by name wherever a rule string is accepted
+RULES = {
+    "conway": "B3/S23",
+    "life": "B3/S23",
+    "highlife": "B36/S23",
+    "daynight": "B3678/S34678",
+    "seeds": "B2/S",
+    "replicator": "B1357/S1357",
+    "lifewithoutdeath": "B3/S012345678",
+    "2x2": "B36/S125",
+    "maze": "B3/S12345",
+    "diamoeba": "B35678/S5678",
+    "morley": "B368/S245",
+    "anneal": "B4678/S35678",
+}
+
+
+class Rule:
+    """Compiled Life-like rule, Table[state, count] is 1 when the cell is alive in the next generation"""
+
+    def __init__(self, birth, survival):
+        self.Birth = tuple(sorted(set(birth)))
+        self.Survival = tuple(sorted(set(survival)))
+        self.Name = "B" + "".join(map(str, self.Birth)) + \
+            "/S" + "".join(map(str, self.Survival))
+        self.Table = np.zeros((2, 9), dtype=np.uint8)
+        self.Table[0, list(self.Birth)] = 1
+        self.Table[1, list(self.Survival)] = 1
+        self.Table.flags.writeable = False
+
+        self.Always = tuple(c for c in self.Birth if c in self.Survival)
+        self.BirthOnly = tuple(c for c in self.Birth if c not in self.Survival)
+        self.SurvivalOnly = tuple(c for c in self.Survival if c not in self.Birth)
+        # Empty space comes alive, no engine that skips empty space can run it
+        self.B0 = 0 in self.Birth
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Rule) and other.Name == self.Name
+
+    def __hash__(self) -> int:
+        return hash(self.Name)
+
+    def __str__(self) -> str:
+        return self.Name
+
+    def Apply(self, neighbours: np.array, alive: np.array, out=None, scratch=None, scratch2=None) -> np.array:
+        """Boolean next state of every cell, the out/scratch buffers have the shape of neighbours"""
+        if out is None:
+            out = np.empty(neighbours.shape, dtype=bool)
+        if scratch is None and (self.BirthOnly or self.SurvivalOnly):
+            scratch = np.empty(neighbours.shape, dtype=bool)
+
+        _CountIn(self.Always, neighbours, out, scratch2)
+        if self.BirthOnly:
+            _CountIn(self.BirthOnly, neighbours, scratch, scratch2)
+            # True only where the count matched and the cell is dead
+            np.greater(scratch, alive, out=scratch)
+            np.logical_or(out, scratch, out=out)
+        if self.SurvivalOnly:
+            _CountIn(self.SurvivalOnly, neighbours, scratch, scratch2)
+            np.logical_and(scratch, alive, out=scratch)
+            np.logical_or(out, scratch, out=out)
+        return out
+
+
+def _CountIn(counts: tuple, neighbours: np.array, out: np.array, scratch=None) -> np.array:
+    """out = neighbours is one of counts"""
+    invert = len(counts) > len(COUNTS) // 2
+    if invert:
+        counts = tuple(c for c in COUNTS if c not in counts)
+    if len(counts) == 0:
+        out[...] = invert
+        return out
+
+    np.equal(neighbours, counts[0], out=out)
+    if len(counts) > 1 and scratch is None:
+        scratch = np.empty(neighbours.shape, dtype=bool)
+    for count in counts[1:]:
+        np.equal(neighbours, count, out=scratch)
+        np.logical_or(out, scratch, out=out)
+    if invert:
+        np.logical_not(out, out=out)
+    return out
+
+
+def ParseRule(text) -> Rule:
+    """
+    Accepts "B3/S23", "S23/B3", the older "23/3" (survival/birth) notation or a name from RULES.
+    Raises ValueError for anything else.
+    """
+    if isinstance(text, Rule):
+        return text
+    normalized = re.sub(r"\s", "", str(text)).lower()
+    normalized = RULES.get(normalized, normalized).lower()
+
+    match = re.fullmatch(r"b([0-8]*)/?s([0-8]*)", normalized)
+    if match:
+        return Rule(map(int, match.group(1)), map(int, match.group(2)))
+    match = re.fullmatch(r"s([0-8]*)/?b([0-8]*)", normalized)
+    if match:
+        return Rule(map(int, match.group(2)), map(int, match.group(1)))
+    match = re.fullmatch(r"([0-8]*)/([0-8]*)", normalized)
+    if match:
+        return Rule(map(int, match.group(2)), map(int, match.group(1)))
+    raise ValueError(f"[INVALID_RULE] '{text}' is not a B/S rule")
+
+
+CONWAY = ParseRule("B3/S23")
@@ -0,0 +1,410 @@
+"""
+Local simulation server, standard library only (asyncio), run with `python main.py serve`.
+
+    POST   /sessions                   body: a configuration, query: format, engine, boundary, rule,
+                                       universe_size (at most MAX_UNIVERSE), every, interval -> {"session": id, ...}
+    GET    /sessions                   ids of the open sessions
+    GET    /sessions/<id>              generation, population, size and rule of a session
+    POST   /sessions/<id>/step         advances ?generations=N (default: every) right away
+    GET    /sessions/<id>/stream       WebSocket with the updates of the session
+    DELETE /sessions/<id>
+
+The body of a new session is anything Loader reads, format is its extension
+(json by default). Stream messages are JSON text frames, cells are flat
+[row, col, row, col, ...] lists:
+    {"type": "frame", "generation": g, "size": [rows, cols], "cells": [...]}   every live cell
+    {"type": "delta", "generation": g, "flipped": [...]}                         cells changed since the last message
+
+Sessions are stepped on a thread pool (numpy releases the GIL while it
+computes), `every` generations per update and no faster than one update
+every `interval` seconds. A session only steps while one of its
+subscribers can take another update. A subscriber that falls more than
+max_pending updates behind has its pending deltas dropped and gets a fresh
+frame once it has caught up with the socket.
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import os
+import secrets
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from loader import CheckConfig, Loader
+from simulation import GoLSimulation
+
+MAX_BODY = 1 << 26
+# Rows and columns of a session universe, every session keeps a few full grids of it in memory
+MAX_UNIVERSE = 4096
+MAX_PENDING = 8
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+STATUS = {200: "OK", 101: "Switching Protocols", 400: "Bad Request", 404: "Not Found",
+          405: "Method Not Allowed", 413: "Payload Too Large"}
+# Engines and boundaries a session can use, the others spawn processes or change the shape of the universe
+SESSION_ENGINES = ("numpy", "packed", "sparse", "loop")
+SESSION_BOUNDARIES = ("dead", "torus")
+# Put on a subscriber's queue in place of the deltas it missed, the writer sends a frame instead
+_RESYNC = object()
+# Put on a subscriber's queue when its session is closed
+_CLOSE = object()
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.Status = status
+
+
+def _Cells(mask: np.array) -> list:
+    return np.argwhere(mask).ravel().tolist()
+
+
+def _Advance(sim, previous: np.array, generations: int) -> (int, np.array, str):
+    """Runs on the pool: steps the simulation and returns the generation, the alive mask and the delta message"""
+    sim._Step(generations)
+    alive = sim._CurrentGrid() >= 255
+    message = json.dumps({
+        "type": "delta",
+        "generation": sim.Generation,
+        "flipped": _Cells(alive != previous),
+    }, separators=(",", ":"))
+    return sim.Generation, alive, message
+
+
+def _FrameMessage(generation: int, alive: np.array) -> str:
+    return json.dumps({
+        "type": "frame",
+        "generation": generation,
+        "size": list(alive.shape),
+        "cells": _Cells(alive),
+    }, separators=(",", ":"))
+
+
+def _WebSocketFrame(payload: bytes, opcode=0x1) -> bytes:
+    """Unmasked, unfragmented server frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < (1 << 16):
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _ReadWebSocketFrame(reader) -> (int, bytes):
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask != None:
+        payload = bytes(b ^ mask[i % 4] for (i, b) in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class Subscriber:
+    def __init__(self, maxPending: int):
+        self.Queue = asyncio.Queue(maxsize=maxPending)
+        # Starts with a frame of the current state
+        self.Resync = True
+        self.Queue.put_nowait(_RESYNC)
+
+    def CanAccept(self) -> bool:
+        return not self.Resync and not self.Queue.full()
+
+    def Push(self, message: str):
+        if self.Resync:
+            return
+        if self.Queue.full():
+            # Fallen behind, the missed deltas are replaced by one frame
+            while not self.Queue.empty():
+                self.Queue.get_nowait()
+            self.Resync = True
+            self.Queue.put_nowait(_RESYNC)
+            return
+        self.Queue.put_nowait(message)
+
+    def Close(self):
+        while not self.Queue.empty():
+            self.Queue.get_nowait()
+        # Nothing else gets queued after the close
+        self.Resync = True
+        self.Queue.put_nowait(_CLOSE)
+
+
+class Session:
+    def __init__(self, sessionId: str, sim, every: int, interval: float):
+        self.Id = sessionId
+        self.Sim = sim
+        self.Every = every
+        self.Interval = interval
+        self.Generation = sim.Generation
+        self.Alive = sim._CurrentGrid() >= 255
+        self.Subscribers = set()
+        # Only one step of a session runs at a time, the producer waits on Ready for a subscriber with room
+        self.Lock = asyncio.Lock()
+        self.Ready = asyncio.Event()
+        self.Producer = None
+
+    def Status(self) -> dict:
+        return {
+            "session": self.Id,
+            "generation": self.Generation,
+            "population": int(np.count_nonzero(self.Alive)),
+            "size": list(self.Alive.shape),
+            "rule": str(self.Sim.Rule),
+            "engine": self.Sim.EngineName,
+            "boundary": self.Sim.Boundary,
+            "every": self.Every,
+            "subscribers": len(self.Subscribers),
+        }
+
+
+class SimulationServer:
+    def __init__(self, workers=0, maxPending=MAX_PENDING):
+        self.Sessions = dict()
+        self.MaxPending = maxPending
+        self.Pool = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+
+    async def _Run(self, work, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.Pool, work, *args)
+
+    def _Session(self, sessionId: str) -> Session:
+        session = self.Sessions.get(sessionId)
+        if session == None:
+            raise RequestError(404, f"[SESSION_NOT_FOUND] No session '{sessionId}'")
+        return session
+
+    # Sessions
+
+    def _CreateSimulation(self, body: bytes, query: dict):
+        """Runs on the pool: loads the configuration like the command line does and builds its simulation"""
+        extension = query.get("format", "json").lstrip(".")
+        engine = query.get("engine", "numpy")
+        boundary = query.get("boundary", "dead")
+        if engine not in SESSION_ENGINES:
+            raise RequestError(400, f"[ENGINE_NOT_SUPPORTED] Sessions can use {', '.join(SESSION_ENGINES)}")
+        if boundary not in SESSION_BOUNDARIES:
+            raise RequestError(400, f"[BOUNDARY_NOT_SUPPORTED] Sessions can use {', '.join(SESSION_BOUNDARIES)}")
+        universeSize = int(query["universe_size"]) if "universe_size" in query else None
+        if universeSize != None and universeSize > MAX_UNIVERSE:
+            raise RequestError(400, f"[UNIVERSE_TOO_LARGE] Sessions are limited to {MAX_UNIVERSE}x{MAX_UNIVERSE} universes")
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, f"config.{extension}")
+            with open(filename, "wb") as configFile:
+                configFile.write(body)
+            try:
+                config = Loader(filename, universeSize, query.get("rule")).GetConfig()
+                if config.get("mode") == None:
+                    raise RequestError(400, f"[INVALID_CONFIG] Unknown format '{extension}'")
+                problems = CheckConfig(config)
+            except (ValueError, KeyError, TypeError, AttributeError) as error:
+                # Well-formed files of the wrong shape (a JSON list, a pattern that is a number) end up here too
+                message = str(error)
+                raise RequestError(400, message if message.startswith("[") else f"[INVALID_CONFIG] {message}")
+            if len(problems) > 0:
+                raise RequestError(400, " ".join(problems))
+            if max(config.get("universe_size", 100), config.get("universe_cols", 0)) > MAX_UNIVERSE:
+                raise RequestError(400, f"[UNIVERSE_TOO_LARGE] Sessions are limited to {MAX_UNIVERSE}x{MAX_UNIVERSE} universes")
+
+            sim = GoLSimulation(config, logName=None, engine=engine, boundary=boundary)
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output):
+                    sim._ApplyConfiguration()
+            except SystemExit:
+                # The command line gives up on invalid rules and engines, a session only refuses them
+                raise RequestError(400, output.getvalue().strip())
+        return sim
+
+    async def CreateSession(self, body: bytes, query: dict) -> dict:
+        every = int(query.get("every", 1))
+        interval = float(query.get("interval", 0))
+        if every < 1 or interval < 0:
+            raise RequestError(400, "[INVALID_PARAMETERS] every must be at least 1 and interval not negative")
+        sim = await self._Run(self._CreateSimulation, body, query)
+        session = Session(secrets.token_hex(8), sim, every, interval)
+        self.Sessions[session.Id] = session
+        return session.Status()
+
+    async def Step(self, session: Session, generations: int):
+        """Advances a session and hands the delta to every subscriber"""
+        async with session.Lock:
+            generation, alive, message = await self._Run(_Advance, session.Sim, session.Alive, generations)
+            session.Generation = generation
+            session.Alive = alive
+            for subscriber in session.Subscribers:
+                subscriber.Push(message)
+
+    async def _Produce(self, session: Session):
+        """Steps a session for as long as it has subscribers, only while one of them can take the update"""
+        while len(session.Subscribers) > 0 and session.Id in self.Sessions:
+            if not any(subscriber.CanAccept() for subscriber in session.Subscribers):
+                session.Ready.clear()
+                await session.Ready.wait()
+                continue
+            await self.Step(session, session.Every)
+            if session.Interval > 0:
+                await asyncio.sleep(session.Interval)
+        session.Producer = None
+
+    def CloseSession(self, session: Session):
+        del self.Sessions[session.Id]
+        for subscriber in session.Subscribers:
+            subscriber.Close()
+        session.Ready.set()
+
+    # Streaming
+
+    async def _SendUpdates(self, session: Session, subscriber: Subscriber, writer):
+        while True:
+            message = await subscriber.Queue.get()
+            if message is _CLOSE:
+                writer.write(_WebSocketFrame(struct.pack("!H", 1000), 0x8))
+                return
+            if message is _RESYNC:
+                # The state is taken right away, deltas pushed from here on follow it
+                generation, alive = session.Generation, session.Alive
+                subscriber.Resync = False
+                message = await self._Run(_FrameMessage, generation, alive)
+            writer.write(_WebSocketFrame(message.encode()))
+            # A slow socket holds the writer here, its queue fills up and the producer skips it
+            await writer.drain()
+            session.Ready.set()
+
+    async def _ReceiveControl(self, reader, writer):
+        """Answers pings and returns once the client closes the connection"""
+        while True:
+            opcode, payload = await _ReadWebSocketFrame(reader)
+            if opcode == 0x8:
+                writer.write(_WebSocketFrame(payload[:2], 0x8))
+                return
+            if opcode == 0x9:
+                writer.write(_WebSocketFrame(payload, 0xA))
+
+    async def Stream(self, session: Session, headers: dict, reader, writer):
+        key = headers.get("sec-websocket-key")
+        if headers.get("upgrade", "").lower() != "websocket" or key == None:
+            raise RequestError(400, "[WEBSOCKET_REQUIRED] The stream is only served over a WebSocket")
+        accept = base64.b64encode(hashlib.sha1(key.encode() + WEBSOCKET_GUID).digest()).decode()
+        writer.write((f"HTTP/1.1 101 {STATUS[101]}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+
+        subscriber = Subscriber(self.MaxPending)
+        session.Subscribers.add(subscriber)
+        if session.Producer == None:
+            session.Producer = asyncio.create_task(self._Produce(session))
+        sending = asyncio.create_task(self._SendUpdates(session, subscriber, writer))
+        receiving = asyncio.create_task(self._ReceiveControl(reader, writer))
+        try:
+            await asyncio.wait((sending, receiving), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            sending.cancel()
+            receiving.cancel()
+            session.Subscribers.discard(subscriber)
+            session.Ready.set()
+
+    # HTTP
+
+    async def _Route(self, method: str, path: str, query: dict, headers: dict, body: bytes, reader, writer):
+        parts = [part for part in path.split("/") if part]
+        if len(parts) == 0 or parts[0] != "sessions" or len(parts) > 3:
+            raise RequestError(404, f"[NOT_FOUND] {path}")
+        if len(parts) == 1:
+            if method == "GET":
+                return {"sessions": sorted(self.Sessions)}
+            if method == "POST":
+                return await self.CreateSession(body, query)
+            raise RequestError(405, f"[METHOD_NOT_ALLOWED] {method} {path}")
+
+        session = self._Session(parts[1])
+        action = parts[2] if len(parts) == 3 else None
+        if action == None and method == "GET":
+            return session.Status()
+        if action == None and method == "DELETE":
+            self.CloseSession(session)
+            return {"session": session.Id, "closed": True}
+        if action == "step" and method == "POST":
+            generations = int(query.get("generations", session.Every))
+            if generations < 1:
+                raise RequestError(400, "[INVALID_PARAMETERS] generations must be at least 1")
+            await self.Step(session, generations)
+            return session.Status()
+        if action == "stream" and method == "GET":
+            await self.Stream(session, headers, reader, writer)
+            return None
+        raise RequestError(405, f"[METHOD_NOT_ALLOWED] {method} {path}")
+
+    def _Respond(self, writer, status: int, data: dict):
+        body = json.dumps(data).encode()
+        writer.write((f"HTTP/1.1 {status} {STATUS[status]}\r\nContent-Type: application/json\r\n"
+                      f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body)
+
+    async def Handle(self, reader, writer):
+        """One request per connection"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = dict()
+            for line in lines[1:]:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            query = {name: values[-1] for (name, values) in parse_qs(url.query).items()}
+
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                raise RequestError(413, f"[BODY_TOO_LARGE] Configurations are limited to {MAX_BODY} bytes")
+            body = await reader.readexactly(length) if length > 0 else b""
+            data = await self._Route(method, url.path, query, headers, body, reader, writer)
+            if data != None:
+                self._Respond(writer, 200, data)
+        except RequestError as error:
+            self._Respond(writer, error.Status, {"error": str(error)})
+        except ValueError as error:
+            self._Respond(writer, 400, {"error": f"[INVALID_REQUEST] {error}"})
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # Client gone, or the server shutting down with the stream still open
+            pass
+        finally:
+            with contextlib.suppress(ConnectionError):
+                await writer.drain()
+            writer.close()
+
+    async def Serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.Handle, host, port)
+        print(f"[SUCCESS] Serving on http://{host}:{port}/sessions")
+        async with server:
+            await server.serve_forever()
+
+
+def Main(argv: list) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py serve", description="Runs simulations for other programs over HTTP and WebSockets.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=0, help="Threads stepping the sessions (default: one per core)")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING,
+                        help="Updates a subscriber may fall behind before it gets a fresh frame instead")
+    args = parser.parse_args(argv)
+
+    server = SimulationServer(args.workers, args.max_pending)
+    try:
+        asyncio.run(server.Serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
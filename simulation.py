@@ -0,0 +1,461 @@
+"""
+The simulation itself, loaded configurations are placed on a universe and advanced by one of the engines.
+main.py wraps it in the command line, the server, ensemble and out-of-core runs build it directly.
+"""
+
+import math
+import os
+import sys
+import time
+import numpy as np
+import entities
+from analytics import Analytics, Attach
+from entities import Place
+from loader import SaveGrid
+from engines import GetEngine
+from packed import Pack, PopCount, SetCells, Unpack
+from rules import CONWAY, ParseRule
+from logwriter import LogWriter
+from metrics import Metrics
+from render import Downsample, PoolFactor
+
+
+class GoLSimulation:
+    def __init__(self, config: dict, logName="debug_sim.log", grid=np.array([]), engine="numpy", workers=0, boundary="dead",
+                 logLevel="census", logEvery=None, metricsFile=None, analyticsFile=None, census="tracking"):
+        self.Census = None
+        # "tracking" follows known clusters between logged generations, "scan" relabels every cluster every time
+        self.CensusMode = census
+        self.Config = config
+        self.Grid = grid
+        self.GridSize = 100
+        self.EngineName = engine
+        self.Workers = workers
+        self.Boundary = boundary
+        self.Rule = CONWAY
+        self.Engine = None
+        # Packed universe of the packed engine, Grid is then only unpacked (uint8) to be shown, logged or saved
+        self.Cells = None
+        self.Stale = False
+        self.Generation = 0
+        self.Cycles = None
+        self.FirstPass = True
+        # Phase timers and per-generation counters, dumped to metricsFile on Close
+        self.Metrics = Metrics(enabled=metricsFile != None)
+        self.MetricsFile = metricsFile
+        # Population, births, deaths, bounding box and heatmap of every generation, saved to analyticsFile on Close
+        self.Analytics = None
+        self.AnalyticsFile = analyticsFile
+        if analyticsFile != None:
+            # The heatmap needs a universe that keeps its place on the plane
+            self.Analytics = Analytics(heatmap=boundary != "infinite")
+        self.LastFrame = None
+        # Generations advanced per drawn frame, and the uint8 image last handed to matplotlib
+        self.RenderEvery = 1
+        self.MaxPixels = 0
+        self.Frame = None
+        # Census or stats only, and how often: every frame on screen, never in headless runs unless asked for
+        self.LogLevel = logLevel
+        self.LogEvery = logEvery
+        # The writer (and its file) only comes to life with the first record, runs that log nothing leave no file
+        self.LogName = None if logLevel == "off" else logName
+        self.Log = None
+
+    def _ApplyConfiguration(self):
+        self.GridSize = self.Config.get("universe_size")
+        if self.GridSize == None:
+            print(
+                "\t[CONFIG_KEY_NOT_FOUND] Universe Size value was set to default (100)")
+            self.GridSize = 100
+        # Only the infinite boundary leaves behind universes that are not square, its checkpoints resume at their origin
+        cols = self.Config.get("universe_cols", self.GridSize)
+        if cols != self.GridSize and self.Boundary != "infinite":
+            print(
+                f"\t[INVALID_UNIVERSE_SIZE] A {self.GridSize}x{cols} universe can only be resumed with --boundary infinite")
+            sys.exit()
+        try:
+            self.Rule = ParseRule(self.Config.get("rule", CONWAY))
+            self.Engine = GetEngine(
+                self.EngineName, self.GridSize, self.Workers, self.Boundary, self.Rule)
+        except ValueError as error:
+            print(f"\t{error}")
+            sys.exit()
+        if self.Analytics != None:
+            self.Engine = Attach(self.Engine, self.Analytics)
+        if self.EngineName == "packed" and self.Analytics == None:
+            self.Cells = self.Engine.Cells
+            self.Grid = None
+        else:
+            # The infinite engines reallocate uint8 grids, cycle detection hashes the raw buffer so the first one matches
+            dtype = np.uint8 if self.Boundary == "infinite" else np.float64
+            self.Grid = np.zeros(
+                self.GridSize*cols, dtype=dtype).reshape(self.GridSize, cols)
+        if self.Boundary == "infinite":
+            self.Engine.OriginRow, self.Engine.OriginCol = self.Config.get("origin", (0, 0))
+
+        mode = self.Config.get("mode")
+        if mode == "snapshot":
+            # Resume from a checkpoint, the packed cells are memory-mapped straight from the file
+            if self.Cells is not None:
+                self.Cells[:] = self.Config.get("cells")
+            else:
+                Unpack(self.Config.get("cells"), cols, out=self.Grid)
+            self.Generation = self.Config.get("generation", 0)
+            if self.Analytics != None:
+                self.Analytics.Generation = self.Generation
+            return
+        if mode == "cells":
+            # Coordinate arrays from the streaming loaders, placed with a single scatter
+            rows = self.Config.get("rows")
+            coords = self.Config.get("cols")
+            valid = (rows >= 0) & (rows < self.GridSize) & (
+                coords >= 0) & (coords < cols)
+            invalid = rows.shape[0] - int(np.count_nonzero(valid))
+            if invalid > 0:
+                print(
+                    f"\t[PATTERN_COORDS_INVALID] Skipping {invalid} invalid pattern(s)")
+            if self.Cells is not None:
+                SetCells(self.Cells, rows[valid], coords[valid])
+            else:
+                self.Grid[rows[valid], coords[valid]] = 255
+            return
+
+        if self.Cells is not None:
+            # Patterns are placed on a 0/255 frame, which is then packed
+            self.Grid = np.zeros((self.GridSize, self.GridSize), dtype=np.uint8)
+
+        patterns = self.Config.get("patterns")
+        if patterns == None:
+            print("\t[CONFIG_KEY_NOT_FOUND] Patterns value was not found")
+            sys.exit()
+            return self.Grid
+
+        if mode == "json":
+            for pat in patterns:
+                patType = pat.get("type")
+                if patType == None:
+                    print(
+                        "\t[PATTERN_TYPE_NOT_FOUND] Skipping incomplete pattern")
+                    continue
+                patCoords = pat.get("topLeftCornerPosition")
+                if patCoords == None:
+                    print(
+                        "[TOP_LEFT_CORNER_POSITION_NOT_FOUND] Skipping incomplete pattern")
+                    continue
+
+                patCordX = patCoords.get("x")
+                patCordY = patCoords.get("y")
+                if patCordX == None or patCordY == None:
+                    print("[COORDINATES_NOT_FOUND] Skipping incomplete pattern")
+                    continue
+
+                if patCordX > (self.GridSize-1) or patCordX < 0 or patCordY > (self.GridSize-1) or patCordY < 0:
+                    print(
+                        "[INVALID_COORDINATES] Skipping invalid pattern")
+                    continue
+
+                pattern = entities.PATTERNS_BY_TYPE.get(patType)
+                if pattern == None:
+                    continue
+                Place(pattern, patCordX, patCordY, self.Grid)
+        if self.Cells is not None:
+            Pack(self.Grid, out=self.Cells)
+
+    def StartSimulation(self, generations=200, renderEvery=1):
+        """Shows the simulation in a window, drawing one frame every renderEvery generations"""
+        # matplotlib is only needed when there is a window to draw on
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
+
+        self._ApplyConfiguration()
+        print("[SUCCESS] Started Conway's Game of Life Simulation")
+
+        updateInterval = 1
+        self.RenderEvery = max(1, renderEvery)
+
+        # set up animation
+        fig, ax = plt.subplots()
+        # Universes bigger than the window are pooled down to its size in pixels
+        self.MaxPixels = int(max(fig.get_size_inches() * fig.dpi))
+        img = ax.imshow(self._RenderFrame(),
+                        interpolation='nearest', vmin=0, vmax=1)
+        ani = animation.FuncAnimation(fig,
+                                      self._Update,
+                                      fargs=(img, self.GridSize,),
+                                      frames=-(-generations // self.RenderEvery),
+                                      interval=updateInterval,
+                                      save_count=50,
+                                      repeat=False,
+                                      # Only the image is redrawn, unless the infinite universe changes its extent
+                                      blit=self.Boundary != "infinite",
+                                      )
+        plt.show()
+
+    def _RenderFrame(self) -> np.array:
+        """uint8 image of the universe, any-alive pooled when it has more cells than the window has pixels"""
+        grid = self._CurrentGrid()
+        factor = PoolFactor(grid.shape, self.MaxPixels or max(grid.shape))
+        self.Frame = Downsample(grid, factor, self.Frame)
+        return self.Frame
+
+    def _CurrentGrid(self) -> np.array:
+        """
+        0/255 grid of the current generation, unpacked into a uint8 frame when the cells are kept packed.
+        HashLife writes its live cells into a grid only here, after advancing several generations at once.
+        """
+        if self.Cells is not None and (self.Stale or self.Grid is None):
+            if self.Grid is None:
+                self.Grid = np.zeros((self.GridSize, self.GridSize), dtype=np.uint8)
+            Unpack(self.Cells, self.GridSize, out=self.Grid)
+            self.Stale = False
+        elif self.Stale:
+            self.Grid = self.Engine.Export()
+            self.Stale = False
+        return self.Grid
+
+    def _Population(self) -> int:
+        if self.Cells is not None:
+            return PopCount(self.Cells)
+        if self.Stale:
+            return self.Engine.Population()
+        return int(np.count_nonzero(self.Grid))
+
+    def _Advance(self, generations: int):
+        """Advances the universe, the caller keeps the generation count"""
+        if self.Cells is not None:
+            self.Engine.AdvancePacked(self.Cells, generations)
+            self.Stale = True
+        elif generations == 1:
+            self.Grid = self._ApplyRules()
+            self.Stale = False
+        elif hasattr(self.Engine, "AdvanceCells") and self.Engine.Analytics == None:
+            # The live bounding box can be far bigger than the universe, it is only drawn when something reads it
+            self.Engine.AdvanceCells(self.Grid, generations)
+            self.Stale = True
+        else:
+            self.Grid = self.Engine.Advance(self.Grid, generations)
+
+    def _Save(self, filename: str, generation: int):
+        """Writes the universe, .gol snapshots straight from the packed cells when they are kept packed"""
+        if self.Cells is not None and str(filename).endswith(".gol"):
+            import snapshot
+
+            snapshot.Save(filename, self.Cells, self.GridSize, generation, str(self.Rule))
+            return
+        SaveGrid(filename, self._CurrentGrid(), generation, self.Rule, self._Origin())
+
+    def IterGenerations(self, generations: int, every=1, detectCycles=False, stopOnCycle=False):
+        """
+        Advances the simulation and yields (grid, stats) every `every` generations (and after the last one).
+        grid is a read-only view of the live universe, it is only valid until the next iteration.
+        In the infinite boundary mode its top left cell sits at (Engine.OriginRow, Engine.OriginCol).
+
+        With detectCycles the universe is hashed every generation, as soon as it repeats itself
+        the run either stops (stopOnCycle) or jumps straight to the state of the last generation.
+        """
+        for stats in self._IterStats(generations, every, detectCycles, stopOnCycle):
+            view = self._CurrentGrid().view()
+            view.flags.writeable = False
+            yield view, stats
+
+    def _IterStats(self, generations: int, every=1, detectCycles=False, stopOnCycle=False):
+        """IterGenerations without the grid, a packed universe is not unpacked for it"""
+        if self.Engine == None:
+            self._ApplyConfiguration()
+        if detectCycles or stopOnCycle:
+            from cycles import CycleDetector
+
+            self.Cycles = CycleDetector()
+            self.Cycles.Observe(self.Generation, *self._CycleState())
+
+        target = self.Generation + generations
+        while self.Generation < target:
+            chunk = min(every - self.Generation % every,
+                        target - self.Generation)
+            if self.Cycles == None and not self.Metrics.Enabled:
+                self._Advance(chunk)
+                self.Generation += chunk
+            else:
+                for _ in range(chunk):
+                    self._Step()
+                    if self.Cycles != None and self.Cycles.Observe(self.Generation, *self._CycleState()):
+                        break
+
+            stats = {
+                "generation": self.Generation,
+                "population": self._Population(),
+            }
+            if self.Cycles != None and self.Cycles.Period != None:
+                if not stopOnCycle:
+                    # Every state from here on is already known, only the phase at target matters
+                    remaining = self.Cycles.Remaining(self.Generation, target)
+                    if self.Analytics != None:
+                        # The skipped generations repeat the cycle, the series resumes with the last ones before target
+                        self.Analytics.Generation = target - remaining
+                    self._Advance(remaining)
+                    self.Generation = target
+                    stats["generation"] = target
+                    stats["population"] = self._Population()
+                stats["period"] = self.Cycles.Period
+                stats["transient"] = self.Cycles.Transient
+                target = self.Generation
+
+            yield stats
+
+    def _CycleState(self) -> (np.array, tuple):
+        """Grid and plane position to hash, only the live bounding box counts in the infinite mode"""
+        if self.Boundary != "infinite":
+            return (self.Grid if self.Cells is None else self.Cells), (0, 0)
+        self._CurrentGrid()
+        if self.Engine.Grid is not self.Grid:
+            self.Engine.Reset(self.Grid)
+        box = self.Engine.Box
+        if box == None:
+            return self.Grid[:0, :0], (0, 0)
+        top, left, bottom, right = box
+        return self.Grid[top: bottom, left: right], (self.Engine.OriginRow + top, self.Engine.OriginCol + left)
+
+    def RunHeadless(self, generations=200, output="final_grid.txt", snapshotEvery=0, detectCycles=False, stopOnCycle=False):
+        """Runs the simulation without drawing anything, as fast as the engine allows"""
+        self._ApplyConfiguration()
+        print(
+            f"[SUCCESS] Started Conway's Game of Life Simulation (headless, rule {self.Rule})")
+
+        stem, ext = os.path.splitext(output)
+        logEvery = self.LogEvery if self.LogName != None and self.LogEvery != None else 0
+        # Stop at every generation that needs a snapshot or a log record, and nowhere else
+        every = math.gcd(snapshotEvery, logEvery) or generations
+        first = self.Generation
+        last = first + generations
+        start = time.perf_counter()
+        for stats in self._IterStats(generations, every, detectCycles, stopOnCycle):
+            if snapshotEvery > 0 and stats["generation"] % snapshotEvery == 0 and stats["generation"] != last:
+                self._Save(f"{stem}_{stats['generation']:08d}{ext}", stats["generation"])
+            if logEvery > 0 and stats["generation"] % logEvery == 0:
+                self._WriteLog(self._CurrentGrid())
+        elapsed = time.perf_counter() - start
+
+        self._Save(output, self.Generation)
+        simulated = self.Generation - first
+        rate = simulated / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"[SUCCESS] Simulated {simulated} generations in {elapsed:.3f}s ({rate:.1f} generations/second)")
+        if self.Cycles != None:
+            if self.Cycles.Period == None:
+                print("\tNo cycle detected")
+            else:
+                print(
+                    f"\tCycle detected: period {self.Cycles.Period}, transient {self.Cycles.Transient} generations")
+        print(f"\tFinal grid written to {output}")
+        if self.Boundary == "infinite":
+            print(
+                f"\tTop left cell of the final grid is at row {self.Engine.OriginRow}, column {self.Engine.OriginCol}")
+
+    def _Update(self, frameNum, img, N):
+        if self.Metrics.Enabled and self.LastFrame != None:
+            # matplotlib draws the previous frame between two updates
+            self.Metrics.Add("render", time.perf_counter() - self.LastFrame)
+
+        shape = self.Frame.shape if self.Frame is not None else None
+        self._Step(self.RenderEvery)
+        newGrid = self._CurrentGrid()
+
+        frame = self._RenderFrame()
+        if frame.shape != shape:
+            # The infinite mode reallocated the universe
+            img.set_extent((-0.5, frame.shape[1] - 0.5,
+                            frame.shape[0] - 0.5, -0.5))
+        img.set_data(frame)
+
+        if self.FirstPass:
+            print("=== GENERATION PROGRESS: ")
+            self.FirstPass = False
+        # A frame advances RenderEvery generations, it is logged when a multiple of logEvery lies among them
+        logEvery = self.LogEvery or 1
+        if self.Generation // logEvery > (self.Generation - self.RenderEvery) // logEvery:
+            print(f"{self.Generation} ", end="")
+            if self.LogName != None:
+                self._WriteLog(newGrid)
+
+        if self.Metrics.Enabled:
+            self.LastFrame = time.perf_counter()
+        return img,
+
+    def _Origin(self) -> tuple:
+        """Plane coordinates of the top left cell of the grid"""
+        if self.Boundary == "infinite":
+            return (self.Engine.OriginRow, self.Engine.OriginCol)
+        return (0, 0)
+
+    def _Step(self, generations=1):
+        """Advances the given generations, one at a time and timed and counted when the metrics are enabled"""
+        if not self.Metrics.Enabled:
+            self._Advance(generations)
+            self.Generation += generations
+            return
+
+        for _ in range(generations):
+            if self.Cells is not None:
+                # Births and deaths straight from the packed words of both generations
+                before = self.Cells.copy()
+                previous = PopCount(before)
+                with self.Metrics.Phase("step"):
+                    self._Advance(1)
+                self.Generation += 1
+                population = PopCount(self.Cells)
+                kept = PopCount(np.bitwise_and(before, self.Cells, out=before))
+                self.Metrics.Record(self.Generation, population, population - kept,
+                                    previous - kept, self.GridSize ** 2)
+                continue
+            before = self.Grid >= 255
+            beforeOrigin = self._Origin()
+            with self.Metrics.Phase("step"):
+                self._Advance(1)
+            self.Generation += 1
+            activeCells = getattr(self.Engine, "ActiveCells", self.Grid.size)
+            self.Metrics.Generation(self.Generation, before, self.Grid,
+                                    activeCells, beforeOrigin, self._Origin())
+
+    def AddObserver(self, callback):
+        """callback(stats) is called after every generation with its population, births, deaths and active cells"""
+        self.Metrics.AddObserver(callback)
+
+    def _WriteLog(self, grid: np.array):
+        """Queues the log record of the current generation, the census only runs at the census log level"""
+        record = {
+            "generation": self.Generation,
+            "population": int(np.count_nonzero(grid)),
+        }
+        if self.EngineName == "sparse":
+            record["active_tiles"] = self.Engine.ActiveTiles
+            record["total_tiles"] = self.Engine.TotalTiles
+        if self.LogLevel == "census":
+            with self.Metrics.Phase("census"):
+                record["census"] = dict(self._CountPatterns(grid))
+        with self.Metrics.Phase("logging"):
+            if self.Log == None:
+                self.Log = LogWriter(self.LogName)
+            self.Log.Write(record)
+
+    def Close(self):
+        """Writes out the pending log records, the metrics and the analytics"""
+        if self.Log != None:
+            self.Log.Close()
+        if self.MetricsFile != None:
+            self.Metrics.Dump(self.MetricsFile)
+        if self.AnalyticsFile != None:
+            self.Analytics.Save(self.AnalyticsFile)
+
+    def _CountPatterns(self, grid: np.array) -> list:
+        """Census of the known entities on grid, the lookup tables are only built when first needed"""
+        if self.Census == None:
+            from census import Census, TrackingCensus
+
+            self.Census = TrackingCensus(self.Rule) if self.CensusMode == "tracking" else Census()
+        if self.CensusMode == "tracking":
+            return self.Census.Count(grid, self.Generation, self._Origin())
+        return self.Census.Count(grid)
+
+    def _ApplyRules(self):
+        """Applies the rules to to the grid, and returns the modified/updated grid"""
+        return self.Engine.Step(self.Grid)
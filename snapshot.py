@@ -0,0 +1,123 @@
+"""
+Binary snapshot format (.gol) used to checkpoint and resume long runs.
+
+Layout (little-endian):
+    header  magic "GOLSNAP1", version, body offset, rows, cols, generation,
+            origin row, origin col, rule length, rule (ASCII), zero padding
+            up to the body offset
+    body    rows x ceil(cols/64) uint64 words, bit-packed like packed.py
+
+The origin is the plane position of the top left cell, only the infinite
+boundary moves it away from (0, 0). Version 1 snapshots have no origin.
+
+The body is aligned so it can be memory-mapped as a uint64 array as is.
+"""
+
+import os
+import struct
+import tempfile
+import numpy as np
+from packed import WORD, WordsPerRow
+
+MAGIC = b"GOLSNAP1"
+VERSION = 2
+PREFIX = struct.Struct("<8sI")
+HEADERS = {1: struct.Struct("<8sIIQQQI"), 2: struct.Struct("<8sIIQQQqqI")}
+HEADER = HEADERS[VERSION]
+ALIGNMENT = 64
+# Where the body offset and the generation sit in the header, out-of-core runs rewrite both in place
+BODY = struct.Struct("<I")
+BODY_OFFSET = struct.calcsize("<8sI")
+GENERATION = struct.Struct("<Q")
+GENERATION_OFFSET = struct.calcsize("<8sIIQQ")
+
+
+def _Header(rows: int, cols: int, generation: int, rule: str, origin=(0, 0)) -> bytes:
+    """Header padded up to the body offset"""
+    ruleBytes = rule.encode("ascii")
+    offset = HEADER.size + len(ruleBytes)
+    offset += (-offset) % ALIGNMENT
+    header = HEADER.pack(MAGIC, VERSION, offset, rows, cols, generation,
+                         origin[0], origin[1], len(ruleBytes)) + ruleBytes
+    return header.ljust(offset, b"\0")
+
+
+def Save(filename: str, cells: np.array, cols: int, generation=0, rule="B3/S23", origin=(0, 0)):
+    """Writes a packed universe atomically, the file either holds the old or the new snapshot but never half of one"""
+    rows = cells.shape[0]
+    header = _Header(rows, cols, generation, rule, origin)
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    handle, tmpName = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, "wb") as tmpFile:
+            tmpFile.write(header)
+            tmpFile.write(np.ascontiguousarray(cells, dtype=WORD).data)
+            tmpFile.flush()
+            os.fsync(tmpFile.fileno())
+        os.replace(tmpName, filename)
+    except:
+        os.remove(tmpName)
+        raise
+
+
+def ReadHeader(filename: str) -> dict:
+    snapshotFile = open(filename, "rb")
+    raw = snapshotFile.read(HEADER.size)
+    magic, version = PREFIX.unpack_from(raw) if len(raw) >= PREFIX.size else (None, None)
+    if magic != MAGIC or version not in HEADERS:
+        snapshotFile.close()
+        raise ValueError(f"[INVALID_SNAPSHOT] {filename} is not a version 1 or {VERSION} snapshot")
+    if version == 1:
+        magic, version, offset, rows, cols, generation, ruleLength = HEADERS[1].unpack_from(raw)
+        originRow, originCol = 0, 0
+    else:
+        magic, version, offset, rows, cols, generation, originRow, originCol, ruleLength = HEADER.unpack(raw)
+    snapshotFile.seek(HEADERS[version].size)
+    rule = snapshotFile.read(ruleLength).decode("ascii")
+    snapshotFile.close()
+
+    return {
+        "size": HEADERS[version].size + ruleLength,
+        "offset": offset,
+        "rows": rows,
+        "cols": cols,
+        "generation": generation,
+        "origin": (originRow, originCol),
+        "rule": rule,
+    }
+
+
+def Load(filename: str, mode="r") -> (dict, np.array):
+    """Returns the header and the packed cells of a snapshot, memory-mapped without copying"""
+    header = ReadHeader(filename)
+    cells = np.memmap(filename, dtype=WORD, mode=mode, offset=header["offset"],
+                      shape=(header["rows"], WordsPerRow(header["cols"])))
+    return header, cells
+
+
+def Create(filename: str, rows: int, cols: int, generation=0, rule="B3/S23"):
+    """
+    Writes an empty snapshot without ever holding its cells in memory.
+    The body is only extended to its size, most filesystems store it as a sparse file until cells are written.
+    """
+    header = _Header(rows, cols, generation, rule)
+    with open(filename, "wb") as snapshotFile:
+        snapshotFile.write(header)
+        snapshotFile.truncate(len(header) + rows * WordsPerRow(cols) * WORD.itemsize)
+
+
+def BodyOffsets(header: dict) -> (int, int):
+    """
+    Offsets of the two bodies an out-of-core run alternates between, the first right after the header.
+    The header offset always points at one of them, a reader never sees the other one.
+    """
+    first = header["size"] + (-header["size"]) % ALIGNMENT
+    body = header["rows"] * WordsPerRow(header["cols"]) * WORD.itemsize
+    return first, first + body + (-body) % ALIGNMENT
+
+
+def Commit(buffer, offset: int, generation: int):
+    """Points the header of a snapshot mapped into buffer at the body at offset, which holds generation"""
+    BODY.pack_into(buffer, BODY_OFFSET, offset)
+    GENERATION.pack_into(buffer, GENERATION_OFFSET, generation)
@@ -0,0 +1,108 @@
+"""
+Incremental stepping engine that only re-evaluates tiles next to last generation's changes.
+
+A cell can only change if something in its 3x3 neighbourhood changed in the
+previous generation, so tiles that did not change and whose neighbours did
+not change either (empty space, still lifes) are skipped entirely.
+"""
+
+import numpy as np
+from rules import CONWAY
+
+
+def _Dilate(mask: np.array) -> np.array:
+    """Grows a tile mask by one tile in every direction"""
+    padded = np.zeros((mask.shape[0]+2, mask.shape[1]+2), dtype=bool)
+    padded[1:-1, 1:-1] = mask
+    out = mask.copy()
+    for di in (0, 1, 2):
+        for dj in (0, 1, 2):
+            out |= padded[di: di+mask.shape[0], dj: dj+mask.shape[1]]
+    return out
+
+
+class SparseEngine:
+    """Keeps a map of dirty tiles and only recomputes those and their neighbours"""
+
+    def __init__(self, size: int, tileSize=32, rule=CONWAY):
+        self.Size = size
+        self.Rule = rule
+        self.TileSize = tileSize
+        self.Tiles = (size + tileSize - 1) // tileSize
+        self.TotalTiles = self.Tiles * self.Tiles
+        # Current and next generation, with a one cell border that always stays dead
+        self.Current = np.zeros((size+2, size+2), dtype=np.uint8)
+        self.Next = np.zeros((size+2, size+2), dtype=np.uint8)
+        self.Changed = np.zeros((self.Tiles, self.Tiles), dtype=bool)
+        self.Grid = None
+        # Savings counters, ActiveTiles is the amount of tiles evaluated on the last generation
+        self.ActiveTiles = 0
+        self.ActiveCells = 0
+        self.ActiveTileTotal = 0
+        self.Generations = 0
+
+    def Reset(self, grid: np.array):
+        """Reloads the whole universe from grid, every tile with live cells becomes dirty"""
+        alive = self.Current[1:-1, 1:-1]
+        np.greater_equal(grid, 255, out=alive, casting="unsafe")
+        self.Next[:] = self.Current
+        t = self.TileSize
+        for ti in range(self.Tiles):
+            for tj in range(self.Tiles):
+                self.Changed[ti, tj] = alive[ti*t: (ti+1)*t, tj*t: (tj+1)*t].any()
+        self.Grid = grid
+
+    def _StepTile(self, ti: int, tj: int) -> bool:
+        """Computes the next generation of one tile, returns True if any cell changed"""
+        t = self.TileSize
+        r0 = ti * t
+        c0 = tj * t
+        r1 = min(self.Size, r0 + t)
+        c1 = min(self.Size, c0 + t)
+
+        # Tile plus its one cell halo, in padded coordinates
+        window = self.Current[r0: r1+2, c0: c1+2]
+        h = r1 - r0
+        w = c1 - c0
+        neighbours = window[:h, :w] + window[:h, 1:w+1]
+        neighbours += window[:h, 2:]
+        neighbours += window[1:h+1, :w]
+        neighbours += window[1:h+1, 2:]
+        neighbours += window[2:, :w]
+        neighbours += window[2:, 1:w+1]
+        neighbours += window[2:, 2:]
+
+        old = window[1:-1, 1:-1]
+        new = self.Rule.Apply(neighbours, old)
+        target = self.Next[r0+1: r1+1, c0+1: c1+1]
+        target[:] = new
+        if np.array_equal(target, old):
+            return False
+
+        self.Grid[r0: r1, c0: c1] = target * 255
+        return True
+
+    def Step(self, grid: np.array) -> np.array:
+        if grid is not self.Grid:
+            self.Reset(grid)
+
+        active = _Dilate(self.Changed)
+        changed = np.zeros_like(self.Changed)
+        activeTiles = np.argwhere(active)
+        for (ti, tj) in activeTiles:
+            changed[ti, tj] = self._StepTile(ti, tj)
+
+        # Tiles that were skipped are identical in both buffers, so swapping is enough
+        self.Current, self.Next = self.Next, self.Current
+        self.Changed = changed
+
+        self.ActiveTiles = len(activeTiles)
+        self.ActiveCells = self.ActiveTiles * self.TileSize * self.TileSize
+        self.ActiveTileTotal += self.ActiveTiles
+        self.Generations += 1
+        return grid
+
+    def Advance(self, grid: np.array, generations: int) -> np.array:
+        for _ in range(generations):
+            grid = self.Step(grid)
+        return grid
@@ -0,0 +1,27 @@
+"""Timed benchmarks measure the work they name, on the input they name."""
+
+import numpy as np
+from benchmarks import suite
+
+
+def test_every_call_starts_from_the_seed(monkeypatch):
+    monkeypatch.setattr(suite, "MIN_TIME", 0)
+    seed = suite.RandomGrid(20, 0.35, 0)
+    populations = []
+
+    def Step(grid):
+        populations.append(int(np.count_nonzero(grid)))
+        grid[:] = 0
+
+    _, calls = suite._Time(Step, 3, seed.copy)
+    assert len(populations) == 3 * calls
+    assert set(populations) == {int(np.count_nonzero(seed))}
+
+
+def test_packed_steps_packed_cells():
+    seed = suite.RandomGrid(70, 0.35, 0)
+    work, setup = suite._Stepper(suite.GetEngine("packed", 70), seed)
+    cells = work(setup())
+    expected = suite.GetEngine("numpy", 70).Advance(seed.copy(), 1)
+    assert cells.dtype == np.uint64
+    assert np.array_equal(suite.Unpack(cells, 70), expected)
@@ -0,0 +1,92 @@
+"""Both censuses must report exactly what the original pattern scan wrote to the log, generation by generation."""
+
+import os
+import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+from census import Census, TrackingCensus
+from engines import GetEngine
+from entities import ENTITIES
+from loader import Loader
+from simulation import GoLSimulation
+from tests.test_engines import CONFIGS
+
+GENERATIONS = 30
+
+
+def _Orientations() -> list:
+    """(label, 0/255 pattern) in the order and with the names of the original scan"""
+    orientations = []
+    for (name, pattern, rotatable) in ENTITIES:
+        orientations.append((name, pattern))
+        if rotatable:
+            for (turns, suffix) in ((1, "Rotated Right"), (2, "Rotated Downwards"), (3, "Rotated Left")):
+                orientations.append((f"{name} {suffix}", np.rot90(pattern, turns)))
+    return orientations
+
+
+def _BaselineScan(grid: np.array) -> list:
+    """
+    The original scan: every orientation visits the cells equal to its top left cell in row-major order,
+    counts every window that matches at that moment and clears it before going on.
+    Only windows that match are visited, which gives the same counts without a Python loop over every cell.
+    """
+    grid = np.where(grid >= 255, 255.0, 0.0)
+    counts = []
+    for (label, pattern) in _Orientations():
+        height, width = pattern.shape
+        if height > grid.shape[0] or width > grid.shape[1]:
+            continue
+        corners = (grid == pattern[0, 0])[:grid.shape[0] - height + 1, :grid.shape[1] - width + 1]
+        counter = 0
+        last = -1
+        while True:
+            matches = (sliding_window_view(grid, pattern.shape) == pattern).all(axis=(2, 3)) & corners
+            found = np.flatnonzero(matches.ravel())
+            found = found[found > last]
+            if found.shape[0] == 0:
+                break
+            last = int(found[0])
+            r, c = divmod(last, matches.shape[1])
+            grid[r: r + height, c: c + width] = 0
+            counter += 1
+        if counter > 0:
+            counts.append((label, counter))
+    return counts
+
+
+def _Universes() -> list:
+    universes = []
+    for filename in CONFIGS:
+        sim = GoLSimulation(Loader(filename).GetConfig(), logName=None)
+        sim._ApplyConfiguration()
+        universes.append((os.path.basename(filename), sim.Grid))
+    for (seed, density) in enumerate((0.15, 0.35)):
+        grid = np.zeros((48, 48))
+        grid[np.random.default_rng(seed).random(grid.shape) < density] = 255
+        universes.append((f"soup{seed}", grid))
+    return universes
+
+
+def _Generations(grid: np.array) -> list:
+    engine = GetEngine("numpy", grid.shape[0])
+    grid = grid.copy()
+    grids = [grid.copy()]
+    for _ in range(GENERATIONS):
+        grid = engine.Step(grid)
+        grids.append(grid.copy())
+    return grids
+
+
+@pytest.mark.parametrize("name, grid", _Universes(), ids=lambda value: value if isinstance(value, str) else "")
+def test_census_matches_the_baseline_scan(name, grid):
+    census = Census()
+    for (generation, g) in enumerate(_Generations(grid)):
+        assert census.Count(g) == _BaselineScan(g), f"{name} generation {generation}"
+
+
+@pytest.mark.parametrize("name, grid", _Universes(), ids=lambda value: value if isinstance(value, str) else "")
+def test_tracking_census_matches_the_baseline_scan(name, grid):
+    tracker = TrackingCensus()
+    for (generation, g) in enumerate(_Generations(grid)):
+        assert tracker.Count(g, generation) == _BaselineScan(g), f"{name} generation {generation}"
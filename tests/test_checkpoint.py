@@ -0,0 +1,59 @@
+"""Checkpoints of the infinite boundary keep the shape and the plane position of the grid they were written from."""
+
+import numpy as np
+import pytest
+import snapshot
+from loader import Loader
+from simulation import GoLSimulation
+from tests.test_engines import CONFIGS
+
+
+def _Simulation(config: dict) -> GoLSimulation:
+    sim = GoLSimulation(config, logName=None, boundary="infinite")
+    sim._ApplyConfiguration()
+    return sim
+
+
+def _Plane(sim: GoLSimulation, generations: int) -> set:
+    grid = sim.Engine.Advance(sim.Grid, generations)
+    rows, cols = np.nonzero(grid >= 255)
+    return set(zip((rows + sim.Engine.OriginRow).tolist(), (cols + sim.Engine.OriginCol).tolist()))
+
+
+@pytest.mark.parametrize("extension", ["gol", "txt"])
+def test_infinite_resume(tmp_path, extension):
+    expected = _Plane(_Simulation(Loader(CONFIGS[-1]).GetConfig()), 300)
+
+    sim = _Simulation(Loader(CONFIGS[-1]).GetConfig())
+    sim.Grid = sim.Engine.Advance(sim.Grid, 200)
+    assert sim.Grid.shape[0] != sim.Grid.shape[1]
+    filename = str(tmp_path / f"inf.{extension}")
+    sim._Save(filename, 200)
+
+    config = Loader(filename).GetConfig()
+    assert (config["universe_size"], config["universe_cols"]) == sim.Grid.shape
+    assert tuple(config["origin"]) == (sim.Engine.OriginRow, sim.Engine.OriginCol)
+    assert _Plane(_Simulation(config), 100) == expected
+
+
+def test_non_square_needs_infinite(tmp_path):
+    filename = tmp_path / "wide.txt"
+    filename.write_text("4 8 0 -2\n1 7\n")
+    sim = GoLSimulation(Loader(str(filename)).GetConfig(), logName=None)
+    with pytest.raises(SystemExit):
+        sim._ApplyConfiguration()
+
+
+def test_version_1_snapshot(tmp_path):
+    filename = tmp_path / "old.gol"
+    rule = b"B3/S23"
+    header = snapshot.HEADERS[1].pack(snapshot.MAGIC, 1, 64, 3, 3, 7, len(rule)) + rule
+    body = np.array([0b010, 0b010, 0b010], dtype=snapshot.WORD)
+    filename.write_bytes(header.ljust(64, b"\0") + body.tobytes())
+
+    config = Loader(str(filename)).GetConfig()
+    assert (config["universe_size"], config["universe_cols"], config["origin"]) == (3, 3, (0, 0))
+    assert config["generation"] == 7
+    sim = GoLSimulation(config, logName=None)
+    sim._ApplyConfiguration()
+    assert np.array_equal(np.argwhere(sim.Grid >= 255), [[0, 1], [1, 1], [2, 1]])
@@ -0,0 +1,66 @@
+"""Jumping over a detected cycle must land on the same generation a full run reaches."""
+
+import os
+import numpy as np
+import pytest
+from cycles import CycleDetector
+from loader import Loader
+from simulation import GoLSimulation
+from tests.test_engines import CONFIGS
+
+GENERATIONS = 1001
+
+
+def _Final(config: dict, generations: int, engine="numpy", boundary="dead", detectCycles=False) -> tuple:
+    """Stats and plane coordinates of the live cells after generations"""
+    sim = GoLSimulation(config, logName=None, engine=engine, boundary=boundary)
+    for (grid, stats) in sim.IterGenerations(generations, generations, detectCycles):
+        pass
+    rows, cols = np.nonzero(grid >= 255)
+    origin = sim._Origin()
+    return stats, set(zip((rows + origin[0]).tolist(), (cols + origin[1]).tolist()))
+
+
+def _Soup(size: int, seed: int) -> dict:
+    rng = np.random.default_rng(seed)
+    rows, cols = np.nonzero(rng.random((size, size)) < 0.35)
+    return {"mode": "cells", "universe_size": size, "rows": rows, "cols": cols}
+
+
+def _AssertSameFinal(config: dict, engine="numpy", boundary="dead", generations=GENERATIONS):
+    expected, expectedCells = _Final(config, generations, engine, boundary)
+    actual, actualCells = _Final(config, generations, engine, boundary, detectCycles=True)
+    assert "period" in actual
+    assert actual["generation"] == expected["generation"] == generations
+    assert actual["population"] == expected["population"]
+    assert actualCells == expectedCells
+
+
+@pytest.mark.parametrize("filename", CONFIGS, ids=os.path.basename)
+@pytest.mark.parametrize("engine", ["numpy", "packed"])
+def test_shipped_configs(filename, engine):
+    _AssertSameFinal(Loader(filename).GetConfig(), engine)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+@pytest.mark.parametrize("generations", [GENERATIONS, GENERATIONS + 1])
+def test_soups(seed, generations):
+    # Both phases of any period 2 oscillator left behind
+    _AssertSameFinal(_Soup(40, seed), generations=generations)
+
+
+def test_infinite_plane():
+    blinkerAndBlock = {"mode": "cells", "universe_size": 10,
+                       "rows": np.array([1, 1, 1, 5, 5, 6, 6]), "cols": np.array([1, 2, 3, 5, 6, 5, 6])}
+    _AssertSameFinal(blinkerAndBlock, boundary="infinite")
+    _AssertSameFinal(blinkerAndBlock, "hashlife", "infinite")
+
+
+def test_period_and_transient():
+    detector = CycleDetector()
+    states = [np.full((2, 2), value) for value in (0, 1, 2, 3, 2, 3)]
+    found = [detector.Observe(generation, state) for (generation, state) in enumerate(states)]
+    assert found == [False] * 4 + [True, True]
+    assert (detector.Period, detector.Transient) == (2, 2)
+    # From generation 4 (state 2), generation 11 is one step into the cycle
+    assert detector.Remaining(4, 11) == 1
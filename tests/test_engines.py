@@ -0,0 +1,51 @@
+"""NumpyEngine against LoopEngine, the original per-cell loop kept as the reference implementation."""
+
+import glob
+import os
+import numpy as np
+import pytest
+from engines import LoopEngine, NumpyEngine
+from loader import Loader
+from simulation import GoLSimulation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIGS = sorted(glob.glob(os.path.join(ROOT, "config_*.txt"))) + [os.path.join(ROOT, "config_3.json")]
+GENERATIONS = 25
+
+
+def _Seed(filename: str) -> np.array:
+    sim = GoLSimulation(Loader(filename).GetConfig(), logName=None)
+    sim._ApplyConfiguration()
+    return sim.Grid
+
+
+def _AssertSameRun(grid: np.array, generations: int, boundary="dead"):
+    size = grid.shape[0]
+    reference = LoopEngine(size, boundary=boundary)
+    engine = NumpyEngine(size, boundary=boundary)
+    expected = grid.copy()
+    actual = grid.copy()
+    for generation in range(1, generations + 1):
+        expected = reference.Step(expected)
+        actual = engine.Step(actual)
+        assert np.array_equal(actual, expected), f"grids differ at generation {generation}"
+
+
+@pytest.mark.parametrize("filename", CONFIGS, ids=os.path.basename)
+def test_shipped_configs(filename):
+    _AssertSameRun(_Seed(filename), GENERATIONS)
+
+
+@pytest.mark.parametrize("boundary", ["dead", "torus"])
+@pytest.mark.parametrize("density", [0.1, 0.3, 0.5, 0.8])
+def test_random_grids(boundary, density):
+    rng = np.random.default_rng(int(density * 10))
+    for size in range(1, 31):
+        grid = (rng.random((size, size)) < density) * 255.0
+        _AssertSameRun(grid, 8, boundary)
+
+
+def test_steps_in_place():
+    grid = (np.random.default_rng(0).random((20, 20)) < 0.4) * 255.0
+    engine = NumpyEngine(20)
+    assert engine.Step(grid) is grid
@@ -0,0 +1,63 @@
+"""The ensemble summary depends on the seeds only, not on how they are chunked or spread over workers."""
+
+import csv
+import numpy as np
+import pytest
+from census import Census
+from engines import NumpyEngine
+from ensemble import COLUMNS, RunEnsemble
+from loader import SaveGrid
+from tests.test_engines import CONFIGS
+
+GENERATIONS = 150
+
+
+def _Seeds(directory, seed: int) -> list:
+    """Random soups of two sizes written as configuration files, followed by the shipped configurations"""
+    rng = np.random.default_rng(seed)
+    filenames = []
+    for index in range(6):
+        size = 24 if index % 2 == 0 else 40
+        grid = (rng.random((size, size)) < 0.35) * 255.0
+        filename = str(directory / f"soup_{index}.txt")
+        SaveGrid(filename, grid)
+        filenames.append(filename)
+    return filenames + CONFIGS
+
+
+def _Summary(filenames: list, output: str, **options) -> list:
+    RunEnsemble(filenames, GENERATIONS, output, **options)
+    with open(output, newline="") as summary:
+        return list(csv.reader(summary))
+
+
+def test_same_summary_for_a_fixed_seed(tmp_path):
+    summaries = []
+    for (name, options) in (("a", {"workers": 1}), ("b", {"workers": 2, "chunkSize": 3})):
+        (tmp_path / name).mkdir()
+        summaries.append(_Summary(_Seeds(tmp_path / name, 0), str(tmp_path / f"{name}.csv"), **options))
+    first, second = summaries
+    assert first[0] == COLUMNS
+    # Only the paths of the seed files differ
+    assert [row[1:] for row in first] == [row[1:] for row in second]
+
+
+@pytest.mark.parametrize("detectCycles", [True, False])
+def test_rows_match_single_runs(tmp_path, detectCycles):
+    filenames = _Seeds(tmp_path, 1)
+    rows = _Summary(filenames, str(tmp_path / "summary.csv"), workers=1, detectCycles=detectCycles)
+    census = Census()
+    for (filename, row) in zip(filenames, rows[1:]):
+        row = dict(zip(COLUMNS, row))
+        assert row["config"] == filename
+        size = int(row["universe_size"])
+        if filename in CONFIGS:
+            continue
+        with open(filename) as seedFile:
+            coords = np.loadtxt(seedFile, skiprows=1, dtype=int).reshape(-1, 2)
+        grid = np.zeros((size, size))
+        grid[coords[:, 0], coords[:, 1]] = 255
+        final = NumpyEngine(size).Advance(grid, GENERATIONS)
+        assert int(row["population"]) == int(np.count_nonzero(final))
+        counts = {label: str(counter) for (label, counter) in census.Count(final)}
+        assert {label: row[label] for label in COLUMNS[7:] if row[label] != "0"} == counts
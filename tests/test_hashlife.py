@@ -0,0 +1,62 @@
+"""HashLife only runs as the infinite plane, where it must follow the numpy infinite mode cell for cell."""
+
+import os
+import numpy as np
+import pytest
+from analytics import Analytics
+from engines import GetEngine
+from loader import Loader
+from simulation import GoLSimulation
+from tests.test_engines import CONFIGS
+
+
+def _PlaneCells(sim: GoLSimulation, grid: np.array) -> set:
+    rows, cols = np.nonzero(grid >= 255)
+    return set(zip((rows + sim.Engine.OriginRow).tolist(), (cols + sim.Engine.OriginCol).tolist()))
+
+
+def _Run(filename: str, engine: str, every: int, analytics=None) -> list:
+    sim = GoLSimulation(Loader(filename).GetConfig(), logName=None, engine=engine, boundary="infinite")
+    if analytics != None:
+        sim.Analytics = analytics
+    return [(stats, _PlaneCells(sim, grid)) for (grid, stats) in sim.IterGenerations(120, every)]
+
+
+@pytest.mark.parametrize("boundary", ["dead", "torus"])
+def test_bounded_universes_are_refused(boundary):
+    with pytest.raises(ValueError, match=r"\[BOUNDARY_NOT_SUPPORTED\]"):
+        GetEngine("hashlife", 100, boundary=boundary)
+
+
+@pytest.mark.parametrize("filename", CONFIGS, ids=os.path.basename)
+@pytest.mark.parametrize("every", [1, 17])
+def test_same_plane_as_numpy(filename, every):
+    assert _Run(filename, "hashlife", every) == _Run(filename, "numpy", every)
+
+
+def test_analytics_series():
+    expected = Analytics(heatmap=False)
+    actual = Analytics(heatmap=False)
+    _Run(CONFIGS[-1], "numpy", 1, expected)
+    _Run(CONFIGS[-1], "hashlife", 1, actual)
+    for (name, values) in expected.Arrays().items():
+        assert np.array_equal(actual.Arrays()[name], values), name
+
+
+def test_grid_is_only_written_when_read():
+    sim = GoLSimulation(Loader(CONFIGS[-1]).GetConfig(), logName=None, engine="hashlife", boundary="infinite")
+    stats = list(sim._IterStats(1000, 1000))[-1]
+    assert sim.Stale
+    grid = sim._CurrentGrid()
+    assert grid.dtype == np.uint8
+    assert stats["population"] == int(np.count_nonzero(grid))
+    reference = GoLSimulation(Loader(CONFIGS[-1]).GetConfig(), logName=None, boundary="infinite")
+    (expected, _), = reference.IterGenerations(1000, 1000)
+    assert _PlaneCells(sim, grid) == _PlaneCells(reference, expected)
+
+
+@pytest.mark.parametrize("engine", ["numpy", "hashlife"])
+def test_reallocated_grids_are_uint8(engine):
+    for (grid, _) in GoLSimulation(Loader(CONFIGS[-1]).GetConfig(), logName=None, engine=engine,
+                                   boundary="infinite").IterGenerations(200, 10):
+        assert grid.dtype == np.uint8
@@ -0,0 +1,77 @@
+"""Coordinate files must hold one pair per line, a malformed line is reported instead of shifting the pairs after it."""
+
+import subprocess
+import sys
+import numpy as np
+import pytest
+import loader
+from loader import Loader
+from tests.test_engines import ROOT
+
+
+def _Write(tmp_path, name: str, text: str) -> str:
+    filename = tmp_path / name
+    filename.write_text(text)
+    return str(filename)
+
+
+@pytest.mark.parametrize("body", [
+    "1 2\n3 4 5\n6 7\n",
+    "1 2\n3\n4 5\n",
+    "1 2\n3 x\n",
+    "1 2\n3",
+    "1 2\n3.5 4\n",
+])
+def test_malformed_txt_lines(tmp_path, body):
+    filename = _Write(tmp_path, "bad.txt", "10 10\n" + body)
+    with pytest.raises(ValueError, match=r"\[PATTERN_COORDS_INVALID\]"):
+        Loader(filename).GetConfig()
+
+
+def test_malformed_life106_line(tmp_path):
+    filename = _Write(tmp_path, "bad.lif", "#Life 1.06\n0 0\n1\n1 1\n")
+    with pytest.raises(ValueError, match=r"\[PATTERN_COORDS_INVALID\]"):
+        Loader(filename).GetConfig()
+
+
+def test_invalid_universe_size(tmp_path):
+    filename = _Write(tmp_path, "bad.txt", "ten\n1 2\n")
+    with pytest.raises(ValueError, match=r"\[INVALID_UNIVERSE_SIZE\]"):
+        Loader(filename).GetConfig()
+
+
+def test_blank_lines_and_comments(tmp_path):
+    filename = _Write(tmp_path, "ok.txt", "10 10\n\n1 2\n  \n# comment\n3 4\n\t\n5 6")
+    config = Loader(filename).GetConfig()
+    assert np.array_equal(config["rows"], [1, 3, 5])
+    assert np.array_equal(config["cols"], [2, 4, 6])
+
+
+def test_check_config_exit_status(tmp_path):
+    filename = _Write(tmp_path, "bad.txt", "10 10\n1 2\n3 4 5\n")
+    result = subprocess.run([sys.executable, "main.py", "--check-config", filename],
+                            cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "[PATTERN_COORDS_INVALID]" in result.stdout
+    assert "could not be read" not in result.stdout
+
+
+@pytest.mark.parametrize("name, text, cells", [
+    ("empty.lif", "#Life 1.06\n", 0),
+    ("blank.txt", "10 10\n\n", 0),
+    ("comment.txt", "10 10\n# nothing yet\n", 0),
+    ("spaces.txt", "10 10\n  \n\t\n", 0),
+])
+def test_no_coordinates(tmp_path, name, text, cells):
+    config = Loader(_Write(tmp_path, name, text)).GetConfig()
+    assert config["rows"].shape[0] == cells
+    assert config["cols"].shape[0] == cells
+
+
+def test_chunk_without_coordinates(tmp_path, monkeypatch):
+    # Small chunks, one of them only holds the comment block
+    monkeypatch.setattr(loader, "CHUNK_SIZE", 16)
+    text = "10 10\n1 2\n" + "# a long comment line\n" * 4 + "\n\n3 4\n"
+    config = Loader(_Write(tmp_path, "comments.txt", text)).GetConfig()
+    assert np.array_equal(config["rows"], [1, 3])
+    assert np.array_equal(config["cols"], [2, 4])
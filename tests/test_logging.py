@@ -0,0 +1,51 @@
+"""Window runs log the generation each record was taken at, however many generations a frame advances."""
+
+import contextlib
+import io
+import json
+import pytest
+from loader import Loader
+from simulation import GoLSimulation
+from tests.test_engines import CONFIGS
+
+
+class _Image:
+    def set_data(self, data):
+        pass
+
+    def set_extent(self, extent):
+        pass
+
+
+def _Logged(tmp_path, renderEvery: int, logEvery: int, frames=7) -> list:
+    logName = str(tmp_path / "run.jsonl")
+    sim = GoLSimulation(Loader(CONFIGS[0]).GetConfig(), logName=logName, logLevel="stats", logEvery=logEvery)
+    sim._ApplyConfiguration()
+    sim.RenderEvery = renderEvery
+    with contextlib.redirect_stdout(io.StringIO()):
+        for frameNum in range(frames):
+            sim._Update(frameNum, _Image(), sim.GridSize)
+    sim.Close()
+    with open(logName) as logFile:
+        return [json.loads(line)["generation"] for line in logFile]
+
+
+@pytest.mark.parametrize("renderEvery, logEvery, expected", [
+    (1, 1, [1, 2, 3, 4, 5, 6, 7]),
+    (1, 3, [3, 6]),
+    (5, 7, [10, 15, 25, 30, 35]),
+    (5, 1, [5, 10, 15, 20, 25, 30, 35]),
+    (4, 8, [8, 16, 24]),
+])
+def test_logged_generations(tmp_path, renderEvery, logEvery, expected):
+    assert _Logged(tmp_path, renderEvery, logEvery) == expected
+
+
+@pytest.mark.parametrize("logEvery, created", [(None, False), (5, True)])
+def test_headless_log_file(tmp_path, logEvery, created):
+    logName = tmp_path / "debug_sim.log"
+    sim = GoLSimulation(Loader(CONFIGS[0]).GetConfig(), logName=str(logName), logEvery=logEvery)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim.RunHeadless(10, str(tmp_path / "final.txt"))
+    sim.Close()
+    assert logName.exists() == created
@@ -0,0 +1,93 @@
+"""Out-of-core runs match the numpy engine and never leave a half written generation behind."""
+
+import numpy as np
+import pytest
+import snapshot
+from engines import GetEngine
+from outofcore import CreateUniverse, OutOfCoreEngine, RunOutOfCore
+from packed import Unpack
+from rules import ParseRule
+
+
+def _Soup(size: int, seed=0) -> np.array:
+    grid = np.zeros((size, size))
+    grid[np.random.default_rng(seed).random((size, size)) < 0.35] = 255
+    return grid
+
+
+def _Create(filename: str, grid: np.array, rule="B3/S23"):
+    rows, cols = np.nonzero(grid)
+    CreateUniverse(filename, {"mode": "cells", "universe_size": grid.shape[0],
+                              "rows": rows, "cols": cols, "rule": ParseRule(rule)})
+
+
+def _Stored(filename: str) -> (int, np.array):
+    header, cells = snapshot.Load(filename)
+    return header["generation"], Unpack(cells, header["cols"])
+
+
+@pytest.mark.parametrize("size, bandRows, generations, rule", [
+    (200, 7, 9, "B3/S23"),
+    (130, 2, 6, "highlife"),
+    (77, 1, 5, "B36/S23"),
+    (300, 300, 11, "B3/S23"),
+])
+def test_same_generations_as_numpy(tmp_path, size, bandRows, generations, rule):
+    filename = str(tmp_path / "universe.gol")
+    grid = _Soup(size)
+    _Create(filename, grid, rule)
+    engine = OutOfCoreEngine(filename, bandBytes=bandRows * 8 * -(-size // 64))
+    engine.Advance(generations)
+    engine.Close()
+
+    expected = GetEngine("numpy", size, rule=ParseRule(rule)).Advance(grid.copy(), generations)
+    generation, stored = _Stored(filename)
+    assert generation == generations
+    assert np.array_equal(stored, expected)
+
+
+def test_interrupted_pass(tmp_path):
+    filename = str(tmp_path / "universe.gol")
+    grid = _Soup(150)
+    _Create(filename, grid)
+    engine = OutOfCoreEngine(filename, bandBytes=8 * 3 * 10)
+    engine.Advance(4)
+    calls = []
+
+    def Fail(start, rows):
+        calls.append(start)
+        if len(calls) > 3:
+            raise KeyboardInterrupt()
+        OutOfCoreEngine._Write(engine, start, rows)
+
+    engine._Write = Fail
+    with pytest.raises(KeyboardInterrupt):
+        engine.Advance(2)
+    engine.Close()
+
+    numpy = GetEngine("numpy", 150)
+    generation, stored = _Stored(filename)
+    assert generation == 4
+    assert np.array_equal(stored, numpy.Advance(grid.copy(), 4))
+
+    engine = OutOfCoreEngine(filename, bandBytes=8 * 3 * 10)
+    engine.Advance(3)
+    engine.Close()
+    generation, stored = _Stored(filename)
+    assert generation == 7
+    assert np.array_equal(stored, numpy.Advance(grid.copy(), 7))
+
+
+def test_existing_snapshot_is_kept(tmp_path):
+    filename = str(tmp_path / "universe.gol")
+    first = {"mode": "cells", "universe_size": 64, "rows": np.array([1, 1, 1]), "cols": np.array([0, 1, 2])}
+    second = {"mode": "cells", "universe_size": 32, "rows": np.zeros(0, dtype=np.int64), "cols": np.zeros(0, dtype=np.int64)}
+    RunOutOfCore(first, filename, 3)
+    with pytest.raises(ValueError, match=r"\[SNAPSHOT_EXISTS\]"):
+        RunOutOfCore(second, filename, 3)
+    generation, stored = _Stored(filename)
+    assert (generation, stored.shape) == (3, (64, 64))
+
+    RunOutOfCore(second, filename, 3, overwrite=True)
+    generation, stored = _Stored(filename)
+    assert (generation, stored.shape) == (3, (32, 32))
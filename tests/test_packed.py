@@ -0,0 +1,45 @@
+"""The packed engine keeps the simulation state packed and gives the same generations as numpy."""
+
+import os
+import numpy as np
+import pytest
+from loader import Loader
+from simulation import GoLSimulation
+from tests.test_engines import CONFIGS
+
+
+def _Run(filename: str, engine: str, generations=60, metrics=None) -> list:
+    sim = GoLSimulation(Loader(filename).GetConfig(), logName=None, engine=engine, metricsFile=metrics)
+    counters = []
+    sim.AddObserver(lambda stats: counters.append(dict(stats)))
+    grids = [(stats, grid >= 255) for (grid, stats) in sim.IterGenerations(generations, every=7)]
+    return grids, counters
+
+
+@pytest.mark.parametrize("filename", CONFIGS, ids=os.path.basename)
+def test_same_generations_as_numpy(filename):
+    expected, _ = _Run(filename, "numpy")
+    actual, _ = _Run(filename, "packed")
+    assert [stats for (stats, _) in actual] == [stats for (stats, _) in expected]
+    for ((_, want), (_, got)) in zip(expected, actual):
+        assert np.array_equal(got, want)
+
+
+def test_metered_counters(tmp_path):
+    filename = CONFIGS[0]
+    _, expected = _Run(filename, "numpy", 30, str(tmp_path / "numpy.json"))
+    _, actual = _Run(filename, "packed", 30, str(tmp_path / "packed.json"))
+    assert actual == expected
+
+
+def test_no_float_grid(tmp_path):
+    rle = tmp_path / "glider.rle"
+    rle.write_text("x = 3, y = 3\nbob$2bo$3o!\n")
+    sim = GoLSimulation(Loader(str(rle), 1000).GetConfig(), logName=None, engine="packed")
+    sim._ApplyConfiguration()
+    assert sim.Grid is None
+    assert sim.Cells.nbytes == 1000 * 16 * 8
+    sim._Step(4)
+    assert sim.Grid is None
+    assert sim._Population() == 5
+    assert sim._CurrentGrid().dtype == np.uint8
@@ -0,0 +1,54 @@
+"""Row bands advanced by worker processes must join up into what numpy computes for the whole universe."""
+
+import numpy as np
+import pytest
+from engines import NumpyEngine
+from parallel import ParallelEngine
+from rules import ParseRule
+
+RULES = ["B3/S23", "B36/S23", "B2/S", "B0/S8", "B3678/S34678", "B1357/S1357", "B3/S012345678", "B/S"]
+SIZES = [1, 5, 63, 64, 65, 130]
+GENERATIONS = 12
+
+
+def _AssertSameRun(size: int, workers: int, rule: str, chunk=1):
+    rule = ParseRule(rule)
+    grid = (np.random.default_rng(size).random((size, size)) < 0.3) * 255.0
+    engine = ParallelEngine(size, workers, rule=rule)
+    reference = NumpyEngine(size, rule=rule)
+    expected = grid.copy()
+    actual = grid.copy()
+    try:
+        for generation in range(chunk, GENERATIONS + 1, chunk):
+            expected = reference.Advance(expected, chunk)
+            actual = engine.Advance(actual, chunk)
+            assert np.array_equal(actual, expected), f"grids differ at generation {generation}"
+    finally:
+        engine.Close()
+
+
+@pytest.mark.parametrize("rule", RULES)
+def test_rules(rule):
+    _AssertSameRun(65, 3, rule)
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_sizes(size):
+    # More workers than rows leaves one row per worker
+    _AssertSameRun(size, 4, "B3/S23")
+
+
+def test_several_generations_per_call():
+    _AssertSameRun(64, 3, "B36/S23", chunk=4)
+
+
+def test_grid_changed_between_calls():
+    grid = (np.random.default_rng(0).random((40, 40)) < 0.3) * 255.0
+    engine = ParallelEngine(40, 2)
+    try:
+        engine.Step(grid)
+        other = (np.random.default_rng(1).random((40, 40)) < 0.3) * 255.0
+        expected = NumpyEngine(40).Step(other.copy())
+        assert np.array_equal(engine.Step(other), expected)
+    finally:
+        engine.Close()
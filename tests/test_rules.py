@@ -0,0 +1,77 @@
+"""Rule parsing, and every engine against the rule table applied cell by cell."""
+
+import numpy as np
+import pytest
+from engines import GetEngine
+from rules import CONWAY, ParseRule, Rule
+
+RULES = ["B3/S23", "B36/S23", "B2/S", "B0/S8", "B3678/S34678", "B1357/S1357", "B3/S012345678", "B/S"]
+# Around the 64-bit words of the packed engine
+SIZES = [1, 5, 63, 64, 65, 130]
+GENERATIONS = 6
+
+
+@pytest.mark.parametrize("text, birth, survival", [
+    ("B3/S23", (3,), (2, 3)),
+    ("b36/s23", (3, 6), (2, 3)),
+    ("S23/B36", (3, 6), (2, 3)),
+    ("B3S23", (3,), (2, 3)),
+    (" B 3 / S 2 3 ", (3,), (2, 3)),
+    ("23/3", (3,), (2, 3)),
+    ("/2", (2,), ()),
+    ("B/S", (), ()),
+    ("B0/S8", (0,), (8,)),
+    ("B33/S3223", (3,), (2, 3)),
+    ("HighLife", (3, 6), (2, 3)),
+    ("seeds", (2,), ()),
+    (CONWAY, (3,), (2, 3)),
+])
+def test_parse(text, birth, survival):
+    rule = ParseRule(text)
+    assert (rule.Birth, rule.Survival) == (birth, survival)
+    assert ParseRule(str(rule)) == rule
+
+
+@pytest.mark.parametrize("text", ["", "B9/S23", "B3/S29", "B3/S23/", "3/3/3", "B-1/S2", "B3,S23", "conway2", "S23", None])
+def test_rejected(text):
+    with pytest.raises(ValueError, match=r"\[INVALID_RULE\]"):
+        ParseRule(text)
+
+
+def test_groups():
+    rule = ParseRule("B36/S23")
+    assert (rule.Always, rule.BirthOnly, rule.SurvivalOnly) == ((3,), (6,), (2,))
+    assert not rule.B0 and ParseRule("B0/S8").B0
+    assert rule == Rule([6, 3], [3, 2]) and hash(rule) == hash(Rule([6, 3], [3, 2]))
+
+
+def _Reference(grid: np.array, rule: Rule, torus: bool) -> np.array:
+    alive = (grid >= 255).astype(np.uint8)
+    padded = np.pad(alive, 1, mode="wrap" if torus else "constant")
+    neighbours = sum(np.roll(np.roll(padded, di, 0), dj, 1)
+                     for di in (-1, 0, 1) for dj in (-1, 0, 1) if (di, dj) != (0, 0))[1:-1, 1:-1]
+    return rule.Table[alive, neighbours] * 255.0
+
+
+def _AssertSameRun(engineName: str, size: int, rule: str, boundary="dead"):
+    rule = ParseRule(rule)
+    grid = (np.random.default_rng(size).random((size, size)) < 0.3) * 255.0
+    engine = GetEngine(engineName, size, boundary=boundary, rule=rule)
+    expected = grid.copy()
+    for generation in range(1, GENERATIONS + 1):
+        expected = _Reference(expected, rule, boundary == "torus")
+        grid = engine.Step(grid)
+        assert np.array_equal(grid >= 255, expected >= 255), f"grids differ at generation {generation}"
+
+
+@pytest.mark.parametrize("rule", RULES)
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("engineName, boundary", [("numpy", "dead"), ("numpy", "torus"), ("packed", "dead")])
+def test_engines(engineName, boundary, size, rule):
+    _AssertSameRun(engineName, size, rule, boundary)
+
+
+@pytest.mark.parametrize("rule", RULES)
+@pytest.mark.parametrize("boundary", ["dead", "torus"])
+def test_loop_engine(boundary, rule):
+    _AssertSameRun("loop", 12, rule, boundary)
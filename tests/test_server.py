@@ -0,0 +1,123 @@
+"""Sessions over HTTP and WebSockets, driven by a real asyncio client against a server on a free port."""
+
+import asyncio
+import base64
+import json
+import os
+import struct
+import numpy as np
+import pytest
+from engines import GetEngine
+from loader import Loader
+from server import MAX_UNIVERSE, SimulationServer
+from simulation import GoLSimulation
+from tests.test_engines import CONFIGS
+
+
+async def _Http(port: int, method: str, path: str, body=b"") -> (int, dict):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    data = await reader.read()
+    writer.close()
+    head, _, payload = data.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+async def _Receive(reader) -> dict:
+    _, length = await reader.readexactly(2)
+    length &= 127
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    return json.loads(await reader.readexactly(length))
+
+
+async def _Stream(port: int, path: str, messages: int) -> list:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: test\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    head = await reader.readuntil(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 101")
+    received = [await _Receive(reader) for _ in range(messages)]
+    writer.close()
+    return received
+
+
+def _Serve(client):
+    """Runs client(port) against a fresh server"""
+    async def Run():
+        server = await asyncio.start_server(SimulationServer(workers=2).Handle, "127.0.0.1", 0)
+        try:
+            return await client(server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+    return asyncio.run(Run())
+
+
+def _Reference(generation: int) -> np.array:
+    sim = GoLSimulation(Loader(CONFIGS[-1]).GetConfig(), logName=None)
+    sim._ApplyConfiguration()
+    return GetEngine("numpy", sim.GridSize).Advance(sim.Grid, generation) >= 255
+
+
+def test_create_and_step():
+    with open(CONFIGS[-1], "rb") as configFile:
+        body = configFile.read()
+
+    async def Client(port):
+        status, created = await _Http(port, "POST", "/sessions?engine=packed&every=3", body)
+        assert status == 200
+        status, stepped = await _Http(port, "POST", f"/sessions/{created['session']}/step?generations=5")
+        assert status == 200
+        return created, stepped
+
+    created, stepped = _Serve(Client)
+    assert (created["generation"], created["size"], created["engine"]) == (0, [100, 100], "packed")
+    assert created["population"] == int(np.count_nonzero(_Reference(0)))
+    assert stepped["generation"] == 5
+    assert stepped["population"] == int(np.count_nonzero(_Reference(5)))
+
+
+def test_stream_follows_the_simulation():
+    with open(CONFIGS[-1], "rb") as configFile:
+        body = configFile.read()
+
+    async def Client(port):
+        _, created = await _Http(port, "POST", "/sessions", body)
+        return await _Stream(port, f"/sessions/{created['session']}/stream", 20)
+
+    messages = _Serve(Client)
+    assert messages[0]["type"] == "frame"
+    state = np.zeros(messages[0]["size"], dtype=bool)
+    for message in messages:
+        cells = np.array(message["cells" if message["type"] == "frame" else "flipped"], dtype=int).reshape(-1, 2)
+        if message["type"] == "frame":
+            state[:] = False
+        state[cells[:, 0], cells[:, 1]] ^= True
+    assert np.array_equal(state, _Reference(messages[-1]["generation"]))
+
+
+@pytest.mark.parametrize("path, body, tag", [
+    ("/sessions", b"[]", "[INVALID_CONFIG]"),
+    ("/sessions", b'{"universe_size": 10, "patterns": [1]}', "[PATTERN_TYPE_NOT_FOUND]"),
+    ("/sessions", b'{"universe_size": 10, "patterns": 5}', "[INVALID_CONFIG]"),
+    ("/sessions", b'{"universe_size": 10, "patterns": [{"type": "blinker", "topLeftCornerPosition": 3}]}',
+     "[TOP_LEFT_CORNER_POSITION_NOT_FOUND]"),
+    ("/sessions", b"{nope", "[INVALID_CONFIG]"),
+    ("/sessions", b'{"universe_size": 100000000, "patterns": []}', "[UNIVERSE_TOO_LARGE]"),
+    (f"/sessions?universe_size={MAX_UNIVERSE + 1}", b'{"universe_size": 10, "patterns": []}', "[UNIVERSE_TOO_LARGE]"),
+    ("/sessions?engine=parallel", b'{"universe_size": 10, "patterns": []}', "[ENGINE_NOT_SUPPORTED]"),
+    ("/sessions?rule=B9", b'{"universe_size": 10, "patterns": []}', "[INVALID_RULE]"),
+])
+def test_bad_input(path, body, tag):
+    status, response = _Serve(lambda port: _Http(port, "POST", path, body))
+    assert status == 400
+    assert response["error"].startswith(tag), response
+
+
+def test_unknown_session():
+    status, response = _Serve(lambda port: _Http(port, "GET", "/sessions/missing"))
+    assert status == 404
+    assert response["error"].startswith("[SESSION_NOT_FOUND]")
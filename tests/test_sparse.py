@@ -0,0 +1,42 @@
+"""The sparse engine skips tiles that cannot change, what it computes must still be what numpy computes."""
+
+import numpy as np
+import pytest
+from engines import GetEngine, NumpyEngine
+from rules import ParseRule
+
+# Every rule the sparse engine accepts, birth on empty space (B0) is refused
+RULES = ["B3/S23", "B36/S23", "B2/S", "B3678/S34678", "B1357/S1357", "B3/S012345678", "B/S"]
+# Tile edges (32 cells) and universes smaller than a tile
+SIZES = [1, 5, 31, 32, 33, 63, 64, 65, 130]
+GENERATIONS = 12
+
+
+@pytest.mark.parametrize("rule", RULES)
+@pytest.mark.parametrize("size", SIZES)
+def test_same_generations_as_numpy(rule, size):
+    rule = ParseRule(rule)
+    grid = (np.random.default_rng(size).random((size, size)) < 0.3) * 255.0
+    engine = GetEngine("sparse", size, rule=rule)
+    reference = NumpyEngine(size, rule=rule)
+    expected = grid.copy()
+    actual = grid.copy()
+    for generation in range(1, GENERATIONS + 1):
+        expected = reference.Step(expected)
+        actual = engine.Step(actual)
+        assert np.array_equal(actual, expected), f"grids differ at generation {generation}"
+
+
+def test_glider_crosses_tiles():
+    grid = np.zeros((200, 200))
+    grid[[0, 1, 2, 2, 2], [1, 2, 0, 1, 2]] = 255
+    engine = GetEngine("sparse", 200)
+    expected = NumpyEngine(200).Advance(grid.copy(), 400)
+    assert np.array_equal(engine.Advance(grid, 400), expected)
+    # Only the (at most 2x2) tiles under the glider and the tiles around them are evaluated
+    assert 0 < engine.ActiveTiles <= 16 < engine.TotalTiles
+
+
+def test_birth_on_empty_space_is_refused():
+    with pytest.raises(ValueError, match=r"\[RULE_NOT_SUPPORTED\]"):
+        GetEngine("sparse", 10, rule=ParseRule("B0/S8"))
@@ -0,0 +1,17 @@
+"""Importing main and checking a configuration stay cheap next to starting Python with numpy."""
+
+import sys
+import pytest
+from benchmarks import suite
+
+# Test machines run other work at the same time, the best of a few runs may still be several times slower than on an idle one
+MARGIN = 3
+REPEAT = 5
+
+
+@pytest.mark.parametrize("name", sorted(suite.STARTUP_COMMANDS))
+def test_startup_budget(name):
+    overhead = min(suite._TimeProcess(suite.STARTUP_COMMANDS[name], 1) -
+                   suite._TimeProcess([sys.executable, "-c", "import numpy"], 1) for _ in range(REPEAT))
+    assert overhead < MARGIN * suite.STARTUP_BUDGET, \
+        f"{name} takes {overhead:.3f}s on top of numpy, the budget is {suite.STARTUP_BUDGET}s"
@@ -0,0 +1,126 @@
+"""
+Unbounded universe, only the live bounding box plus a margin is ever stored.
+
+The grid handed back by the engine is a buffer that covers part of an
+infinite plane, Origin holds the plane coordinates of its top left cell.
+Every generation only the bounding box of the live cells (plus the one cell
+ring that can come alive) is recomputed. The buffer is reallocated when live
+cells get close to its edges, or when they only fill a small part of it, and
+always with enough slack around the bounding box that reallocations stay rare.
+"""
+
+import numpy as np
+from rules import CONWAY
+
+# Dead cells kept between the bounding box and the edge of the buffer after a reallocation
+MIN_MARGIN = 8
+# The buffer is shrunk once it is SHRINK_RATIO times bigger than a fresh reallocation along an axis
+SHRINK_RATIO = 4
+
+
+def _Margin(extent: int) -> int:
+    return max(MIN_MARGIN, extent // 2)
+
+
+def _LiveBox(alive: np.array) -> tuple:
+    """(top, left, bottom, right) of the live cells, bottom/right exclusive, None when empty"""
+    rows = np.flatnonzero(alive.any(axis=1))
+    if rows.shape[0] == 0:
+        return None
+    cols = np.flatnonzero(alive.any(axis=0))
+    return (int(rows[0]), int(cols[0]), int(rows[-1]) + 1, int(cols[-1]) + 1)
+
+
+class InfiniteEngine:
+    """Advances an unbounded universe, the grid it returns grows and shrinks with the live cells"""
+
+    def __init__(self, size: int, rule=CONWAY):
+        self.Size = size
+        self.Rule = rule
+        self.Grid = None
+        self.Box = None
+        # Plane coordinates of the top left cell of the buffer
+        self.OriginRow = 0
+        self.OriginCol = 0
+        self.Reallocations = 0
+        # Cells recomputed on the last generation
+        self.ActiveCells = 0
+        # analytics.Analytics fed with the alive masks of the region every step recomputes
+        self.Analytics = None
+
+    def Reset(self, grid: np.array):
+        self.Grid = grid
+        self.Box = _LiveBox(grid >= 255)
+
+    def _Reallocate(self):
+        """Moves the live cells into a new buffer with half their extent (at least MIN_MARGIN) free on every side"""
+        top, left, bottom, right = self.Box
+        height = bottom - top
+        width = right - left
+        marginRows = _Margin(height)
+        marginCols = _Margin(width)
+
+        grid = np.zeros((height + 2*marginRows, width + 2*marginCols), dtype=np.uint8)
+        grid[marginRows: marginRows+height, marginCols: marginCols +
+             width] = self.Grid[top: bottom, left: right]
+        self.OriginRow += top - marginRows
+        self.OriginCol += left - marginCols
+        self.Grid = grid
+        self.Box = (marginRows, marginCols, marginRows + height, marginCols + width)
+        self.Reallocations += 1
+
+    def _NeedsReallocation(self) -> bool:
+        top, left, bottom, right = self.Box
+        rows, cols = self.Grid.shape
+        # Cells next to the bounding box may come alive, they have to fit in the buffer
+        if top < 1 or left < 1 or bottom > rows - 1 or right > cols - 1:
+            return True
+        height = bottom - top
+        width = right - left
+        tooTall = rows > SHRINK_RATIO * (height + 2*_Margin(height))
+        tooWide = cols > SHRINK_RATIO * (width + 2*_Margin(width))
+        return tooTall or tooWide
+
+    def Step(self, grid: np.array) -> np.array:
+        if grid is not self.Grid:
+            self.Reset(grid)
+        if self.Box == None:
+            self.ActiveCells = 0
+            if self.Analytics != None:
+                empty = np.zeros((0, 0), dtype=bool)
+                self.Analytics.Record(empty, empty)
+            return self.Grid
+        if self._NeedsReallocation():
+            self._Reallocate()
+
+        top, left, bottom, right = self.Box
+        # Region that can change (bounding box plus one cell), read with one more dead ring around it
+        r0, c0, r1, c1 = top - 1, left - 1, bottom + 1, right + 1
+        self.ActiveCells = (r1 - r0) * (c1 - c0)
+        padded = np.zeros((r1 - r0 + 2, c1 - c0 + 2), dtype=np.uint8)
+        padded[2:-2, 2:-2] = self.Grid[top: bottom, left: right] >= 255
+        alive = padded[1:-1, 1:-1]
+
+        neighbours = padded[:-2, :-2] + padded[:-2, 1:-1]
+        neighbours += padded[:-2, 2:]
+        neighbours += padded[1:-1, :-2]
+        neighbours += padded[1:-1, 2:]
+        neighbours += padded[2:, :-2]
+        neighbours += padded[2:, 1:-1]
+        neighbours += padded[2:, 2:]
+
+        nextAlive = self.Rule.Apply(neighbours, alive)
+        np.multiply(nextAlive, 255, out=self.Grid[r0: r1, c0: c1], casting="unsafe")
+
+        box = _LiveBox(nextAlive)
+        if self.Analytics != None:
+            self.Analytics.Record(alive, nextAlive, box, (self.OriginRow + r0, self.OriginCol + c0))
+        if box != None:
+            box = (box[0] + r0, box[1] + c0, box[2] + r0, box[3] + c0)
+        self.Box = box
+        return self.Grid
+
+    def Advance(self, grid: np.array, generations: int) -> np.array:
+        for _ in range(generations):
+            grid = self.Step(grid)
+        return grid